@@ -0,0 +1,59 @@
+"""Alchemist: cellular automata for a 2D chemistry game
+
+Importing the package loads only the headless core, numpy and the modules
+below, with no side effects: nothing is allocated, seeded or opened. The
+other modules are loaded the first time one of their names is used:
+
+    alchemist.HashLife          hashlife        unbounded HashLife universes
+    alchemist.ChunkedWorld      chunks          unbounded worlds of chunks, spilled to disk
+    alchemist.load, dumps...    patterns        RLE and plaintext pattern files
+    alchemist.HistoryWriter...  history         recorded runs
+    alchemist.ParallelRunner    parallel        biomes stepped by worker processes
+    alchemist.esper             esper           the entity component system
+    alchemist.SpatialHash...    spatial         entities on the grid
+    alchemist.GridRenderer      render          pyglet rendering
+    alchemist.FixedTimestep...  gameloop        game loops
+    alchemist.AtlasLoader...    assets          texture atlases
+
+`python -m alchemist.importtime` checks the cost of the import against a budget,
+and `python -m alchemist.bench` times the engines, stamping and the ECS.
+"""
+import importlib
+
+from .alchemy import (
+    Cell, stamp, BLENDS, EDGES, PackedGrid,
+    Engine, LegacyEngine, VectorizedEngine, BitPackedEngine, TiledEngine, RuleEngine, ENGINES,
+    CycleDetector, ConnwaysGameOfLife, life_table, BiomeBatch, DisplayWidget,
+)
+from .rules import Element, Rule, RuleStepper, compile_rule
+
+Biome = ConnwaysGameOfLife
+
+# name -> the submodule it is loaded from on first use
+_LAZY = {
+    'HashLife': 'hashlife',
+    'ChunkedWorld': 'chunks',
+    'load': 'patterns', 'loads': 'patterns', 'iter_load': 'patterns', 'dump': 'patterns', 'dumps': 'patterns',
+    'HistoryWriter': 'history', 'HistoryReader': 'history',
+    'ParallelRunner': 'parallel',
+    'GridPosition': 'spatial', 'SpatialHash': 'spatial', 'SpatialProcessor': 'spatial',
+    'GridRenderer': 'render', 'palette': 'render', 'PALETTE': 'render',
+    'FixedTimestep': 'gameloop', 'SimulationThread': 'gameloop',
+    'Atlas': 'assets', 'AtlasLoader': 'assets', 'TileMap': 'assets',
+}
+_SUBMODULES = {'alchemy', 'rules', 'hashlife', 'chunks', 'patterns', 'history', 'parallel', 'esper', 'spatial',
+               'render', 'gameloop', 'assets', 'importtime', 'bench'}
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'.{name}', __name__)
+    if name in _LAZY:
+        value = getattr(importlib.import_module(f'.{_LAZY[name]}', __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY) | _SUBMODULES)
@@ -0,0 +1,890 @@
+import numpy as np
+import numpy.typing as npt
+from collections import deque
+
+from .rules import RuleStepper, compile_rule
+
+# Connway's Game of Life
+# http://en.wikipedia.org/wiki/Conway's_Game_of_Life
+
+# The universe of the Game of Life is an infinite, two-dimensional orthogonal grid of square cells, 
+# each of which is in one of two possible states, alive or dead. Every cell interacts with its eight neighbours,
+# which are the cells that are horizontally, vertically, or diagonally adjacent. At each step in time,
+# the following transitions occur:
+# Any live cell with fewer than two live neighbours dies, as if caused by under-population.
+# Any live cell with two or three live neighbours lives on to the next generation.
+# Any live cell with more than three live neighbours dies, as if by overcrowding.
+# Any dead cell with exactly three live neighbours becomes a live cell, as if by reproduction.
+
+# The initial pattern constitutes the seed of the system.
+# The first generation is created by applying the above rules simultaneously to every cell in the seed-births and deaths occur simultaneously,
+# and the discrete moment at which this happens is sometimes called a tick (in other words, each generation is a pure function of the preceding one).
+# The rules continue to be applied repeatedly to create further generations.
+
+# The Game of Life is Turing complete and can simulate a universal constructor or any other Turing machine.
+
+########################################################################################
+#
+#
+#   The Alchemy System
+#
+#
+########################################################################################
+
+
+############################################
+#
+#
+#   Cell: A class for creating and storing cells
+#
+#
+############################################
+
+# a cell is a 2d array of 0s and 1s
+# it is a premade cellular automata
+# each cell is a seed which may be applied to a grid which is applied to a biome
+class Cell():
+    def __init__(self, grid: npt.NDArray[np.int8], name: str = None, rule: str = None):
+        self.grid = grid
+        self.name = name
+        self.rule = rule
+
+    def __repr__(self):
+        return str(self.grid)
+
+    def apply(self, grid: npt.NDArray[np.int8], x: int, y: int,
+              edge: str = 'clip', blend: str = 'overwrite') -> npt.NDArray[np.int8]:
+        """Apply the cell to the grid at the given x and y coordinates"""
+        h, w = self.grid.shape
+        inside = 0 <= x and 0 <= y and x + h <= grid.shape[0] and y + w <= grid.shape[1]
+        if isinstance(grid, PackedGrid) and blend == 'overwrite' and edge == 'clip':
+            grid.paste(self.grid, x, y)
+            return grid
+        if isinstance(grid, np.ndarray) and blend == 'overwrite' and inside:
+            grid[x:x+h, y:y+w] = self.grid
+            return grid
+        return stamp(grid, [(self, x, y)], edge=edge, blend=blend)
+
+
+# how a stamp combines with the cells already in the grid
+BLENDS = ('overwrite', 'or', 'xor')
+
+# what happens to the part of a stamp that falls off the grid
+EDGES = ('clip', 'wrap')
+
+
+def stamp(grid: npt.NDArray[np.int8], placements, edge: str = 'clip', blend: str = 'overwrite') -> npt.NDArray[np.int8]:
+    """Apply many cells to the grid at once, from an iterable of (cell, x, y)
+
+    Placements of the same cell are grouped and written with one scatter per
+    cell. edge is 'clip' to drop what falls off the grid, or 'wrap' to bring
+    it back in on the far side as if the grid were a torus. blend is
+    'overwrite' to copy every cell of the stamp, dead ones included, 'or' to
+    add only its live cells, or 'xor' to toggle the cells under its live ones.
+    Overlapping overwrites are applied cell by cell in order of first
+    appearance, and within one cell in placement order, so the later wins.
+    """
+    if edge not in EDGES:
+        raise ValueError(f'edge must be one of {EDGES}, not {edge!r}')
+    if blend not in BLENDS:
+        raise ValueError(f'blend must be one of {BLENDS}, not {blend!r}')
+    if isinstance(grid, PackedGrid):
+        cells = stamp(grid.to_array(), placements, edge=edge, blend=blend)
+        grid.load(cells)
+        return grid
+
+    groups = {}
+    for cell, x, y in placements:
+        groups.setdefault(id(cell), (cell, []))[1].append((x, y))
+
+    gh, gw = grid.shape
+    for cell, positions in groups.values():
+        rows, cols = np.nonzero(cell.grid) if blend != 'overwrite' else np.indices(cell.grid.shape).reshape(2, -1)
+        values = cell.grid[rows, cols]
+        origin = np.array(positions, dtype=np.intp)
+
+        # every cell of every placement of this cell, one row per placement
+        r = (origin[:, :1] + rows).ravel()
+        c = (origin[:, 1:] + cols).ravel()
+        v = np.broadcast_to(values, (len(origin), len(values))).ravel()
+
+        if edge == 'wrap':
+            r %= gh
+            c %= gw
+        else:
+            keep = (r >= 0) & (r < gh) & (c >= 0) & (c < gw)
+            r, c, v = r[keep], c[keep], v[keep]
+
+        if blend == 'overwrite':
+            grid[r, c] = v
+        elif blend == 'or':
+            np.bitwise_or.at(grid, (r, c), v)
+        else:
+            np.bitwise_xor.at(grid, (r, c), v)
+    return grid
+
+############################################
+#
+#
+#   PackedGrid: 64 cells to a machine word
+#
+#
+############################################
+
+# each row of the grid is stored as uint64 words, bit j of word k holding column 64 * k + j
+# a generation is computed with bitwise adders over whole words (SWAR),
+# so 64 cells are summed and ruled on by every numpy operation
+class PackedGrid():
+    """A two state grid packed 64 cells to a uint64 word along each row"""
+    def __init__(self, shape: tuple):
+        h, w = shape
+        self.shape = (h, w)
+        self.nwords = -(-w // 64)
+
+        # one zero row above and below stands in for the dead cells past the edge
+        self.words = np.zeros((h + 2, self.nwords), dtype=np.uint64)
+        self._back = np.zeros((h + 2, self.nwords), dtype=np.uint64)
+
+        # bits past the last column of the last word must stay dead
+        spare = self.nwords * 64 - w
+        self._mask = np.uint64((1 << (64 - spare)) - 1)
+
+        # scratch for a band of rows at a time, so stepping never holds
+        # more than a few hundred kilobytes beyond the two packed buffers
+        self._band = max(16, min(h, 65536 // self.nwords))
+        b = self._band
+        self._wide = [np.zeros((b + 2, self.nwords), dtype=np.uint64) for i in range(4)]
+        self._narrow = [np.zeros((b, self.nwords), dtype=np.uint64) for i in range(5)]
+
+    def __repr__(self):
+        return str(self.to_array())
+
+    @classmethod
+    def from_array(cls, grid: npt.NDArray[np.int8]) -> "PackedGrid":
+        """Pack an int8 grid of 0s and 1s"""
+        packed = cls(grid.shape)
+        packed.load(grid)
+        return packed
+
+    def load(self, grid: npt.NDArray[np.int8]):
+        """Overwrite the packed cells with the contents of an int8 grid"""
+        self.words[1:-1] = self._pack(grid)
+
+    def to_array(self, out: npt.NDArray[np.int8] = None) -> npt.NDArray[np.int8]:
+        """Unpack the cells into an int8 grid, written into out if given"""
+        cells = self._unpack(self.words[1:-1])
+        if out is None:
+            return cells
+        out[...] = cells
+        return out
+
+    def paste(self, cells: npt.NDArray[np.int8], x: int, y: int):
+        """Overwrite a block of cells at the given x and y coordinates, clipped to the grid"""
+        h, w = self.shape
+        r0, c0 = max(x, 0), max(y, 0)
+        r1, c1 = min(x + cells.shape[0], h), min(y + cells.shape[1], w)
+        if r0 >= r1 or c0 >= c1:
+            return
+        # only rows 1 to h of words hold cells; the dead padding rows are never written
+        rows = self._unpack(self.words[r0 + 1:r1 + 1])
+        rows[:, c0:c1] = cells[r0 - x:r1 - x, c0 - y:c1 - y]
+        self.words[r0 + 1:r1 + 1] = self._pack(rows)
+
+    def _pack(self, grid: npt.NDArray[np.int8]) -> npt.NDArray[np.uint64]:
+        bits = np.packbits(grid.astype(bool), axis=1, bitorder='little')
+        padded = np.zeros((grid.shape[0], self.nwords * 8), dtype=np.uint8)
+        padded[:, :bits.shape[1]] = bits
+        return padded.view('<u8')
+
+    def _unpack(self, words: npt.NDArray[np.uint64]) -> npt.NDArray[np.int8]:
+        raw = np.ascontiguousarray(words, dtype='<u8').view(np.uint8)
+        bits = np.unpackbits(raw, axis=1, count=self.shape[1], bitorder='little')
+        return bits.view(np.int8)
+
+    def step(self, generations: int = 1):
+        """Advance the grid by the given number of generations"""
+        h = self.shape[0]
+        for i in range(generations):
+            for r0 in range(0, h, self._band):
+                self._step_band(r0, min(r0 + self._band, h))
+            self.words, self._back = self._back, self.words
+
+    def _step_band(self, r0: int, r1: int):
+        one, top = np.uint64(1), np.uint64(63)
+        n = r1 - r0
+        src = self.words[r0:r1 + 2]
+        alive = src[1:-1]
+        dst = self._back[r0 + 1:r1 + 1]
+        west, east, t, lo = (buf[:n + 2] for buf in self._wide)
+        s1, s2, s3, s4, s5 = (buf[:n] for buf in self._narrow)
+
+        # the west and east neighbour of every bit, carried across word boundaries
+        np.left_shift(src, one, out=west)
+        west[:, 1:] |= src[:, :-1] >> top
+        np.right_shift(src, one, out=east)
+        east[:, :-1] |= src[:, 1:] << top
+
+        # horizontal 3-sum of every row as a two bit number (hi, lo)
+        np.bitwise_xor(west, src, out=t)
+        np.bitwise_and(west, src, out=west)
+        np.bitwise_xor(t, east, out=lo)
+        np.bitwise_and(east, t, out=east)
+        hi = np.bitwise_or(west, east, out=west)
+
+        # vertical sum of three rows gives the 3x3 count including the cell, bits b0..b3
+        np.bitwise_xor(lo[:-2], lo[1:-1], out=s1)
+        np.bitwise_and(lo[:-2], lo[1:-1], out=s2)
+        np.bitwise_and(lo[2:], s1, out=s3)
+        np.bitwise_or(s2, s3, out=s2)           # carry into the twos
+        np.bitwise_xor(s1, lo[2:], out=s1)      # b0
+        np.bitwise_xor(hi[:-2], hi[1:-1], out=s3)
+        np.bitwise_and(hi[:-2], hi[1:-1], out=s4)
+        np.bitwise_and(hi[2:], s3, out=s5)
+        np.bitwise_or(s4, s5, out=s4)           # carry into the fours
+        np.bitwise_xor(s3, hi[2:], out=s3)      # twos from the rows
+        np.bitwise_and(s2, s3, out=s5)          # second carry into the fours
+        np.bitwise_xor(s2, s3, out=s2)          # b1
+        np.bitwise_and(s5, s4, out=s3)          # b3
+        np.bitwise_xor(s5, s4, out=s4)          # b2
+
+        # B3/S23 on the count including the cell: alive next if 3, or if 4 and alive now
+        np.bitwise_and(s1, s2, out=s5)
+        np.bitwise_or(s1, s2, out=s1)
+        np.bitwise_and(s5, s4, out=s2)
+        np.bitwise_xor(s5, s2, out=s5)          # count == 3, short of the eights
+        np.bitwise_and(alive, s4, out=s4)
+        np.bitwise_and(s4, s1, out=s2)
+        np.bitwise_xor(s4, s2, out=s4)          # count == 4 and alive, short of the eights
+        np.bitwise_or(s5, s4, out=s5)
+        np.bitwise_and(s5, s3, out=s2)
+        np.bitwise_xor(s5, s2, out=dst)
+        dst[:, -1] &= self._mask
+
+############################################
+#
+#
+#   Biome: Optimized for speed
+#
+#
+############################################
+
+# the game of life
+# https://en.wikipedia.org/wiki/Conway%27s_Game_of_Life
+# a biome governs an indevidual grid
+
+class Engine():
+    """Base class for the stepping engines a biome can be driven by"""
+    def __init__(self, shape: tuple):
+        self.shape = shape
+        self.stats = {}
+
+    def run(self, grid: npt.NDArray[np.int8], generations: int) -> npt.NDArray[np.int8]:
+        """Advance the grid in place by the given number of generations"""
+        raise NotImplementedError
+
+
+class LegacyEngine(Engine):
+    """The original coordinate based update, kept for reference"""
+    def run(self, grid: npt.NDArray[np.int8], generations: int) -> npt.NDArray[np.int8]:
+        for i in range(generations):
+            grid = self._update(grid)
+        return grid
+
+    def _update(self, grid: npt.NDArray[np.int8]) -> npt.NDArray[np.int8]:
+        
+        # get indices of all non-zero elements
+        indices = np.argwhere(grid == 1)
+   
+        # get the surrounding indices
+        surrounding_indices = np.array([[x + i, y + j] 
+                                        for x, y in indices 
+                                        for i in range(-1, 2) 
+                                        for j in range(-1, 2) if not (i == 0 and j == 0) ])
+      
+        # remove the indices that are out of bounds
+        surrounding_indices = surrounding_indices[(surrounding_indices[:, 0] >= 0) 
+                                                & (surrounding_indices[:, 0] < grid.shape[0])
+                                                & (surrounding_indices[:, 1] >= 0) 
+                                                & (surrounding_indices[:, 1] < grid.shape[1])]
+
+        # get the unique surrounding indices
+        each_indices = np.unique(surrounding_indices, axis=0)
+
+        # set the surrounding indices to 1 if they have 3 neighbours
+        grid[indices[:, 0], indices[:, 1]] = [1 if np.sum(np.all(surrounding_indices == i, axis=1)) == 2 else 0
+                                            for i in np.unique(indices, axis=0)]
+        grid[each_indices[:, 0], each_indices[:, 1]] = [grid[i[0], i[1]] if np.sum(np.all(surrounding_indices == i, axis=1)) != 3 else 1 
+                                            for i in each_indices]
+        
+        return grid
+
+
+class VectorizedEngine(Engine):
+    """Whole grid stepping with shifted views over preallocated buffers
+
+    The grid lives in the interior of one of two zero padded buffers, so the
+    border acts as the dead cells beyond the edge of the biome. Neighbour
+    counts are a separable 3x3 box sum (rows, then columns) minus the centre,
+    written into scratch arrays that are allocated once with the engine.
+    """
+    def __init__(self, shape: tuple):
+        super().__init__(shape)
+        h, w = shape
+        self._front = np.zeros((h + 2, w + 2), dtype=np.int8)
+        self._back = np.zeros((h + 2, w + 2), dtype=np.int8)
+        self._rows = np.zeros((h + 2, w), dtype=np.int8)
+        self._counts = np.zeros((h, w), dtype=np.int8)
+        self._born = np.zeros((h, w), dtype=bool)
+        self._survive = np.zeros((h, w), dtype=bool)
+
+    def run(self, grid: npt.NDArray[np.int8], generations: int) -> npt.NDArray[np.int8]:
+        if generations <= 0:
+            return grid
+        self._front[1:-1, 1:-1] = grid
+        for i in range(generations):
+            self.step_padded(self._front, self._back)
+            self._front, self._back = self._back, self._front
+        grid[...] = self._front[1:-1, 1:-1]
+        return grid
+
+    def step_padded(self, src: npt.NDArray[np.int8], dst: npt.NDArray[np.int8]):
+        """Write the next generation of the interior of src into the interior of dst
+
+        Both are padded by one cell on every side; the border of src is read as
+        the neighbours past the edge and the border of dst is left untouched.
+        """
+        rows, counts = self._rows, self._counts
+        born, survive = self._born, self._survive
+        centre = src[1:-1, 1:-1]
+
+        # horizontal 3-sums, then vertical 3-sums of those, minus the cell itself
+        np.add(src[:, :-2], src[:, 1:-1], out=rows)
+        np.add(rows, src[:, 2:], out=rows)
+        np.add(rows[:-2], rows[1:-1], out=counts)
+        np.add(counts, rows[2:], out=counts)
+        np.subtract(counts, centre, out=counts)
+
+        # B3/S23
+        np.equal(counts, 3, out=born)
+        np.equal(counts, 2, out=survive)
+        np.logical_and(survive, centre, out=survive)
+        np.logical_or(born, survive, out=born)
+        np.copyto(dst[1:-1, 1:-1], born, casting='unsafe')
+
+
+class BitPackedEngine(Engine):
+    """Steps the biome on a PackedGrid, unpacking only when the run is done"""
+    def __init__(self, shape: tuple):
+        super().__init__(shape)
+        self.packed = PackedGrid(shape)
+
+    def run(self, grid: npt.NDArray[np.int8], generations: int) -> npt.NDArray[np.int8]:
+        if generations <= 0:
+            return grid
+        self.packed.load(grid)
+        self.packed.step(generations)
+        return self.packed.to_array(out=grid)
+
+
+class TiledEngine(Engine):
+    """Steps only the tiles that changed last generation, and their neighbours
+
+    The grid is split into square tiles with a dirty bitmap over them. A tile
+    whose own cells and neighbouring tiles all held still last generation
+    cannot change, so it sleeps until something next to it moves. Each
+    generation the awake tiles are gathered with a one cell halo, stepped as
+    one batch and scattered back, so the cost follows activity, not area.
+    """
+    def __init__(self, shape: tuple, tile: int = 32):
+        super().__init__(shape)
+        h, w = shape
+        self.tile = tile
+        self.tiles_shape = (-(-h // tile), -(-w // tile))
+        th, tw = self.tiles_shape
+
+        # the grid padded up to whole tiles, plus a dead border one cell wide
+        self._cells = np.zeros((th * tile + 2, tw * tile + 2), dtype=np.int8)
+        s0, s1 = self._cells.strides
+        self._windows = np.lib.stride_tricks.as_strided(
+            self._cells, shape=(th, tw, tile + 2, tile + 2),
+            strides=(s0 * tile, s1 * tile, s0, s1), writeable=False)
+        self._interior = self._cells[1:-1, 1:-1].reshape(th, tile, tw, tile)
+        # which cells of every tile are in the biome, when the last tiles hang past its edge
+        self._inside = None
+        if (th * tile, tw * tile) != (h, w):
+            inside = np.zeros((th * tile, tw * tile), dtype=bool)
+            inside[:h, :w] = True
+            self._inside = inside.reshape(th, tile, tw, tile).transpose(0, 2, 1, 3)
+
+        self.dirty = np.ones(self.tiles_shape, dtype=bool)
+        self._awake = np.zeros((th + 2, tw + 2), dtype=bool)
+        self.stats = {'tiles': th * tw, 'active_tiles': th * tw}
+
+    def run(self, grid: npt.NDArray[np.int8], generations: int) -> npt.NDArray[np.int8]:
+        if generations <= 0:
+            return grid
+        h, w = self.shape
+        th, tw = self.tiles_shape
+        t = self.tile
+
+        # wake any tile the grid was edited in since the last run
+        cells = self._cells[1:h + 1, 1:w + 1]
+        edited = np.zeros((th * t, tw * t), dtype=bool)
+        np.not_equal(cells, grid, out=edited[:h, :w])
+        self.dirty |= edited.reshape(th, t, tw, t).any(axis=(1, 3))
+        cells[...] = grid
+
+        for i in range(generations):
+            self._step()
+        grid[...] = cells
+        return grid
+
+    def _step(self):
+        th, tw = self.tiles_shape
+
+        # a tile is awake if it or any of its neighbours changed last generation
+        awake = self._awake
+        awake[...] = False
+        for i in range(3):
+            for j in range(3):
+                awake[i:i + th, j:j + tw] |= self.dirty
+        ti, tj = np.nonzero(awake[1:-1, 1:-1])
+        self.stats['active_tiles'] = len(ti)
+        if len(ti) == 0:
+            self.dirty[...] = False
+            return
+
+        # gather the awake tiles with their halos and step them as one batch
+        block = self._windows[ti, tj]
+        centre = block[:, 1:-1, 1:-1]
+        rows = block[:, :, :-2] + block[:, :, 1:-1] + block[:, :, 2:]
+        counts = rows[:, :-2] + rows[:, 1:-1] + rows[:, 2:] - centre
+        born = (counts == 3) | ((counts == 2) & (centre == 1))
+        if self._inside is not None:
+            # cells in the padding past the edge of the biome stay dead, and a birth
+            # there is no activity, or the edge tiles would never sleep
+            born &= self._inside[ti, tj]
+
+        self.dirty[...] = False
+        self.dirty[ti, tj] = (born != centre).any(axis=(1, 2))
+        self._interior[ti, :, tj, :] = born
+
+
+class RuleEngine(Engine):
+    """Steps any compiled rule, from a Life-like rulestring to a mix of elements"""
+    def __init__(self, shape: tuple, rule='B3/S23'):
+        super().__init__(shape)
+        self.rule = compile_rule(rule)
+        self._stepper = RuleStepper(self.rule, shape)
+
+    def run(self, grid: npt.NDArray[np.int8], generations: int) -> npt.NDArray[np.int8]:
+        for i in range(generations):
+            self._stepper.step(grid)
+        return grid
+
+
+# engines selectable by name from the biome constructor
+ENGINES = {
+    'legacy': LegacyEngine,
+    'vectorized': VectorizedEngine,
+    'bitpacked': BitPackedEngine,
+    'tiled': TiledEngine,
+    'rule': RuleEngine,
+}
+
+
+class CycleDetector():
+    """Spots a biome that has returned to a recent state
+
+    Every generation is hashed with blake2b, the whole grid and each of its
+    tiles on their own. The last window grid digests are kept in a table, so
+    a repeat at distance P, up to window, is a candidate cycle of period P (a
+    still life has period 1). A digest match is only a candidate: run steps
+    P generations on a copy of the grid and checks the state really comes
+    back before skipping anything. The tile digests of the same window give
+    each tile's own period, so settled regions show up even while others are
+    still moving.
+    """
+    def __init__(self, shape: tuple, window: int = 256, tile: int = 32, seed: int = 0):
+        h, w = shape
+        self.window = window
+        self.tile = tile
+        self.tiles_shape = (-(-h // tile), -(-w // tile))
+        th, tw = self.tiles_shape
+
+        # hashlib loads OpenSSL, which the import time budget leaves out until cycles are watched
+        from hashlib import blake2b
+
+        self._blake2b = blake2b
+        self._salt = seed.to_bytes(16, 'little')
+        self._cells = np.zeros((th * tile, tw * tile), dtype=np.uint8)
+        self._tiles = np.zeros((th, tw, tile, tile), dtype=np.uint8)
+
+        self.reset()
+
+    def reset(self):
+        """Forget every state seen so far"""
+        self.seen = {}
+        self.hashes = deque()
+        self.tile_hashes = deque(maxlen=self.window)
+        self.period = None
+        self.confirmed = False
+        self.last = None
+
+    def hash(self, grid: npt.NDArray[np.int8]) -> tuple:
+        """The digest of the whole grid, and of every tile as a uint64"""
+        h, w = grid.shape
+        th, tw = self.tiles_shape
+        digest = self._blake2b(np.ascontiguousarray(grid).data, salt=self._salt)
+        digest.update(np.array(grid.shape, dtype=np.int64).data)
+
+        self._cells[:h, :w] = grid.view(np.uint8)
+        self._tiles[...] = self._cells.reshape(th, self.tile, tw, self.tile).transpose(0, 2, 1, 3)
+        cells = memoryview(self._tiles).cast('B')
+        size = self.tile * self.tile
+        tiles = b''.join(self._blake2b(cells[i:i + size], digest_size=8, salt=self._salt).digest()
+                         for i in range(0, len(cells), size))
+        return digest.digest(), np.frombuffer(tiles, dtype=np.uint64).reshape(th, tw)
+
+    def observe(self, grid: npt.NDArray[np.int8], generation: int) -> int:
+        """Hash the grid at the given generation, returning the candidate period once there is one"""
+        digest, tiles = self.hash(grid)
+        self.last = digest
+        self.tile_hashes.append(tiles)
+        if digest in self.seen:
+            self.period = generation - self.seen[digest]
+        self.seen[digest] = generation
+        self.hashes.append(digest)
+        if len(self.hashes) > self.window:
+            old = self.hashes.popleft()
+            if self.seen.get(old, generation) <= generation - self.window:
+                del self.seen[old]
+        return self.period
+
+    def matches(self, grid: npt.NDArray[np.int8]) -> bool:
+        """Whether the grid is still the last state observed"""
+        return self.last is not None and self.hash(grid)[0] == self.last
+
+    def tile_periods(self) -> npt.NDArray[np.int32]:
+        """The smallest period of every tile, 0 where a tile has none yet
+
+        Once the grid has a period P, the last P tile hashes are one full
+        cycle and every tile's period is the smallest divisor p of P that
+        maps the cycle onto itself. Before that, a tile has period p when its
+        last p hashes equal the p before them, up to half the window.
+        """
+        history = np.array(self.tile_hashes)
+        periods = np.zeros(self.tiles_shape, dtype=np.int32)
+        if self.period:
+            cycle = history[-self.period:]
+            for p in range(1, self.period + 1):
+                if self.period % p == 0:
+                    repeat = (cycle == np.roll(cycle, -p, axis=0)).all(axis=0)
+                    periods[(periods == 0) & repeat] = p
+            return periods
+        for p in range(1, len(history) // 2 + 1):
+            repeat = (history[-p:] == history[-2 * p:-p]).all(axis=0)
+            periods[(periods == 0) & repeat] = p
+        return periods
+
+
+class ConnwaysGameOfLife():
+    def __init__(self, grid: npt.NDArray[np.int8], engine: str = 'vectorized', **options):
+        """options are passed to the engine, such as tile for 'tiled' or rule for 'rule'"""
+        self.grid = grid
+        self.val_grid = np.zeros(grid.shape, dtype=np.int8)
+        self.engine = ENGINES[engine](grid.shape, **options)
+        self.generation = 0
+        self.recorder = None
+        self.cycles = None
+
+    def __repr__(self):
+        return str(self.grid)
+
+    @property
+    def stats(self) -> dict:
+        """Counters reported by the engine, such as the number of active tiles"""
+        return self.engine.stats
+    
+    def run(self, generations: int):
+        if self.recorder is None and self.cycles is None:
+            self.grid = self.engine.run(self.grid, generations)
+            self.generation += generations
+            return
+
+        cycles = self.cycles
+        if cycles is not None and not cycles.matches(self.grid):
+            # the grid was edited since the last run, so nothing seen before still holds
+            cycles.reset()
+            cycles.observe(self.grid, self.generation)
+
+        end = self.generation + generations
+        while self.generation < end:
+            if (cycles is not None and cycles.period and self.recorder is None
+                    and (cycles.confirmed or self._confirm_period())):
+                # a cycle repeats forever, so whole periods can be skipped
+                self.generation += (end - self.generation) // cycles.period * cycles.period
+                if self.generation == end:
+                    break
+            self.grid = self.engine.run(self.grid, 1)
+            self.generation += 1
+            if self.recorder is not None:
+                self.recorder.record(self.grid)
+            if cycles is not None and not cycles.period:
+                cycles.observe(self.grid, self.generation)
+
+        if cycles is not None and cycles.period:
+            # the table stops at the generation the cycle was found, only the last state moves on
+            cycles.last = cycles.hash(self.grid)[0]
+
+    def _confirm_period(self) -> bool:
+        """Whether the candidate period really brings the grid back, forgetting it if not"""
+        cycles = self.cycles
+        probe = self.engine.run(self.grid.copy(), cycles.period)
+        if np.array_equal(probe, self.grid):
+            cycles.confirmed = True
+            return True
+        # the digests collided without the state repeating
+        cycles.reset()
+        cycles.observe(self.grid, self.generation)
+        return False
+
+    def detect_cycles(self, window: int = 256, tile: int = 32) -> CycleDetector:
+        """Watch for the biome repeating a recent state, and skip whole periods once it does
+
+        While detecting, run steps one generation at a time so every state can
+        be hashed. Once a period is found, the rest of a run is cut down to the
+        generations left over after whole periods, once stepping a copy of the
+        grid through one period has confirmed it. While a recorder is attached
+        every generation is still stepped, so the history stays complete.
+        The detector is returned, and kept as the cycles attribute; its period
+        and tile_periods say what has been found.
+        """
+        self.cycles = CycleDetector(self.grid.shape, window=window, tile=tile)
+        self.cycles.observe(self.grid, self.generation)
+        return self.cycles
+
+    def record(self, recorder):
+        """Record every generation from now on, such as with a history.HistoryWriter
+
+        The current grid is recorded straight away as the first generation.
+        Pass None to stop recording.
+        """
+        self.recorder = recorder
+        if recorder is not None:
+            recorder.record(self.grid)
+        
+    def _update(self, grid: npt.NDArray[np.int8]) -> npt.NDArray[np.int8]:
+        """Advance the given grid by a single generation"""
+        return self.engine.run(grid, 1)
+    
+    def values(self, grid: npt.NDArray[np.int8]) -> npt.NDArray[np.int8]:
+        # get indices of all non-zero elements
+        indices = np.argwhere(grid == 1)
+   
+        # get the surrounding indices
+        surrounding_indices = np.array([[x + i, y + j] 
+                                        for x, y in indices 
+                                        for i in range(-1, 2) 
+                                        for j in range(-1, 2) 
+                                        if not (i == 0 and j == 0) ])
+      
+        # remove the indices that are out of bounds
+        surrounding_indices = surrounding_indices[(surrounding_indices[:, 0] >= 0) 
+                                                & (surrounding_indices[:, 0] < grid.shape[0])
+                                                & (surrounding_indices[:, 1] >= 0) 
+                                                & (surrounding_indices[:, 1] < grid.shape[1])]
+        
+        val_grid = grid.copy()
+
+        for i in np.unique(surrounding_indices, axis=0):
+            val_grid[i[0], i[1]] = np.sum(np.all(surrounding_indices == i, axis=1))
+        
+        return val_grid
+
+
+############################################
+#
+#
+#   BiomeBatch: many small biomes stepped as one array
+#
+#
+############################################
+
+# rooms, dungeons and other small biomes of one size share (block, H, W) arrays,
+# so a generation of hundreds of them is a handful of numpy calls instead of one Python loop each
+
+def life_table(rule) -> npt.NDArray[np.int8]:
+    """The (state, neighbour count) -> next state table of a two state Moore neighbourhood rule"""
+    rule = compile_rule(rule)
+    values, kernel, low, table = rule.layers[0]
+    if rule.states != 2 or len(rule.layers) != 1 or low != 0 or table.shape != (2, 9):
+        raise ValueError(f'{rule} is not a two state rule over the Moore neighbourhood')
+    return table
+
+
+class BiomeBatch():
+    """Steps many biomes of the same shape in one vectorized call
+
+    Biomes live in blocks of block_size slots, each block one padded
+    (block_size, H + 2, W + 2) array. Adding a biome fills a free slot, or
+    allocates a new block once every slot is taken, and removing one frees
+    its slot, so the biomes already in the batch are never copied. Every
+    slot has its own rule table and pause flag; paused and empty slots keep
+    their cells.
+    """
+    def __init__(self, shape: tuple, block_size: int = 64):
+        self.shape = tuple(shape)
+        self.block_size = block_size
+        self._blocks = []
+        self._free = []
+        self.generation = 0
+
+    def __len__(self):
+        return sum(int(block['used'].sum()) for block in self._blocks)
+
+    def __iter__(self):
+        """The id of every biome in the batch"""
+        for b, block in enumerate(self._blocks):
+            for i in np.flatnonzero(block['used']):
+                yield b * self.block_size + int(i)
+
+    def _new_block(self):
+        h, w = self.shape
+        n = self.block_size
+        self._blocks.append({
+            'cells': np.zeros((n, h + 2, w + 2), dtype=np.int8),
+            'tables': np.zeros((n, 18), dtype=np.int8),
+            'used': np.zeros(n, dtype=bool),
+            'paused': np.zeros(n, dtype=bool),
+            'base': (np.arange(n, dtype=np.intp) * 18).reshape(n, 1, 1),
+            'rows': np.zeros((n, h + 2, w), dtype=np.int8),
+            'counts': np.zeros((n, h, w), dtype=np.int8),
+            'index': np.zeros((n, h, w), dtype=np.intp),
+            'next': np.zeros((n, h, w), dtype=np.int8),
+        })
+        first = (len(self._blocks) - 1) * n
+        self._free.extend(range(first + n - 1, first - 1, -1))
+
+    def _slot(self, biome: int) -> tuple:
+        block, i = divmod(biome, self.block_size)
+        if block >= len(self._blocks) or not self._blocks[block]['used'][i]:
+            raise KeyError(f'no biome {biome} in the batch')
+        return self._blocks[block], i
+
+    def add(self, grid: npt.NDArray[np.int8], rule='B3/S23', paused: bool = False) -> int:
+        """Copy a grid into the batch, returning the id of its biome"""
+        if tuple(grid.shape) != self.shape:
+            raise ValueError(f'a batch of {self.shape} biomes cannot take a {grid.shape} grid')
+        table = life_table(rule)
+        if not self._free:
+            self._new_block()
+        biome = self._free.pop()
+        block, i = divmod(biome, self.block_size)
+        block = self._blocks[block]
+        block['cells'][i, 1:-1, 1:-1] = grid
+        block['tables'][i] = table.ravel()
+        block['used'][i] = True
+        block['paused'][i] = paused
+        return biome
+
+    def remove(self, biome: int):
+        """Take a biome out of the batch, freeing its slot for the next one added"""
+        block, i = self._slot(biome)
+        block['cells'][i] = 0
+        block['used'][i] = False
+        block['paused'][i] = False
+        self._free.append(biome)
+
+    def grid(self, biome: int) -> npt.NDArray[np.int8]:
+        """A view of a biome's cells, which stays current as the batch runs"""
+        block, i = self._slot(biome)
+        return block['cells'][i, 1:-1, 1:-1]
+
+    def pause(self, biome: int, paused: bool = True):
+        block, i = self._slot(biome)
+        block['paused'][i] = paused
+
+    def set_rule(self, biome: int, rule):
+        block, i = self._slot(biome)
+        block['tables'][i] = life_table(rule).ravel()
+
+    def run(self, generations: int):
+        """Advance every running biome by the given number of generations"""
+        for i in range(generations):
+            for block in self._blocks:
+                self._step(block)
+        self.generation += generations
+
+    def _step(self, block: dict):
+        running = block['used'] & ~block['paused']
+        if not running.any():
+            return
+        cells, rows, counts = block['cells'], block['rows'], block['counts']
+        index, nxt = block['index'], block['next']
+        centre = cells[:, 1:-1, 1:-1]
+
+        # neighbour counts of every biome in the block at once
+        np.add(cells[:, :, :-2], cells[:, :, 1:-1], out=rows)
+        np.add(rows, cells[:, :, 2:], out=rows)
+        np.add(rows[:, :-2], rows[:, 1:-1], out=counts)
+        np.add(counts, rows[:, 2:], out=counts)
+        np.subtract(counts, centre, out=counts)
+
+        # each biome looks its cells up in its own rule table
+        np.multiply(centre, 9, out=index)
+        np.add(index, counts, out=index)
+        np.add(index, block['base'], out=index)
+        np.take(block['tables'], index, out=nxt)
+        np.copyto(centre, nxt, where=running[:, None, None])
+
+
+############################################
+#
+#
+#   DisplayWidget: A class for displaying the game of life in a window
+#
+#
+############################################
+
+class DisplayWidget():
+    """Run the game of life in a window
+
+    pyglet is only imported when a widget is made, so the simulation can be
+    imported and run without a display.
+    """
+    def __init__(self, grid: npt.NDArray[np.int8], scale: int = 6, interval: float = 0.1):
+        from .render import GridRenderer
+        from .gameloop import FixedTimestep
+        import pyglet
+
+        self.grid = grid
+        self.biome = ConnwaysGameOfLife(grid)
+        self.window = pyglet.window.Window(grid.shape[1] * scale, grid.shape[0] * scale, caption='Alchemy')
+        self.renderer = GridRenderer(grid.shape, scale=scale)
+        self.loop = FixedTimestep(rate=1 / interval)
+        self.loop.add(self.biome)
+        self.window.push_handlers(on_draw=self.on_draw)
+
+    def on_draw(self):
+        # the latest completed generation, however many ticks ran since the last frame
+        self.grid = self.biome.grid
+        self.renderer.update(self.grid)
+        self.window.clear()
+        self.renderer.draw()
+    
+    def run(self):
+        import pyglet
+
+        self.loop.start()
+        pyglet.app.run()
+
+
+
+if __name__ == '__main__':
+    seed = np.random.randint(0, 2, (10, 10), dtype=np.int8)
+    grid = np.zeros((100, 100), dtype=np.int8)
+    grid[50:60, 50:60] = seed
+
+    game = DisplayWidget(grid)
+    game.run()
\ No newline at end of file
@@ -0,0 +1,260 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+
+import numpy as np
+import numpy.typing as npt
+
+# Assets
+
+# Every image under the asset directories is packed into one texture atlas,
+# so sprites and tiles share a single texture and a batch draws them in one call.
+#
+# Packing runs on a background thread, started before the window opens:
+#   1. every file is hashed; the hashes together key the cache
+#   2. on a cache hit the packed atlas (atlas.npy) and its manifest (atlas.json) are read back
+#   3. on a miss every image is decoded, packed onto shelves and both are written to the cache
+# so later launches read one array instead of decoding every image.
+# Only the texture upload needs the GL context, and happens on the main thread in atlas().
+#
+# Images are named by their path under the asset directory, without the extension:
+#   assets/player_sprites/walk/1.png  ->  'player_sprites/walk/1'
+
+EXTENSIONS = ('.png', '.bmp', '.jpg', '.jpeg', '.gif')
+CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'alchemist', 'atlas')
+
+
+def _files(root: str, directories: list) -> list:
+    """Every image under the directories, as sorted paths relative to root"""
+    found = []
+    for directory in directories:
+        for path, _, names in os.walk(os.path.join(root, directory)):
+            for name in names:
+                if name.lower().endswith(EXTENSIONS):
+                    found.append(os.path.relpath(os.path.join(path, name), root).replace(os.sep, '/'))
+    return sorted(found)
+
+
+def _decode(path: str) -> npt.NDArray[np.uint8]:
+    """An image file as an (h, w, 4) RGBA array, top row first"""
+    import pyglet
+
+    image = pyglet.image.load(path).get_image_data()
+    data = image.get_data('RGBA', -image.width * 4)
+    return np.frombuffer(data, dtype=np.uint8).reshape(image.height, image.width, 4)
+
+
+def pack(sizes: list, width: int = 1024, padding: int = 1) -> tuple:
+    """Place rectangles of the given (w, h) on shelves, tallest first
+
+    Returns the (x, y) of each rectangle, from the top left, and the
+    atlas (width, height). The width is the given one, widened to fit the
+    widest rectangle; the height is rounded up to a power of two.
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    width = max([width] + [w + 2 * padding for w, _ in sizes])
+    places = [None] * len(sizes)
+    x = y = shelf = 0
+    for i in order:
+        w, h = sizes[i]
+        if x + w + 2 * padding > width:
+            x, y, shelf = 0, y + shelf, 0
+        places[i] = (x + padding, y + padding)
+        x += w + 2 * padding
+        shelf = max(shelf, h + 2 * padding)
+    height = 1 << max(y + shelf - 1, 0).bit_length()
+    return places, (width, height)
+
+
+############################################
+#
+#
+#   Atlas: one texture, many named regions
+#
+#
+############################################
+
+class Atlas():
+    """A packed atlas texture and a region of it for every image
+
+    atlas['player_sprites/LIL_DUDE'] is the image as a pyglet TextureRegion,
+    to use anywhere an image is. uvs holds the texture coordinates of every
+    region as (u0, v0, u1, v1), for drawing with your own vertex lists.
+    """
+    def __init__(self, pixels: npt.NDArray[np.uint8], manifest: dict):
+        import pyglet
+        from pyglet.gl import GL_NEAREST
+
+        h, w, _ = pixels.shape
+        image = pyglet.image.ImageData(w, h, 'RGBA', pixels.tobytes(), pitch=-w * 4)
+        # pyglet 2 sets a texture's filters when it is created, not afterwards
+        self.texture = pyglet.image.Texture.create(w, h, min_filter=GL_NEAREST, mag_filter=GL_NEAREST)
+        self.texture.blit_into(image, 0, 0, 0)
+        self.manifest = manifest
+        self.uvs = {}
+        self.regions = {}
+        for name, (x, y, rw, rh) in manifest['regions'].items():
+            # manifest rows count from the top, texture rows from the bottom
+            bottom = h - y - rh
+            self.regions[name] = self.texture.get_region(x, bottom, rw, rh)
+            self.uvs[name] = (x / w, bottom / h, (x + rw) / w, (bottom + rh) / h)
+
+    def __getitem__(self, name: str):
+        return self.regions[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.regions
+
+    def sequence(self, prefix: str) -> list:
+        """The regions under a directory, in natural order, e.g. the frames of an animation"""
+        prefix = prefix.rstrip('/') + '/'
+        names = [name for name in self.regions if name.startswith(prefix) and '/' not in name[len(prefix):]]
+        names.sort(key=lambda name: [int(part) if part.isdigit() else part
+                                     for part in _split_digits(name[len(prefix):])])
+        return [self.regions[name] for name in names]
+
+
+def _split_digits(text: str) -> list:
+    parts = ['']
+    for char in text:
+        if parts[-1] and parts[-1][-1].isdigit() != char.isdigit():
+            parts.append('')
+        parts[-1] += char
+    return parts
+
+
+############################################
+#
+#
+#   AtlasLoader: packs or reloads in the background
+#
+#
+############################################
+
+class AtlasLoader(threading.Thread):
+    """Pack the images under directories of root on a worker thread
+
+    Start it, open the window, then call atlas(), which waits for the
+    pixels and uploads them. The packed pixels and manifest are cached in
+    cache, under a key made from the hash of every source file.
+    """
+    def __init__(self, directories, root: str = 'assets', cache: str = CACHE, width: int = 1024):
+        super().__init__(daemon=True)
+        self.directories = [directories] if isinstance(directories, str) else list(directories)
+        self.root = root
+        self.cache = cache
+        self.width = width
+        self.stats = {'images': 0, 'cached': False, 'seconds': 0.0}
+        self._pixels = None
+        self._manifest = None
+        self._error = None
+
+    def key(self, files: list) -> str:
+        digest = hashlib.sha1(f'{self.width}'.encode())
+        for name in files:
+            digest.update(name.encode())
+            with open(os.path.join(self.root, name), 'rb') as f:
+                digest.update(hashlib.sha1(f.read()).digest())
+        return digest.hexdigest()
+
+    def run(self):
+        import time
+
+        start = time.perf_counter()
+        try:
+            self._pixels, self._manifest = self._load()
+        except Exception as error:  # handed to the main thread by atlas()
+            self._error = error
+        self.stats['seconds'] = time.perf_counter() - start
+
+    def _load(self) -> tuple:
+        files = _files(self.root, self.directories)
+        key = self.key(files)
+        folder = os.path.join(self.cache, key)
+        self.stats['images'] = len(files)
+
+        if os.path.exists(os.path.join(folder, 'atlas.json')):
+            with open(os.path.join(folder, 'atlas.json')) as f:
+                manifest = json.load(f)
+            self.stats['cached'] = True
+            return np.load(os.path.join(folder, 'atlas.npy')), manifest
+
+        images = [_decode(os.path.join(self.root, name)) for name in files]
+        places, (w, h) = pack([(image.shape[1], image.shape[0]) for image in images], self.width)
+        pixels = np.zeros((h, w, 4), dtype=np.uint8)
+        regions = {}
+        for name, image, (x, y) in zip(files, images, places):
+            ih, iw, _ = image.shape
+            pixels[y:y + ih, x:x + iw] = image
+            regions[os.path.splitext(name)[0]] = (x, y, iw, ih)
+        manifest = {'key': key, 'size': (w, h), 'regions': regions}
+
+        # write to a temporary folder and rename, so a half written cache is never read
+        os.makedirs(self.cache, exist_ok=True)
+        partial = f'{folder}.{os.getpid()}.tmp'
+        os.makedirs(partial, exist_ok=True)
+        np.save(os.path.join(partial, 'atlas.npy'), pixels)
+        with open(os.path.join(partial, 'atlas.json'), 'w') as f:
+            json.dump(manifest, f)
+        try:
+            os.replace(partial, folder)
+        except OSError:  # another process cached the same key first
+            shutil.rmtree(partial, ignore_errors=True)
+        return pixels, manifest
+
+    def atlas(self) -> Atlas:
+        """Wait for the packing to finish and upload the atlas (on the thread with the GL context)"""
+        if not self.is_alive() and self._pixels is None and self._error is None:
+            self.start()
+        self.join()
+        if self._error is not None:
+            raise self._error
+        return Atlas(self._pixels, self._manifest)
+
+
+############################################
+#
+#
+#   TileMap: a grid of tiles in one batch
+#
+#
+############################################
+
+class TileMap():
+    """Draw a 2D array of tile names (or indices into names) from an atlas as one batch
+
+    Every tile is a sprite over the same atlas texture in the same batch
+    and group, so pyglet draws the whole map with one texture bind and one
+    draw call. Row 0 of tiles is drawn at the top.
+    """
+    def __init__(self, atlas: Atlas, tiles, names: list = None, x: float = 0, y: float = 0,
+                 size: int = None, batch=None, group=None):
+        import pyglet
+
+        self.batch = batch if batch is not None else pyglet.graphics.Batch()
+        tiles = np.asarray(tiles)
+        rows, cols = tiles.shape
+        self.sprites = []
+        for r in range(rows):
+            for c in range(cols):
+                tile = tiles[r, c]
+                name = names[tile] if names is not None else str(tile)
+                if name is None or name == '':
+                    continue
+                region = atlas[name]
+                step = size or region.width
+                sprite = pyglet.sprite.Sprite(region, x=x + c * step, y=y + (rows - 1 - r) * step,
+                                              batch=self.batch, group=group)
+                if size:
+                    sprite.scale = size / region.width
+                self.sprites.append(sprite)
+
+    def draw(self):
+        self.batch.draw()
+
+    def delete(self):
+        for sprite in self.sprites:
+            sprite.delete()
+        self.sprites.clear()
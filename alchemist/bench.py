@@ -0,0 +1,287 @@
+import sys
+import json
+import time
+import platform
+import argparse
+
+import numpy as np
+
+from .alchemy import ENGINES, Cell, ConnwaysGameOfLife, stamp
+from . import esper
+
+# Benchmarks
+#
+#   python -m alchemist.bench [--quick] [--out results.json] [--baseline baseline.json]
+#
+# runs every benchmark below and prints one line per result:
+#   engine/<engine>/<seed>/<size>     generations per second (and cells per second) for each
+#                                     engine, grid size and seed: random soups of a few densities,
+#                                     the Gosper glider gun and the R-pentomino
+#   hashlife/<seed>/<generations>     HashLife jumping far ahead from the pattern seeds
+#   stamp/apply, stamp/batched        glider stamps per second, one Cell.apply at a time and batched
+#   esper/...                         create_entity, get_components and process under entity churn
+#
+# Every benchmark is seeded, warmed up once and timed over a few repeats, keeping the best,
+# which is the least disturbed by whatever else the machine is doing.
+# --out writes the results as JSON. --baseline compares against such a file, and the run
+# fails (exit status 1) if any benchmark got slower than the tolerance allows.
+
+SIZES = (128, 512, 2048)
+DENSITIES = (0.1, 0.3, 0.5)
+
+# engines too slow to time on the big grids, and the largest size they are timed at
+MAX_SIZE = {'rule': 512}
+# the legacy engine takes seconds a generation, so it is timed on one small soup only
+LEGACY = ('soup-0.3', 64, 1)
+
+GLIDER_GUN = ('x = 36, y = 9\n'
+              '24bo$22bobo$12b2o6b2o12b2o$11bo3bo4b2o12b2o$2o8bo5bo3b2o$2o8bo3bob2o4b'
+              'obo$10bo5bo7bo$11bo3bo$12b2o!')
+R_PENTOMINO = np.array([[0, 1, 1],
+                        [1, 1, 0],
+                        [0, 1, 0]], dtype=np.int8)
+GLIDER = np.array([[0, 1, 0],
+                   [0, 0, 1],
+                   [1, 1, 1]], dtype=np.int8)
+
+
+def seeds(size: int, rng: np.random.Generator) -> dict:
+    """The seed grids of one size, by name"""
+    from .patterns import loads
+
+    grids = {}
+    for density in DENSITIES:
+        grids[f'soup-{density}'] = (rng.random((size, size)) < density).astype(np.int8)
+    for name, pattern in (('gun', loads(GLIDER_GUN).grid), ('r-pentomino', R_PENTOMINO)):
+        grid = np.zeros((size, size), dtype=np.int8)
+        h, w = pattern.shape
+        top, left = (size - h) // 2, (size - w) // 2
+        grid[top:top + h, left:left + w] = pattern
+        grids[name] = grid
+    return grids
+
+
+def best(run, repeats: int) -> float:
+    """The fastest of repeats calls of run, after one untimed call"""
+    run()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+############################################
+#
+#
+#   Benchmarks
+#
+#
+############################################
+
+def bench_engines(sizes, repeats: int, seed: int) -> dict:
+    results = {}
+    for size in sizes:
+        for name, grid in seeds(size, np.random.default_rng(seed)).items():
+            # enough generations to take a measurable time on the smallest grids
+            generations = max(1, 4096 * 128 // size // 16)
+            for engine in ENGINES:
+                if engine == 'legacy' or size > MAX_SIZE.get(engine, size):
+                    continue
+                steps = max(1, generations // 16) if engine in MAX_SIZE else generations
+
+                def run():
+                    ConnwaysGameOfLife(grid.copy(), engine=engine).run(steps)
+
+                seconds = best(run, repeats)
+                results[f'engine/{engine}/{name}/{size}'] = {
+                    'generations_per_s': steps / seconds,
+                    'cells_per_s': steps * size * size / seconds,
+                }
+
+    name, size, steps = LEGACY
+    grid = seeds(size, np.random.default_rng(seed))[name]
+    seconds = best(lambda: ConnwaysGameOfLife(grid.copy(), engine='legacy').run(steps), 1)
+    results[f'engine/legacy/{name}/{size}'] = {
+        'generations_per_s': steps / seconds,
+        'cells_per_s': steps * size * size / seconds,
+    }
+    return results
+
+
+def bench_hashlife(repeats: int, seed: int) -> dict:
+    from .hashlife import HashLife
+
+    results = {}
+    grids = seeds(128, np.random.default_rng(seed))
+    # soups are left out: their chaos defeats the memo, and HashLife is no faster than the engines on them
+    for name, generations in (('gun', 1 << 20), ('gun', 1 << 40), ('r-pentomino', 1 << 20)):
+        seconds = best(lambda: HashLife.from_array(grids[name]).run(generations), repeats)
+        results[f'hashlife/{name}/{generations}'] = {'generations_per_s': generations / seconds}
+    return results
+
+
+def bench_stamping(repeats: int, seed: int, count: int = 10000, size: int = 1024) -> dict:
+    rng = np.random.default_rng(seed)
+    glider = Cell(GLIDER)
+    xs = rng.integers(-2, size, count).tolist()
+    ys = rng.integers(-2, size, count).tolist()
+    grid = np.zeros((size, size), dtype=np.int8)
+
+    def apply():
+        for x, y in zip(xs, ys):
+            glider.apply(grid, x, y)
+
+    def batched():
+        stamp(grid, [(glider, x, y) for x, y in zip(xs, ys)])
+
+    return {
+        'stamp/apply': {'stamps_per_s': count / best(apply, repeats)},
+        'stamp/batched': {'stamps_per_s': count / best(batched, repeats)},
+        'stamp/batched-or': {'stamps_per_s': count / best(
+            lambda: stamp(grid, [(glider, x, y) for x, y in zip(xs, ys)], blend='or'), repeats)},
+    }
+
+
+class _Position:
+    def __init__(self, x=0.0, y=0.0):
+        self.x = x
+        self.y = y
+
+
+class _Velocity:
+    def __init__(self, x=0.0, y=0.0):
+        self.x = x
+        self.y = y
+
+
+class _Particle:
+    pass
+
+
+class _Movement(esper.Processor):
+    reads = (_Velocity,)
+    writes = (_Position,)
+
+    def process(self):
+        for _, (position, velocity) in self.world.get_components(_Position, _Velocity):
+            position.x += velocity.x
+            position.y += velocity.y
+
+
+def bench_esper(repeats: int, seed: int, entities: int = 10000, frames: int = 50, churn: int = 100) -> dict:
+    rng = np.random.default_rng(seed)
+    velocities = rng.random((entities, 2)).tolist()
+
+    def create():
+        world = esper.World()
+        for vx, vy in velocities:
+            world.create_entity(_Position(), _Velocity(vx, vy))
+
+    world = esper.World()
+    world.add_processor(_Movement())
+    for vx, vy in velocities:
+        world.create_entity(_Position(), _Velocity(vx, vy))
+    particles = []
+
+    def frame():
+        # particles come and go every frame, which must not cost the movement query its cache
+        for _ in range(frames):
+            particles.extend(world.create_entity(_Particle()) for _ in range(churn))
+            for entity in particles[:churn]:
+                world.delete_entity(entity)
+            del particles[:churn]
+            world.process()
+
+    def query():
+        for _ in range(frames):
+            for _ in world.get_components(_Position, _Velocity):
+                pass
+
+    return {
+        'esper/create_entity': {'entities_per_s': entities / best(create, repeats)},
+        'esper/get_components': {'entities_per_s': frames * entities / best(query, repeats)},
+        'esper/process-churn': {'frames_per_s': frames / best(frame, repeats)},
+    }
+
+
+def run_all(quick: bool = False, repeats: int = 3, seed: int = 0) -> dict:
+    sizes = SIZES[:2] if quick else SIZES
+    results = {}
+    results.update(bench_engines(sizes, repeats, seed))
+    results.update(bench_hashlife(repeats, seed))
+    results.update(bench_stamping(repeats, seed))
+    results.update(bench_esper(repeats, seed))
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'seed': seed,
+            'quick': quick,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+############################################
+#
+#
+#   Comparing with a baseline
+#
+#
+############################################
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.1) -> list:
+    """Every metric of every benchmark in both runs, as (name, metric, ratio, regressed)
+
+    The ratio is current / baseline, so below 1 is slower. A benchmark
+    regressed if it fell more than tolerance below the baseline.
+    """
+    rows = []
+    for name, metrics in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        for metric, value in metrics.items():
+            if before.get(metric):
+                ratio = value / before[metric]
+                rows.append((name, metric, ratio, ratio < 1 - tolerance))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m alchemist.bench', description='Benchmark the engines and the ECS')
+    parser.add_argument('--quick', action='store_true', help='skip the largest grids')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare with the results in this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='slowdown allowed before failing (0.1 = 10%%)')
+    args = parser.parse_args(argv)
+
+    report = run_all(args.quick, args.repeats, args.seed)
+    for name, metrics in report['results'].items():
+        print(f'{name:44}' + '  '.join(f'{value:14,.0f} {metric}' for metric, value in metrics.items()))
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.tolerance)
+        regressions = [row for row in rows if row[3]]
+        print(f'\ncompared {len(rows)} metrics with {args.baseline}: {len(regressions)} regressed')
+        for name, metric, ratio, _ in regressions:
+            print(f'  {name} {metric}: {ratio:.2f}x')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
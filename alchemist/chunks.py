@@ -0,0 +1,310 @@
+import os
+import zlib
+import shutil
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+import numpy.typing as npt
+
+from .alchemy import life_table
+
+# Unbounded worlds
+
+# A ChunkedWorld has no edge. Its cells live in square chunks of chunk x chunk cells,
+# kept in a dict by (chunk row, chunk column), and only chunks holding something exist:
+#   a chunk is allocated when a live cell on the border of a neighbour could give birth in it
+#   a chunk is freed as soon as a generation leaves it empty
+# so memory follows what is alive, not how far it has spread.
+#
+# Every generation the chunks that changed, and their neighbours, are stepped as one batch:
+# each is gathered with a one cell halo copied from the edges of the chunks around it, so
+# patterns cross chunk borders exactly as they would on one big grid. Chunks that held still,
+# with neighbours that held still, cannot change and are skipped.
+#
+# Resident chunks are kept in least recently changed order. When they take more than the memory
+# budget, the ones longest unchanged and further than keep chunks from the focus (the player)
+# are compressed to files in the spill directory. A spilled chunk is asleep: it keeps its
+# cells but does not step, and its neighbours see its edges, which stay in memory, as they were
+# when it was spilled. It wakes, and is read back, when the focus comes within keep chunks
+# of it or its cells are read or written.
+
+ORDINALS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+class ChunkedWorld():
+    """A two state Moore neighbourhood automaton on an unbounded grid of chunks
+
+    Cells are addressed by (row, col), any integers. budget is the memory
+    resident chunks may take, in bytes, and spill the directory they are
+    spilled to (a temporary one, removed by close, if not given).
+    """
+    def __init__(self, chunk: int = 64, rule='B3/S23', budget: int = 64 << 20, keep: int = 2,
+                 spill: str = None):
+        self.chunk = chunk
+        self.table = life_table(rule).astype(np.int8)
+        if self.table[0, 0]:
+            raise ValueError(f'{rule} gives birth on empty cells, which an unbounded world cannot hold')
+        self.budget = budget
+        self.keep = keep
+        self.focus = (0, 0)
+        self.generation = 0
+
+        self.chunks = OrderedDict()
+        # key -> the (top, bottom, left, right) edges of a chunk on disk
+        self.spilled = {}
+        self._spill = spill
+        self._own_spill = spill is None
+        # chunks that changed since they were last stepped
+        self.active = set()
+        self.stats = {'resident': 0, 'spilled': 0, 'stepped': 0, 'allocated': 0, 'freed': 0,
+                      'spills': 0, 'loads': 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Drop the spilled chunks and, if the world made it, the spill directory"""
+        for key in list(self.spilled):
+            os.remove(self._path(key))
+        self.spilled.clear()
+        if self._own_spill and self._spill is not None:
+            shutil.rmtree(self._spill, ignore_errors=True)
+            self._spill = None
+
+    def __repr__(self):
+        return (f'ChunkedWorld(chunk={self.chunk}, resident={len(self.chunks)}, spilled={len(self.spilled)}, '
+                f'generation={self.generation})')
+
+    ########################################
+    #   Cells
+    ########################################
+
+    def _locate(self, row: int, col: int) -> tuple:
+        c = self.chunk
+        return (row // c, col // c), (row % c, col % c)
+
+    def _resident(self, key: tuple, create: bool = False) -> npt.NDArray[np.int8]:
+        """The cells of a chunk, read back from disk if spilled and made if create"""
+        cells = self.chunks.get(key)
+        if cells is None:
+            if key in self.spilled:
+                cells = self._load(key)
+            elif create:
+                cells = self.chunks[key] = np.zeros((self.chunk, self.chunk), dtype=np.int8)
+                self.stats['allocated'] += 1
+        return cells
+
+    def __getitem__(self, position: tuple) -> int:
+        key, (r, c) = self._locate(*position)
+        cells = self._resident(key)
+        return 0 if cells is None else int(cells[r, c])
+
+    def __setitem__(self, position: tuple, state: int):
+        key, (r, c) = self._locate(*position)
+        cells = self._resident(key, create=bool(state))
+        if cells is not None:
+            cells[r, c] = state
+            self._touch(key)
+
+    def _touch(self, key: tuple):
+        self.chunks.move_to_end(key)
+        self.active.add(key)
+
+    def paste(self, grid: npt.NDArray[np.int8], row: int, col: int):
+        """Copy a grid into the world with its top left cell at (row, col)"""
+        h, w = grid.shape
+        c = self.chunk
+        for ky in range(row // c, (row + h - 1) // c + 1):
+            for kx in range(col // c, (col + w - 1) // c + 1):
+                r0, r1 = max(row, ky * c), min(row + h, (ky + 1) * c)
+                c0, c1 = max(col, kx * c), min(col + w, (kx + 1) * c)
+                part = grid[r0 - row:r1 - row, c0 - col:c1 - col]
+                cells = self._resident((ky, kx), create=bool(part.any()))
+                if cells is not None:
+                    cells[r0 - ky * c:r1 - ky * c, c0 - kx * c:c1 - kx * c] = part
+                    self._touch((ky, kx))
+
+    def cut(self, row: int, col: int, height: int, width: int) -> npt.NDArray[np.int8]:
+        """A copy of the cells in a window of the world, such as the part on screen
+
+        Spilled chunks are read without waking them.
+        """
+        out = np.zeros((height, width), dtype=np.int8)
+        c = self.chunk
+        for ky in range(row // c, (row + height - 1) // c + 1):
+            for kx in range(col // c, (col + width - 1) // c + 1):
+                cells = self.chunks.get((ky, kx))
+                if cells is None and (ky, kx) in self.spilled:
+                    cells = self._read((ky, kx))
+                if cells is None:
+                    continue
+                r0, r1 = max(row, ky * c), min(row + height, (ky + 1) * c)
+                c0, c1 = max(col, kx * c), min(col + width, (kx + 1) * c)
+                out[r0 - row:r1 - row, c0 - col:c1 - col] = cells[r0 - ky * c:r1 - ky * c, c0 - kx * c:c1 - kx * c]
+        return out
+
+    @property
+    def population(self) -> int:
+        resident = sum(int(np.count_nonzero(cells)) for cells in self.chunks.values())
+        return resident + sum(int(np.count_nonzero(self._read(key))) for key in self.spilled)
+
+    def bounds(self) -> tuple:
+        """(row0, col0, row1, col1) around every chunk, or None if the world is empty"""
+        keys = list(self.chunks) + list(self.spilled)
+        if not keys:
+            return None
+        ys, xs = zip(*keys)
+        c = self.chunk
+        return min(ys) * c, min(xs) * c, (max(ys) + 1) * c, (max(xs) + 1) * c
+
+    ########################################
+    #   Stepping
+    ########################################
+
+    def run(self, generations: int):
+        for _ in range(generations):
+            self._step()
+            self.generation += 1
+        self._evict()
+
+    def _border(self, cells: npt.NDArray[np.int8], dy: int, dx: int) -> bool:
+        """Whether a chunk has live cells on its border towards (dy, dx)"""
+        rows = slice(None) if dy == 0 else (0 if dy < 0 else -1)
+        cols = slice(None) if dx == 0 else (0 if dx < 0 else -1)
+        return bool(cells[rows, cols].any())
+
+    def _step(self):
+        c = self.chunk
+
+        # the chunks that changed (freed ones included) and their resident neighbours,
+        # then any missing chunk a border cell of those could give birth in
+        stepping = {}
+        for key in self.active:
+            if key in self.chunks:
+                stepping[key] = None
+            for dy, dx in ORDINALS:
+                near = (key[0] + dy, key[1] + dx)
+                if near in self.chunks:
+                    stepping[near] = None
+        for key in list(stepping):
+            cells = self.chunks[key]
+            for dy, dx in ORDINALS:
+                near = (key[0] + dy, key[1] + dx)
+                if near not in stepping and near not in self.spilled and self._border(cells, dy, dx):
+                    self._resident(near, create=True)
+                    stepping[near] = None
+        self.active = set()
+        if not stepping:
+            return
+        keys = list(stepping)
+        n = len(keys)
+        self.stats['stepped'] = n
+
+        # every chunk a halo is read from, stepped or not, with the empty chunk last
+        sources = {key: i for i, key in enumerate(keys)}
+        stack = [self.chunks[key] for key in keys]
+        for key in keys:
+            for dy, dx in ORDINALS:
+                near = (key[0] + dy, key[1] + dx)
+                if near not in sources and (near in self.chunks or near in self.spilled):
+                    sources[near] = len(stack)
+                    stack.append(self.chunks[near] if near in self.chunks else self._edges(near))
+        stack.append(np.zeros((c, c), dtype=np.int8))
+        stack = np.stack(stack)
+        empty = len(stack) - 1
+
+        padded = np.zeros((n, c + 2, c + 2), dtype=np.int8)
+        padded[:, 1:-1, 1:-1] = stack[:n]
+        for dy, dx in ORDINALS:
+            near = np.array([sources.get((key[0] + dy, key[1] + dx), empty) for key in keys])
+            rows_to = slice(1, -1) if dy == 0 else (0 if dy < 0 else -1)
+            cols_to = slice(1, -1) if dx == 0 else (0 if dx < 0 else -1)
+            rows_from = slice(None) if dy == 0 else (-1 if dy < 0 else 0)
+            cols_from = slice(None) if dx == 0 else (-1 if dx < 0 else 0)
+            padded[:, rows_to, cols_to] = stack[near][:, rows_from, cols_from]
+
+        # neighbour counts of every chunk at once, then the rule table
+        rows = padded[:, :, :-2] + padded[:, :, 1:-1] + padded[:, :, 2:]
+        counts = rows[:, :-2] + rows[:, 1:-1] + rows[:, 2:]
+        centre = padded[:, 1:-1, 1:-1]
+        counts -= centre
+        nxt = self.table[centre, counts]
+
+        changed = (nxt != centre).any(axis=(1, 2))
+        alive = nxt.any(axis=(1, 2))
+        for i, key in enumerate(keys):
+            if not alive[i]:
+                del self.chunks[key]
+                self.stats['freed'] += 1
+                if changed[i]:
+                    self.active.add(key)
+            elif changed[i]:
+                self.chunks[key][...] = nxt[i]
+                self._touch(key)
+        self.stats['resident'] = len(self.chunks)
+
+    ########################################
+    #   Spilling
+    ########################################
+
+    def move_focus(self, row: int, col: int):
+        """Move the focus (the player) to a cell, waking the spilled chunks now within keep"""
+        self.focus = (row, col)
+        (fy, fx), _ = self._locate(row, col)
+        for key in [key for key in self.spilled if max(abs(key[0] - fy), abs(key[1] - fx)) <= self.keep]:
+            self._load(key)
+
+    def _path(self, key: tuple) -> str:
+        if self._spill is None:
+            self._spill = tempfile.mkdtemp(prefix='alchemist-chunks-')
+        os.makedirs(self._spill, exist_ok=True)
+        return os.path.join(self._spill, f'{key[0]}_{key[1]}.chunk')
+
+    def _evict(self):
+        """Spill the longest unchanged chunks away from the focus until within budget"""
+        limit = self.budget // (self.chunk * self.chunk)
+        if len(self.chunks) <= limit:
+            return
+        (fy, fx), _ = self._locate(*self.focus)
+        victims = []
+        for key in self.chunks:
+            if len(self.chunks) - len(victims) <= limit:
+                break
+            if max(abs(key[0] - fy), abs(key[1] - fx)) > self.keep:
+                victims.append(key)
+        for key in victims:
+            cells = self.chunks.pop(key)
+            with open(self._path(key), 'wb') as f:
+                f.write(zlib.compress(cells.tobytes(), 1))
+            self.spilled[key] = (cells[0].copy(), cells[-1].copy(), cells[:, 0].copy(), cells[:, -1].copy())
+            self.active.discard(key)
+            self.stats['spills'] += 1
+        self.stats['resident'] = len(self.chunks)
+        self.stats['spilled'] = len(self.spilled)
+
+    def _read(self, key: tuple) -> npt.NDArray[np.int8]:
+        with open(self._path(key), 'rb') as f:
+            data = zlib.decompress(f.read())
+        return np.frombuffer(data, dtype=np.int8).reshape(self.chunk, self.chunk).copy()
+
+    def _load(self, key: tuple) -> npt.NDArray[np.int8]:
+        """Wake a spilled chunk; it steps again from the next generation"""
+        cells = self.chunks[key] = self._read(key)
+        os.remove(self._path(key))
+        del self.spilled[key]
+        self.active.add(key)
+        self.stats['loads'] += 1
+        self.stats['resident'] = len(self.chunks)
+        self.stats['spilled'] = len(self.spilled)
+        return cells
+
+    def _edges(self, key: tuple) -> npt.NDArray[np.int8]:
+        """A spilled chunk as its neighbours see it: its edges, from memory"""
+        top, bottom, left, right = self.spilled[key]
+        cells = np.zeros((self.chunk, self.chunk), dtype=np.int8)
+        cells[0], cells[-1], cells[:, 0], cells[:, -1] = top, bottom, left, right
+        return cells
@@ -0,0 +1,1098 @@
+import json as _json
+import threading as _threading
+import time as _time
+
+from types import MethodType as _MethodType
+
+from typing import Iterable as _Iterable
+from typing import List as _List
+from typing import Optional as _Optional
+from typing import Tuple as _Tuple
+from typing import Type as _Type
+from typing import TypeVar as _TypeVar
+
+from weakref import ref as _ref
+from weakref import WeakMethod as _WeakMethod
+
+from types import SimpleNamespace as _SimpleNamespace
+
+from collections import deque as _deque
+
+try:
+    import numpy as _np
+except ImportError:  # only columnar Components need numpy
+    _np = None
+
+
+version = '2.4'
+
+
+###################
+#  Event system
+###################
+
+event_registry: dict = {}
+batch_registry: dict = {}
+
+# name -> (payloads in the order queued, the hashable payloads among them)
+_event_queue: dict = {}
+
+
+def dispatch_event(name: str, *args) -> None:
+    """Dispatch an event by name, with optional arguments.
+    Any handlers set with the :py:func:`esper.set_handler` function
+    will recieve the event. If no handlers have been set, this
+    function call will pass silently.
+    :note:: If optional arguments are provided, but set handlers
+            do not account for them, it will likely result in a
+            TypeError or other undefined crash.
+    """
+    for func in event_registry.get(name, []):
+        func()(*args)
+
+
+def queue_event(name: str, *args) -> None:
+    """Queue an event by name, with optional arguments, for the next flush.
+    Nothing is called until :py:func:`esper.flush_events`, which every
+    :py:meth:`esper.World.process` call makes once its Processors have run.
+    An event queued with the same name and arguments as one already waiting
+    is dropped, so each distinct event is delivered once per flush.
+    """
+    queued = _event_queue.get(name)
+    if queued is None:
+        queued = _event_queue.setdefault(name, ([], set()))
+    payloads, seen = queued
+    try:
+        if args in seen:
+            return
+        seen.add(args)
+    except TypeError:  # unhashable arguments, such as arrays, are never coalesced
+        pass
+    payloads.append(args)
+
+
+def queue_events(name: str, payloads: _Iterable[tuple]) -> None:
+    """Queue many events of one name, one per tuple of arguments::
+        esper.queue_events('cell_born', zip(ys.tolist(), xs.tolist()))
+    """
+    for args in payloads:
+        queue_event(name, *args)
+
+
+def flush_events() -> None:
+    """Deliver every queued event, in the order the names were first queued.
+    Handlers set with :py:func:`esper.set_batch_handler` are called once per
+    name with the list of argument tuples; handlers set with
+    :py:func:`esper.set_handler` are called once per event. Events queued by
+    the handlers themselves wait for the next flush.
+    """
+    queue = dict(_event_queue)
+    _event_queue.clear()
+    for name, (payloads, _) in queue.items():
+        for func in list(batch_registry.get(name, ())):
+            func()(payloads)
+        for func in list(event_registry.get(name, ())):
+            handler = func()
+            for args in payloads:
+                handler(*args)
+
+
+def _make_callback(name: str, registry: dict = event_registry):
+    """Create an internal callback to remove dead handlers."""
+    def callback(weak_method):
+        registry[name].remove(weak_method)
+        if not registry[name]:
+            del registry[name]
+
+    return callback
+
+
+def set_handler(name: str, func) -> None:
+    """Register a function to handle the named event type.
+    After registering a function (or method), it will receive all
+    events that are dispatched by the specified name.
+    :note:: Only a weak reference is kept to the passed function,
+    """
+    if name not in event_registry:
+        event_registry[name] = set()
+
+    if isinstance(func, _MethodType):
+        event_registry[name].add(_WeakMethod(func, _make_callback(name)))
+    else:
+        event_registry[name].add(_ref(func, _make_callback(name)))
+
+
+def remove_handler(name: str, func) -> None:
+    """Unregister a handler from receiving events of this name.
+    If the passed function/method is not registered to
+    receive the named event, or if the named event does
+    not exist, this function call will pass silently.
+    """
+    if func not in event_registry.get(name, []):
+        return
+
+    event_registry[name].remove(func)
+    if not event_registry[name]:
+        del event_registry[name]
+
+
+def set_batch_handler(name: str, func) -> None:
+    """Register a function to handle queued events of the named type in batches.
+    At every :py:func:`esper.flush_events` the function is called once, with
+    a list of the argument tuples of every queued event of that name.
+    Events sent straight away with :py:func:`esper.dispatch_event` do not
+    reach it. As with :py:func:`esper.set_handler`, only a weak reference
+    is kept.
+    """
+    if name not in batch_registry:
+        batch_registry[name] = set()
+
+    if isinstance(func, _MethodType):
+        batch_registry[name].add(_WeakMethod(func, _make_callback(name, batch_registry)))
+    else:
+        batch_registry[name].add(_ref(func, _make_callback(name, batch_registry)))
+
+
+def remove_batch_handler(name: str, func) -> None:
+    """Unregister a batch handler. Passes silently if it was not registered."""
+    # the registry holds weak references, which compare equal to a fresh one to the same function
+    ref = _WeakMethod(func) if isinstance(func, _MethodType) else _ref(func)
+    if ref not in batch_registry.get(name, []):
+        return
+
+    batch_registry[name].remove(ref)
+    if not batch_registry[name]:
+        del batch_registry[name]
+
+
+###################
+#   ECS Classes
+###################
+
+
+_C = _TypeVar('_C')
+
+_INDEX_BITS = 32
+_INDEX_MASK = (1 << _INDEX_BITS) - 1
+
+
+class Processor:
+    """Base class for all Processors to inherit from.
+    Processor instances must contain a `process` method, but you are otherwise
+    free to define the class any way you wish. Processors should be instantiated,
+    and then added to a :py:class:`esper.World` instance by calling
+    :py:meth:`esper.World.add_processor`. For example::
+        my_world = World()
+        my_processor_instance = MyProcessor()
+        my_world.add_processor(my_processor_instance)
+    After adding your Processors to a :py:class:`esper.World`, Processor.world
+    will be set to the World it is in. This allows easy access to the World and
+    it's methods from your Processor methods. All Processors in a World will have
+    their `process` methods called by a single call to :py:meth:`esper.World.process`,
+    so you will generally want to iterate over entities with one (or more) calls to
+    the appropriate world methods::
+        def process(self):
+            for ent, (rend, vel) in self.world.get_components(Renderable, Velocity):
+                your_code_here()
+    Processors may declare the Component types they read and write. In a World
+    with worker threads, Processors whose declarations do not overlap run at
+    the same time; Processors that declare neither run on their own::
+        class MovementProcessor(Processor):
+            reads = (Velocity,)
+            writes = (Position,)
+    A Processor that runs alongside others must not create or delete Entities,
+    or add or remove Components, while it runs.
+    """
+
+    priority = 0
+    reads: _Optional[_Tuple[type, ...]] = None
+    writes: _Optional[_Tuple[type, ...]] = None
+    world: "World"
+
+    def process(self, *args, **kwargs):
+        raise NotImplementedError
+
+
+class Column:
+    """Base class for columnar Components, whose fields live in NumPy arrays.
+    Declare the fields and their NumPy dtypes in a `fields` mapping. A dtype
+    with a shape, such as ('f8', 2), gives every entity a small vector::
+        class Position(esper.Column):
+            fields = {'x': 'f8', 'y': 'f8'}
+    Instances are created and added to a World like any other Component. Once
+    added, their values are kept in one array per field, shared by every
+    Entity of the same archetype, and the instance reads and writes its row
+    of those arrays. Processors can work on whole columns at once with
+    :py:meth:`esper.World.get_columns`. When the Component is removed, the
+    instance keeps a copy of its last values.
+    """
+
+    fields: dict = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if _np is None:
+            raise ImportError("columnar Components need numpy")
+        cls._dtypes = {name: _np.dtype(dtype) for name, dtype in cls.fields.items()}
+
+    def __init__(self, **values):
+        unknown = set(values) - set(self.fields)
+        if unknown:
+            raise TypeError(f"{type(self).__name__} has no fields {sorted(unknown)}")
+        detached = {}
+        for name, dtype in self._dtypes.items():
+            value = _np.zeros(dtype.shape, dtype.base)
+            value[...] = values.get(name, 0)
+            detached[name] = value if dtype.shape else value[()]
+        object.__setattr__(self, '_values', detached)
+        object.__setattr__(self, '_table', None)
+        object.__setattr__(self, '_entity', None)
+
+    def _attach(self, table: "_ColumnTable", entity: int, component_type: type) -> None:
+        # the type the instance was added as, which a type_alias can make differ from its own
+        object.__setattr__(self, '_table', table)
+        object.__setattr__(self, '_entity', entity)
+        object.__setattr__(self, '_type', component_type)
+
+    def _detach(self, values: dict) -> None:
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, '_table', None)
+        object.__setattr__(self, '_entity', None)
+
+    def __getattr__(self, name):
+        if name not in self.fields:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        table = self._table
+        if table is None:
+            return self._values[name]
+        return table.columns[self._type][name][table.rows[self._entity]]
+
+    def __setattr__(self, name, value):
+        if name not in self.fields:
+            object.__setattr__(self, name, value)
+        elif self._table is None:
+            self._values[name][...] = value
+        else:
+            table = self._table
+            table.columns[self._type][name][table.rows[self._entity]] = value
+
+    def __repr__(self):
+        values = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.fields)
+        return f"{type(self).__name__}({values})"
+
+
+class _ColumnTable:
+    """The columns of every columnar Component type in one archetype.
+    Rows line up across all columns, one per Entity. Removing an Entity moves
+    the last row into its place, so the columns stay packed.
+    """
+
+    def __init__(self, column_types: _Tuple[_Type[Column], ...]):
+        self.column_types = column_types
+        self.count = 0
+        self.capacity = 8
+        self.entities = _np.zeros(self.capacity, dtype=_np.int64)
+        self.rows = {}
+        self.columns = {ct: {name: _np.zeros((self.capacity,) + dtype.shape, dtype.base)
+                             for name, dtype in ct._dtypes.items()}
+                        for ct in column_types}
+
+    def _grow(self) -> None:
+        self.capacity *= 2
+        self.entities = _np.resize(self.entities, self.capacity)
+        for fields in self.columns.values():
+            for name, array in fields.items():
+                grown = _np.zeros((self.capacity,) + array.shape[1:], array.dtype)
+                grown[:self.count] = array[:self.count]
+                fields[name] = grown
+
+    def append(self, entity: int, values: dict) -> None:
+        """Add a row for an Entity, from a {type: {field: value}} mapping."""
+        if self.count == self.capacity:
+            self._grow()
+        row = self.count
+        self.entities[row] = entity
+        self.rows[entity] = row
+        for ct, fields in self.columns.items():
+            for name, array in fields.items():
+                array[row] = values[ct][name]
+        self.count += 1
+
+    def extend(self, entities: _List[int], values: dict) -> None:
+        """Add rows for many Entities, from a {type: {field: array}} mapping."""
+        start = self.count
+        stop = start + len(entities)
+        while stop > self.capacity:
+            self._grow()
+        self.entities[start:stop] = entities
+        self.rows.update(zip(entities, range(start, stop)))
+        for ct, fields in self.columns.items():
+            for name, array in fields.items():
+                array[start:stop] = values[ct][name]
+        self.count = stop
+
+    def remove(self, entity: int) -> dict:
+        """Remove an Entity's row, returning a copy of its values."""
+        row = self.rows.pop(entity)
+        last = self.count - 1
+        values = {ct: {name: array[row].copy() for name, array in fields.items()}
+                  for ct, fields in self.columns.items()}
+        if row != last:
+            moved = int(self.entities[last])
+            self.entities[row] = moved
+            self.rows[moved] = row
+            for fields in self.columns.values():
+                for array in fields.values():
+                    array[row] = array[last]
+        self.count = last
+        return values
+
+    def view(self, column_type: _Type[Column]) -> _SimpleNamespace:
+        """The live rows of one Component type, as a namespace of array views."""
+        return _SimpleNamespace(**{name: array[:self.count]
+                                   for name, array in self.columns[column_type].items()})
+
+
+class Profiler:
+    """Timings and query cache counts for a :py:class:`esper.World`.
+    Created by :py:meth:`esper.World.enable_profiling`. Every Processor run,
+    and every call to `_clear_dead_entities`, is timed with `perf_counter_ns`
+    and the last `window` durations of each are kept, so the percentiles
+    follow recent frames rather than the whole session. The last `trace`
+    timed spans are also kept, for :py:meth:`esper.Profiler.chrome_trace`.
+    The `hits` and `misses` dicts count query cache lookups by method name.
+    Processors on worker threads record into the same Profiler, so every
+    update is made under one lock.
+    """
+
+    def __init__(self, window: int = 1024, trace: int = 65536):
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self.hits = {'get_component': 0, 'get_components': 0}
+        self.misses = {'get_component': 0, 'get_components': 0}
+        self.spans = _deque(maxlen=trace)
+        self._lock = _threading.Lock()
+
+    def record(self, name: str, start: int, duration: int) -> None:
+        """Add a span of `duration` nanoseconds, starting at `start`."""
+        thread = _threading.get_ident()
+        with self._lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = _deque(maxlen=self.window)
+                self.counts[name] = 0
+            samples.append(duration)
+            self.counts[name] += 1
+            self.spans.append((name, start, duration, thread))
+
+    def lookup(self, name: str, hit: bool) -> None:
+        """Count a query cache lookup by the method `name`."""
+        with self._lock:
+            (self.hits if hit else self.misses)[name] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.samples.clear()
+            self.counts.clear()
+            self.spans.clear()
+            for counts in (self.hits, self.misses):
+                for name in counts:
+                    counts[name] = 0
+
+    def summary(self) -> dict:
+        """Rolling statistics per timed name, in milliseconds, and the cache counts."""
+        with self._lock:
+            samples = {name: list(durations) for name, durations in self.samples.items()}
+            counts = dict(self.counts)
+            cache = {'hits': dict(self.hits), 'misses': dict(self.misses)}
+        timings = {}
+        for name, durations in samples.items():
+            ordered = sorted(durations)
+            if not ordered:
+                continue
+            last = len(ordered) - 1
+            timings[name] = {
+                'count': counts[name],
+                'last': durations[-1] / 1e6,
+                'p50': ordered[last * 50 // 100] / 1e6,
+                'p95': ordered[last * 95 // 100] / 1e6,
+                'p99': ordered[last * 99 // 100] / 1e6,
+                'max': ordered[-1] / 1e6,
+            }
+        return {'timings': timings, 'cache': cache}
+
+    def to_json(self, path: _Optional[str] = None) -> str:
+        """The summary as JSON, also written to `path` if one is given."""
+        text = _json.dumps(self.summary(), indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def chrome_trace(self, path: str) -> None:
+        """Write the kept spans as a Chrome trace, for chrome://tracing or Perfetto."""
+        threads = {}
+        events = []
+        with self._lock:
+            spans = list(self.spans)
+        for name, start, duration, thread in spans:
+            events.append({'name': name, 'ph': 'X', 'pid': 0,
+                           'tid': threads.setdefault(thread, len(threads)),
+                           'ts': start / 1000, 'dur': duration / 1000})
+        with open(path, 'w') as f:
+            _json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+class World:
+    """A World object keeps track of all Entities, Components, and Processors.
+    A World contains a database of all Entity/Component assignments. The World
+    is also responsible for executing all Processors assigned to it for each
+    frame of your game.
+    Entities are grouped into archetypes: one table per distinct set of
+    Component types. Queries walk only the tables whose archetype has every
+    requested type, and a structural change only invalidates the cached
+    queries it could have changed, so churn among unrelated entities leaves
+    the cache warm.
+    With `workers` above 1, Processors are run in stages on a thread pool of
+    that size. See :py:attr:`esper.World.stages`. Call
+    :py:meth:`esper.World.close`, or use the World as a context manager, to
+    shut the pool down.
+    `timed=True` is the same as calling :py:meth:`esper.World.enable_profiling`.
+    """
+
+    def __init__(self, timed=False, workers: int = 1):
+        self._processors = []
+        self._stages = None
+        self.workers = workers
+        self._executor = None
+        self._next_entity_id = 0
+        # generation of every entity index handed out, and the indexes free for reuse
+        self._entity_generations = [0]
+        self._free_entity_indexes = _deque()
+        self._entities = {}
+        self._dead_entities = set()
+
+        # archetype (frozenset of types) -> {entity: None}, in insertion order
+        self._archetypes = {}
+        # component type -> set of archetypes containing it
+        self._components = {}
+        # entity -> its archetype
+        self._entity_archetype = {}
+        # archetype -> the columns of its columnar Components, if it has any
+        self._column_tables = {}
+
+        self._get_component_cache = {}
+        self._get_components_cache = {}
+
+        self.profiler = None
+        if timed:
+            self.enable_profiling()
+
+    def __enter__(self) -> "World":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the worker thread pool, if one was started.
+        The World is still usable afterwards; the next staged
+        :py:meth:`esper.World.process` starts a new pool.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def enable_profiling(self, window: int = 1024, trace: int = 65536) -> Profiler:
+        """Start profiling Processors and queries, returning the :py:class:`esper.Profiler`.
+        The profiled methods are swapped in on this World only, so a World
+        that is not being profiled pays nothing for it.
+        """
+        if self.profiler is None:
+            self.profiler = Profiler(window, trace)
+            self._process = self._profiled_process
+            self._clear_dead_entities = self._profiled_clear_dead_entities
+            self.get_component = self._profiled_get_component
+            self.get_components = self._profiled_get_components
+        return self.profiler
+
+    def disable_profiling(self) -> None:
+        """Stop profiling and put the plain methods back."""
+        if self.profiler is not None:
+            for name in ('_process', '_clear_dead_entities', 'get_component', 'get_components'):
+                del self.__dict__[name]
+            self.profiler = None
+
+    def clear_cache(self) -> None:
+        """Manually clear the internal cache."""
+        self._get_component_cache.clear()
+        self._get_components_cache.clear()
+
+    def clear_database(self) -> None:
+        """Remove all Entities and Components from the World."""
+        self._dead_entities.clear()
+        self._entities.clear()
+        self._archetypes.clear()
+        self._components.clear()
+        self._entity_archetype.clear()
+        self._column_tables.clear()
+        self._next_entity_id = 0
+        self._entity_generations = [0]
+        self._free_entity_indexes.clear()
+        self.clear_cache()
+
+    def _new_entity_id(self) -> int:
+        """Hand out an Entity ID, reusing the index of a deleted Entity if there is one.
+        The low 32 bits of an ID are its index and the rest its generation,
+        which goes up every time the index is reused, so the ID of a deleted
+        Entity never refers to a new one. Until an index is reused, IDs are
+        the plain counting numbers 1, 2, 3...
+        """
+        if self._free_entity_indexes:
+            index = self._free_entity_indexes.popleft()
+            return (self._entity_generations[index] << _INDEX_BITS) | index
+        self._next_entity_id += 1
+        self._entity_generations.append(0)
+        # skip IDs the World did not hand out but was given, through add_component
+        while self._next_entity_id in self._entities:
+            self._next_entity_id += 1
+            self._entity_generations.append(0)
+        return self._next_entity_id
+
+    def _issued(self, entity: int) -> bool:
+        """Whether the index of an ID has been handed out, so its generation can be checked."""
+        return 0 < entity & _INDEX_MASK < len(self._entity_generations)
+
+    def _current(self, entity: int) -> bool:
+        """Whether an ID was handed out and its index has not been reused since."""
+        return self._issued(entity) and self._entity_generations[entity & _INDEX_MASK] == entity >> _INDEX_BITS
+
+    def _release_entity_id(self, entity: int) -> None:
+        # an ID the World did not hand out, or a stale one, must not free an index in use
+        if not self._current(entity):
+            return
+        index = entity & _INDEX_MASK
+        self._entity_generations[index] = (entity >> _INDEX_BITS) + 1
+        self._free_entity_indexes.append(index)
+
+    def _invalidate(self, archetype: frozenset, changed: _Iterable[_Type]) -> None:
+        """Drop the cached queries an entity of this archetype changing these types could affect.
+        A query is affected only if it asks for one of the changed types and
+        the archetype has every type it asks for.
+        """
+        component_cache = self._get_component_cache
+        for component_type in changed:
+            component_cache.pop(component_type, None)
+
+        components_cache = self._get_components_cache
+        if components_cache:
+            changed = set(changed)
+            stale = [query for query in components_cache
+                     if not changed.isdisjoint(query) and archetype.issuperset(query)]
+            for query in stale:
+                del components_cache[query]
+
+    def _archetype_table(self, archetype: frozenset) -> dict:
+        """Get the table of an archetype, creating it (and its columns) if needed."""
+        table = self._archetypes.get(archetype)
+        if table is None:
+            table = self._archetypes[archetype] = {}
+            for component_type in archetype:
+                self._components.setdefault(component_type, set()).add(archetype)
+            column_types = tuple(ct for ct in archetype if isinstance(ct, type) and issubclass(ct, Column))
+            if column_types:
+                self._column_tables[archetype] = _ColumnTable(column_types)
+        return table
+
+    def _move_entity(self, entity: int, archetype: frozenset, removed: _Optional[dict] = None) -> None:
+        """Move an Entity from its current archetype table to another.
+        An empty archetype removes the Entity from every table. Columnar
+        Components carry their values over to the new table; the ones in
+        `removed` (a {type: instance} mapping) are detached with theirs.
+        """
+        saved = {}
+        old = self._entity_archetype.pop(entity, None)
+        if old is not None:
+            table = self._archetypes[old]
+            del table[entity]
+            columns = self._column_tables.get(old)
+            if columns is not None:
+                saved = columns.remove(entity)
+            if not table:
+                del self._archetypes[old]
+                self._column_tables.pop(old, None)
+                for component_type in old:
+                    self._components[component_type].discard(old)
+                    if not self._components[component_type]:
+                        del self._components[component_type]
+
+        if removed:
+            for component_type, component_instance in removed.items():
+                if component_type in saved:
+                    component_instance._detach(saved[component_type])
+
+        if archetype:
+            table = self._archetype_table(archetype)
+            table[entity] = None
+            self._entity_archetype[entity] = archetype
+
+            columns = self._column_tables.get(archetype)
+            if columns is not None:
+                entity_components = self._entities[entity]
+                for ct in columns.column_types:
+                    if ct not in saved:
+                        saved[ct] = entity_components[ct]._values
+                columns.append(entity, saved)
+                for ct in columns.column_types:
+                    entity_components[ct]._attach(columns, entity, ct)
+
+    def add_processor(self, processor_instance: Processor, priority=0) -> None:
+        """Add a Processor instance to the World.
+        All processors should subclass :py:class:`esper.Processor`.
+        An optional priority argument can be provided. A higher
+        priority will be executed first when :py:meth:`esper.World.process`
+        is called.
+        """
+        processor_instance.priority = priority
+        processor_instance.world = self
+        self._processors.append(processor_instance)
+        self._processors.sort(key=lambda proc: proc.priority, reverse=True)
+        self._stages = None
+
+    def remove_processor(self, processor_type: _Type[Processor]) -> None:
+        """Remove a Processor from the World, by type.
+        Make sure to provide the class itself, **not** an instance. For example::
+            # OK:
+            self.world.remove_processor(MyProcessor)
+            # NG:
+            self.world.remove_processor(my_processor_instance)
+        """
+        for processor in self._processors:
+            if type(processor) is processor_type:
+                del processor.world
+                self._processors.remove(processor)
+                self._stages = None
+
+    def get_processor(self, processor_type: _Type[Processor]) -> _Optional[Processor]:
+        """Get a Processor instance, by type.
+        This method returns a Processor instance by type. This could be
+        useful in certain situations, such as wanting to call a method on a
+        Processor, from within another Processor.
+        """
+        for processor in self._processors:
+            if type(processor) is processor_type:
+                return processor
+        else:
+            return None
+
+    def create_entity(self, *components: _C) -> int:
+        """Create a new Entity, with optional Components.
+        This method returns an Entity ID, which is a plain integer. IDs of
+        deleted Entities are recycled with a new generation, so an old ID
+        never refers to a new Entity.
+        You can optionally pass one or more Component instances to be
+        assigned to the Entity on creation. Components can be also be
+        added later with the :py:meth:`esper.World.add_component` method.
+        """
+        entity = self._new_entity_id()
+
+        if components:
+            entity_components = {type(component_instance): component_instance
+                                 for component_instance in components}
+            self._entities[entity] = entity_components
+            archetype = frozenset(entity_components)
+            self._move_entity(entity, archetype)
+            self._invalidate(archetype, archetype)
+
+        return entity
+
+    def delete_entity(self, entity: int, immediate: bool = False) -> None:
+        """Delete an Entity from the World.
+        Delete an Entity and all of it's assigned Component instances from
+        the world. By default, Entity deletion is delayed until the next call
+        to :py:meth:`esper.World.process`. You can, however, request immediate
+        deletion by passing the `immediate=True` parameter. Note that immediate
+        deletion may cause issues, such as when done during Entity iteration
+        (calls to World.get_component/s).
+        Raises a KeyError if the given entity does not exist in the database.
+        """
+        if immediate:
+            archetype = self._entity_archetype[entity]
+            self._move_entity(entity, frozenset(), self._entities.pop(entity))
+            self._release_entity_id(entity)
+            self._invalidate(archetype, archetype)
+
+        else:
+            self._dead_entities.add(entity)
+
+    def create_entities(self, *columns) -> _List[int]:
+        """Create many Entities at once, returning their IDs in order.
+        Every argument is a column of Components, one per Entity, and
+        Entity i gets item i of every column. A column is either a sequence
+        of Component instances, or for a columnar Component a tuple of its
+        type and a {field: values} mapping, which fills its arrays directly::
+            ids = world.create_entities(
+                [Renderable() for _ in range(n)],
+                (Position, {'x': xs, 'y': ys}),
+            )
+        All the indexes are updated in one pass per archetype, and the cache
+        is invalidated once per archetype rather than once per Component.
+        """
+        if not columns:
+            return []
+        lengths = set()
+        for column in columns:
+            if isinstance(column, tuple):
+                column_type, values = column
+                if not (isinstance(column_type, type) and issubclass(column_type, Column)) or not values:
+                    raise TypeError("bulk columns must be a Column type and a {field: values} mapping")
+                lengths.update(len(array) for array in values.values())
+            else:
+                lengths.add(len(column))
+        if len(lengths) != 1:
+            raise ValueError(f"columns of different lengths: {sorted(lengths)}")
+        count = lengths.pop()
+        entities = [self._new_entity_id() for _ in range(count)]
+
+        # split the columns of instances by type; bulk columns are one type throughout
+        bulk = {}
+        per_entity = [{} for _ in range(count)]
+        for column in columns:
+            if isinstance(column, tuple):
+                column_type, values = column
+                bulk[column_type] = {name: values.get(name, 0) for name in column_type.fields}
+                instances = [column_type.__new__(column_type) for _ in range(count)]
+            else:
+                instances = column
+            for entity_components, component_instance in zip(per_entity, instances):
+                entity_components[type(component_instance)] = component_instance
+
+        groups = {}
+        for entity, entity_components in zip(entities, per_entity):
+            self._entities[entity] = entity_components
+            groups.setdefault(frozenset(entity_components), []).append(entity)
+
+        for archetype, members in groups.items():
+            table = self._archetype_table(archetype)
+            table.update(dict.fromkeys(members))
+            self._entity_archetype.update(dict.fromkeys(members, archetype))
+
+            columns_table = self._column_tables.get(archetype)
+            if columns_table is not None:
+                values = {}
+                for ct in columns_table.column_types:
+                    if ct in bulk:
+                        values[ct] = bulk[ct]
+                    else:
+                        values[ct] = {name: _np.array([self._entities[e][ct]._values[name] for e in members])
+                                      for name in ct.fields}
+                columns_table.extend(members, values)
+                for entity in members:
+                    for ct in columns_table.column_types:
+                        self._entities[entity][ct]._attach(columns_table, entity, ct)
+            self._invalidate(archetype, archetype)
+
+        return entities
+
+    def delete_entities(self, entities: _Iterable[int], immediate: bool = False) -> None:
+        """Delete many Entities at once.
+        Like :py:meth:`esper.World.delete_entity`, deletion waits for the next
+        call to :py:meth:`esper.World.process` unless `immediate=True`, and
+        the cache is invalidated once per archetype touched.
+        Raises a KeyError if any of the given entities does not exist.
+        """
+        if immediate:
+            self._delete_entities_now(entities)
+        else:
+            self._dead_entities.update(entities)
+
+    def entity_exists(self, entity: int) -> bool:
+        """Check if a specific Entity exists.
+        Empty Entities (with no components) and dead Entities (destroyed
+        by delete_entity) will not count as existent ones.
+        """
+        return entity in self._entities and entity not in self._dead_entities
+
+    def component_for_entity(self, entity: int, component_type: _Type[_C]) -> _C:
+        """Retrieve a Component instance for a specific Entity.
+        Retrieve a Component instance for a specific Entity. In some cases,
+        it may be necessary to access a specific Component instance.
+        For example: directly modifying a Component to handle user input.
+        Raises a KeyError if the given Entity and Component do not exist.
+        """
+        return self._entities[entity][component_type]
+
+    def components_for_entity(self, entity: int) -> _Tuple[_C, ...]:
+        """Retrieve all Components for a specific Entity, as a Tuple.
+        Retrieve all Components for a specific Entity. The method is probably
+        not appropriate to use in your Processors, but might be useful for
+        saving state, or passing specific Components between World instances.
+        Unlike most other methods, this returns all the Components as a
+        Tuple in one batch, instead of returning a Generator for iteration.
+        Raises a KeyError if the given entity does not exist in the database.
+        """
+        return tuple(self._entities[entity].values())
+
+    def has_component(self, entity: int, component_type: _Type[_C]) -> bool:
+        """Check if an Entity has a specific Component type."""
+        return component_type in self._entities[entity]
+
+    def has_components(self, entity: int, *component_types: _Type[_C]) -> bool:
+        """Check if an Entity has all the specified Component types."""
+        return all(comp_type in self._entities[entity] for comp_type in component_types)
+
+    def add_component(self, entity: int, component_instance: _C, type_alias: _Optional[_Type[_C]] = None) -> None:
+        """Add a new Component instance to an Entity.
+        Add a Component instance to an Entiy. If a Component of the same type
+        is already assigned to the Entity, it will be replaced.
+        A `type_alias` can also be provided. This can be useful if you're using
+        subclasses to organize your Components, but would like to query them
+        later by some common parent type.
+        Raises a KeyError if the Entity was deleted: its ID may already
+        belong to a new Entity.
+        """
+        component_type = type_alias or type(component_instance)
+
+        if entity not in self._entities:
+            if self._issued(entity) and not self._current(entity):
+                raise KeyError(f"entity {entity} was deleted")
+            self._entities[entity] = {}
+
+        entity_components = self._entities[entity]
+        replaced = entity_components.get(component_type)
+        entity_components[component_type] = component_instance
+
+        archetype = self._entity_archetype.get(entity, frozenset())
+        if replaced is None:
+            archetype = archetype | {component_type}
+            self._move_entity(entity, archetype)
+        elif isinstance(replaced, Column):
+            # same archetype, so the new instance takes over the old one's row
+            columns = self._column_tables[archetype]
+            row = columns.rows[entity]
+            fields = columns.columns[component_type]
+            replaced._detach({name: array[row].copy() for name, array in fields.items()})
+            for name, array in fields.items():
+                array[row] = component_instance._values[name]
+            component_instance._attach(columns, entity, component_type)
+        self._invalidate(archetype, (component_type,))
+
+    def remove_component(self, entity: int, component_type: _Type[_C]) -> int:
+        """Remove a Component instance from an Entity, by type.
+        A Component instance can be removed by providing its type.
+        For example: world.delete_component(enemy_a, Velocity) will remove
+        the Velocity instance from the Entity enemy_a.
+        Raises a KeyError if either the given entity or Component type does
+        not exist in the database.
+        """
+        component_instance = self._entities[entity].pop(component_type)
+
+        archetype = self._entity_archetype[entity]
+        self._move_entity(entity, archetype - {component_type}, {component_type: component_instance})
+        self._invalidate(archetype, (component_type,))
+
+        if not self._entities[entity]:
+            del self._entities[entity]
+
+        return entity
+
+    def _get_component(self, component_type: _Type[_C]) -> _Iterable[_Tuple[int, _C]]:
+        entity_db = self._entities
+
+        for archetype in self._components.get(component_type, ()):
+            for entity in self._archetypes[archetype]:
+                yield entity, entity_db[entity][component_type]
+
+    def _get_components(self, *component_types: _Type[_C]) -> _Iterable[_Tuple[int, _List[_C]]]:
+        entity_db = self._entities
+        comp_db = self._components
+
+        try:
+            archetypes = set.intersection(*[comp_db[ct] for ct in component_types])
+        except KeyError:
+            return
+
+        for archetype in archetypes:
+            for entity in self._archetypes[archetype]:
+                components = entity_db[entity]
+                yield entity, [components[ct] for ct in component_types]
+
+    def get_component(self, component_type: _Type[_C]) -> _List[_Tuple[int, _C]]:
+        """Get an iterator for Entity, Component pairs."""
+        try:
+            return self._get_component_cache[component_type]
+        except KeyError:
+            return self._get_component_cache.setdefault(
+                component_type, list(self._get_component(component_type))
+            )
+
+    def get_components(self, *component_types: _Type[_C]) -> _List[_Tuple[int, _List[_C]]]:
+        """Get an iterator for Entity and multiple Component sets."""
+        try:
+            return self._get_components_cache[component_types]
+        except KeyError:
+            return self._get_components_cache.setdefault(
+                component_types, list(self._get_components(*component_types))
+            )
+
+    def get_columns(self, *column_types: _Type[Column]) -> _List[_Tuple[_Iterable[int], _List[_SimpleNamespace]]]:
+        """Get the columns of every archetype with all the given columnar Component types.
+        Each archetype gives an array of its Entity IDs and, for each requested
+        type, a namespace of array views over its fields, all with one row per
+        Entity in the same order. Arithmetic on the views writes straight into
+        the World, so a movement Processor can be::
+            for ents, (pos, vel) in self.world.get_columns(Position, Velocity):
+                pos.x += vel.x * dt
+                pos.y += vel.y * dt
+        The views are only valid until the next structural change to the World.
+        """
+        try:
+            archetypes = set.intersection(*[self._components[ct] for ct in column_types])
+        except KeyError:
+            return []
+
+        results = []
+        for archetype in archetypes:
+            columns = self._column_tables[archetype]
+            results.append((columns.entities[:columns.count], [columns.view(ct) for ct in column_types]))
+        return results
+
+    def try_component(self, entity: int, component_type: _Type[_C]) -> _Optional[_C]:
+        """Try to get a single component type for an Entity.
+        This method will return the requested Component if it exists,
+        or None if it does not. This allows a way to access optional Components
+        that may or may not exist, without having to first query if the Entity
+        has the Component type.
+        """
+        if component_type in self._entities[entity]:
+            return self._entities[entity][component_type]
+        return None
+
+    def try_components(self, entity: int, *component_types: _Type[_C]) -> _Optional[_List[_List[_C]]]:
+        """Try to get a multiple component types for an Entity.
+        This method will return the requested Components if they exist,
+        or None if they do not. This allows a way to access optional Components
+        that may or may not exist, without first having to query if the Entity
+        has the Component types.
+        """
+        if all(comp_type in self._entities[entity] for comp_type in component_types):
+            return [self._entities[entity][comp_type] for comp_type in component_types]
+        return None
+
+    def _clear_dead_entities(self):
+        """Finalize deletion of any Entities that are marked as dead."""
+        self._delete_entities_now(self._dead_entities)
+        self._dead_entities.clear()
+
+    def _profiled_clear_dead_entities(self):
+        start = _time.perf_counter_ns()
+        World._clear_dead_entities(self)
+        self.profiler.record('_clear_dead_entities', start, _time.perf_counter_ns() - start)
+
+    def _profiled_get_component(self, component_type: _Type[_C]) -> _List[_Tuple[int, _C]]:
+        self.profiler.lookup('get_component', component_type in self._get_component_cache)
+        return World.get_component(self, component_type)
+
+    def _profiled_get_components(self, *component_types: _Type[_C]) -> _List[_Tuple[int, _List[_C]]]:
+        self.profiler.lookup('get_components', component_types in self._get_components_cache)
+        return World.get_components(self, *component_types)
+
+    def _delete_entities_now(self, entities: _Iterable[int]) -> None:
+        entities = list(entities)
+        # check them all first, so a missing Entity leaves the World untouched
+        for entity in entities:
+            if entity not in self._entities:
+                raise KeyError(entity)
+
+        changed = {}
+        for entity in entities:
+            archetype = self._entity_archetype.get(entity)
+            components = self._entities.pop(entity)
+            if archetype is not None:
+                changed[archetype] = None
+                self._move_entity(entity, frozenset(), components)
+            self._release_entity_id(entity)
+
+        for archetype in changed:
+            self._invalidate(archetype, archetype)
+
+    @staticmethod
+    def _conflicts(a: Processor, b: Processor) -> bool:
+        if (a.reads is None and a.writes is None) or (b.reads is None and b.writes is None):
+            return True
+        a_writes, b_writes = set(a.writes or ()), set(b.writes or ())
+        return bool(a_writes & b_writes
+                    or a_writes & set(b.reads or ())
+                    or b_writes & set(a.reads or ()))
+
+    @property
+    def stages(self) -> _List[_List[Processor]]:
+        """The order Processors run in, as a list of stages.
+        The Processors of a stage run at the same time, and every stage
+        starts once the one before it has finished. A Processor goes in the
+        stage after the last one holding a higher priority Processor it
+        conflicts with: one that writes a Component type the other reads or
+        writes, or one that declares neither. So conflicting Processors
+        always run in priority order, and the plan only changes when
+        Processors are added or removed.
+        """
+        if self._stages is None:
+            stages = []
+            placed = []
+            for processor in self._processors:
+                stage = 1 + max((index for index, other in placed if self._conflicts(processor, other)),
+                                default=-1)
+                if stage == len(stages):
+                    stages.append([])
+                stages[stage].append(processor)
+                placed.append((stage, processor))
+            self._stages = stages
+        return self._stages
+
+    def _run_stages(self, run) -> None:
+        """Call run(processor) for every Processor, stage by stage on the thread pool."""
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='esper')
+        for stage in self.stages:
+            if len(stage) == 1:
+                run(stage[0])
+            else:
+                futures = [self._executor.submit(run, processor) for processor in stage]
+                for future in futures:
+                    future.result()
+
+    def _process(self, *args, **kwargs):
+        if self.workers <= 1:
+            for processor in self._processors:
+                processor.process(*args, **kwargs)
+        else:
+            self._run_stages(lambda processor: processor.process(*args, **kwargs))
+
+    def _profiled_process(self, *args, **kwargs):
+        """Time every Processor run with the profiler."""
+        record = self.profiler.record
+
+        def run(processor):
+            start = _time.perf_counter_ns()
+            processor.process(*args, **kwargs)
+            record(processor.__class__.__name__, start, _time.perf_counter_ns() - start)
+
+        if self.workers <= 1:
+            for processor in self._processors:
+                run(processor)
+        else:
+            self._run_stages(run)
+
+    def process(self, *args, **kwargs):
+        """Call the process method on all Processors, in order of their priority.
+        Call the :py:meth:`esper.Processor.process` method on all assigned Processors,
+        respecting their optional priority setting. In addition, any Entities
+        that were marked for deletion since the last call will be deleted
+        at the start of this call, and events queued with
+        :py:func:`esper.queue_event` are delivered at the end of it.
+        """
+        self._clear_dead_entities()
+        self._process(*args, **kwargs)
+        flush_events()
\ No newline at end of file
@@ -0,0 +1,178 @@
+import time
+import threading
+
+import numpy as np
+import numpy.typing as npt
+
+# The game loop
+
+# The simulation advances in fixed ticks, whatever the frame rate.
+# Systems are ticked in the order they were added; a system can be
+#   a World (or anything with process), which is called as process(dt)
+#   a biome (or anything with run), which is advanced one generation
+#   any other callable, which is called with dt
+#
+# FixedTimestep runs the ticks on the main thread, from pyglet.clock, as many as fit
+# in a per-frame work budget. Ticks that do not fit are dropped, so a slow generation
+# costs simulation time rather than frames.
+#
+# SimulationThread runs the ticks on a worker thread instead and publishes a copy of the
+# grid after every tick. Large numpy steps release the GIL, so the window keeps drawing
+# the latest completed frame while the next one is computed.
+
+
+def _ticker(system):
+    if hasattr(system, 'process'):
+        return system.process
+    if hasattr(system, 'run'):
+        return lambda dt: system.run(1)
+    return system
+
+
+############################################
+#
+#
+#   FixedTimestep: ticks in time-sliced chunks
+#
+#
+############################################
+
+class FixedTimestep():
+    """Tick systems at a fixed rate from the pyglet clock, within a budget per frame
+
+    Every frame the elapsed time is added to an accumulator, and a tick is
+    run for every whole step in it, until budget seconds have been spent.
+    Whole steps left over then are dropped and counted. The fraction of a
+    step left in the accumulator is alpha, for interpolating what is drawn
+    between the last two ticks.
+    """
+    def __init__(self, rate: float = 30, budget: float = 1 / 120, max_ticks: int = 5):
+        self.step = 1 / rate
+        self.budget = budget
+        self.max_ticks = max_ticks
+        self.systems = []
+        self.accumulator = 0.0
+        self.stats = {'ticks': 0, 'dropped': 0, 'tick_time': 0.0}
+
+    def add(self, system):
+        """Tick a system every step, after the ones added before it"""
+        self.systems.append(_ticker(system))
+
+    @property
+    def alpha(self) -> float:
+        return self.accumulator / self.step
+
+    def tick(self):
+        start = time.perf_counter()
+        for system in self.systems:
+            system(self.step)
+        self.stats['ticks'] += 1
+        self.stats['tick_time'] = time.perf_counter() - start
+
+    def update(self, dt: float):
+        """Run the ticks due after dt more seconds, as many as the budget allows"""
+        self.accumulator += dt
+        start = time.perf_counter()
+        ticks = 0
+        while self.accumulator >= self.step:
+            if ticks >= self.max_ticks or time.perf_counter() - start > self.budget:
+                dropped = int(self.accumulator // self.step)
+                self.stats['dropped'] += dropped
+                self.accumulator -= dropped * self.step
+                break
+            self.tick()
+            self.accumulator -= self.step
+            ticks += 1
+
+    def start(self, clock=None):
+        """Schedule the loop on the pyglet clock, every frame"""
+        if clock is None:
+            import pyglet
+            clock = pyglet.clock
+        clock.schedule(self.update)
+
+    def stop(self, clock=None):
+        if clock is None:
+            import pyglet
+            clock = pyglet.clock
+        clock.unschedule(self.update)
+
+
+############################################
+#
+#
+#   SimulationThread: ticks on a worker thread
+#
+#
+############################################
+
+class SimulationThread(threading.Thread):
+    """Tick systems at a fixed rate on a worker thread, publishing a grid after each tick
+
+    The grid is read after every tick (usually the biome's grid) and copied
+    into the published frame under a lock. Readers hold the same lock
+    through frame(), so they never see a half copied generation. If a tick
+    overruns, the ticks it overran are dropped instead of queued, so the
+    simulation falls behind real time but never spirals.
+    """
+    def __init__(self, grid, rate: float = 30):
+        super().__init__(daemon=True)
+        self.step = 1 / rate
+        self.systems = []
+        self.stats = {'ticks': 0, 'dropped': 0, 'tick_time': 0.0}
+
+        # grid is the array to publish, or a callable returning it
+        self._source = grid if callable(grid) else (lambda: grid)
+        self._frame = np.array(self._source(), copy=True)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self.generation = 0
+
+    def add(self, system):
+        """Tick a system every step, after the ones added before it"""
+        self.systems.append(_ticker(system))
+
+    def frame(self) -> "_Frame":
+        """The latest completed frame, to be used as a context manager::
+
+            with sim.frame() as grid:
+                renderer.update(grid)
+        """
+        return _Frame(self)
+
+    def run(self):
+        next_tick = time.perf_counter()
+        while not self._stopped.is_set():
+            start = time.perf_counter()
+            for system in self.systems:
+                system(self.step)
+            with self._lock:
+                np.copyto(self._frame, self._source())
+                self.generation += 1
+            now = time.perf_counter()
+            self.stats['ticks'] += 1
+            self.stats['tick_time'] = now - start
+
+            next_tick += self.step
+            if now > next_tick:
+                dropped = int((now - next_tick) // self.step) + 1
+                self.stats['dropped'] += dropped
+                next_tick += dropped * self.step
+            self._stopped.wait(max(0.0, next_tick - now))
+
+    def stop(self):
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
+
+
+class _Frame():
+    def __init__(self, sim: SimulationThread):
+        self.sim = sim
+
+    def __enter__(self) -> npt.NDArray[np.int8]:
+        self.sim._lock.acquire()
+        return self.sim._frame
+
+    def __exit__(self, *exc):
+        self.sim._lock.release()
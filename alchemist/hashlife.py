@@ -0,0 +1,311 @@
+import numpy as np
+import numpy.typing as npt
+
+# HashLife
+# https://en.wikipedia.org/wiki/Hashlife
+
+# HashLife stores the universe as a quadtree in which every distinct block of cells exists exactly once.
+# The centre of any block, advanced 2**j generations, depends only on the block itself,
+# so it is computed once, memoized on the block and shared by every place the block appears.
+# Periodic and highly regular patterns, such as glider guns and other constructors,
+# then advance exponentially many generations for the cost of a handful of lookups.
+
+# Unlike a biome, the HashLife universe has no edge:
+# patterns keep growing past the window they were imported from.
+
+
+############################################
+#
+#
+#   Node: a canonical block of the quadtree
+#
+#
+############################################
+
+class Node():
+    """A square block of 2**level cells, made of four blocks of half the size"""
+    __slots__ = ('nw', 'ne', 'sw', 'se', 'level', 'population', 'results')
+
+    def __init__(self, nw, ne, sw, se, level: int, population: int):
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.level = level
+        self.population = population
+        self.results = {}
+
+    def __repr__(self):
+        return f'Node(level={self.level}, population={self.population})'
+
+
+# the two single cell blocks every other block is built from
+OFF = Node(None, None, None, None, 0, 0)
+ON = Node(None, None, None, None, 0, 1)
+
+
+############################################
+#
+#
+#   HashLife: an unbounded universe stepped by the quadtree
+#
+#
+############################################
+
+class HashLife():
+    """Run the game of life on a memoized quadtree
+
+    Nodes are canonicalized through a table keyed by their children, so equal
+    blocks are the same object and results memoized on one are found by all.
+    The table holds at most max_nodes entries, during a step as well as between
+    them: once it grows past that, every node that neither the universe nor the
+    step in progress reaches is evicted, keeping the memoized results where
+    there is room. When what is reachable alone takes more than half of
+    max_nodes, the limit grows to twice that, so collections do not follow one
+    another on every call.
+    """
+    def __init__(self, max_nodes: int = 1 << 20):
+        self.max_nodes = max_nodes
+        self.generation = 0
+        self._table = {}
+        self._zeros = [OFF]
+        self._limit = max_nodes
+        # the nodes successor is working on, which a collection must keep
+        self._working = []
+
+        # the universe is the root node, whose top left cell sits at origin (row, column)
+        self.root = self.zero(3)
+        self.origin = (-4, -4)
+
+    def __repr__(self):
+        return f'HashLife(generation={self.generation}, population={self.population}, level={self.root.level})'
+
+    @property
+    def population(self) -> int:
+        return self.root.population
+
+    @property
+    def cache_size(self) -> int:
+        return len(self._table)
+
+    ############################################
+    #   building nodes
+    ############################################
+
+    def join(self, nw: Node, ne: Node, sw: Node, se: Node) -> Node:
+        """Get the canonical node with the given quadrants"""
+        key = (id(nw), id(ne), id(sw), id(se))
+        node = self._table.get(key)
+        if node is None:
+            node = Node(nw, ne, sw, se, nw.level + 1,
+                        nw.population + ne.population + sw.population + se.population)
+            self._table[key] = node
+        return node
+
+    def zero(self, level: int) -> Node:
+        """Get the empty node of the given level"""
+        while len(self._zeros) <= level:
+            z = self._zeros[-1]
+            self._zeros.append(self.join(z, z, z, z))
+        return self._zeros[level]
+
+    def centre(self, node: Node) -> Node:
+        """Wrap a node in an empty border, giving a node of twice the size"""
+        z = self.zero(node.level - 1)
+        return self.join(self.join(z, z, z, node.nw), self.join(z, z, node.ne, z),
+                         self.join(z, node.sw, z, z), self.join(node.se, z, z, z))
+
+    def _inner(self, node: Node) -> Node:
+        return self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    ############################################
+    #   stepping
+    ############################################
+
+    def _life_4x4(self, node: Node) -> Node:
+        """Advance the centre 2x2 of a 4x4 node by one generation"""
+        cells = [[0] * 4 for i in range(4)]
+        for qr, qc, quad in ((0, 0, node.nw), (0, 2, node.ne), (2, 0, node.sw), (2, 2, node.se)):
+            cells[qr][qc] = quad.nw.population
+            cells[qr][qc + 1] = quad.ne.population
+            cells[qr + 1][qc] = quad.sw.population
+            cells[qr + 1][qc + 1] = quad.se.population
+
+        def rule(r, c):
+            n = sum(cells[r + i][c + j] for i in (-1, 0, 1) for j in (-1, 0, 1)) - cells[r][c]
+            return ON if n == 3 or (n == 2 and cells[r][c]) else OFF
+
+        return self.join(rule(1, 1), rule(1, 2), rule(2, 1), rule(2, 2))
+
+    def successor(self, node: Node, j: int) -> Node:
+        """Get the centre half of a node advanced 2**j generations, for j <= level - 2"""
+        result = node.results.get(j)
+        if result is not None:
+            return result
+        if len(self._table) > self._limit:
+            self._collect()
+
+        if node.population == 0:
+            result = node.nw
+        elif node.level == 2:
+            result = self._life_4x4(node)
+        else:
+            join = self.join
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            self._working.append(node)
+
+            # nine overlapping subnodes of half the size, each advanced
+            c1 = self.successor(nw, j)
+            c2 = self.successor(join(nw.ne, ne.nw, nw.se, ne.sw), j)
+            c3 = self.successor(ne, j)
+            c4 = self.successor(join(nw.sw, nw.se, sw.nw, sw.ne), j)
+            c5 = self.successor(join(nw.se, ne.sw, sw.ne, se.nw), j)
+            c6 = self.successor(join(ne.sw, ne.se, se.nw, se.ne), j)
+            c7 = self.successor(sw, j)
+            c8 = self.successor(join(sw.ne, se.nw, sw.se, se.sw), j)
+            c9 = self.successor(se, j)
+
+            if j < node.level - 2:
+                # the subnodes have already gone far enough, just take their centres
+                result = join(join(c1.se, c2.sw, c4.ne, c5.nw),
+                              join(c2.se, c3.sw, c5.ne, c6.nw),
+                              join(c4.se, c5.sw, c7.ne, c8.nw),
+                              join(c5.se, c6.sw, c8.ne, c9.nw))
+            else:
+                # advance the four overlapping quarter nodes the second half of the way
+                result = join(self.successor(join(c1, c2, c4, c5), j),
+                              self.successor(join(c2, c3, c5, c6), j),
+                              self.successor(join(c4, c5, c7, c8), j),
+                              self.successor(join(c5, c6, c8, c9), j))
+            self._working.pop()
+
+        node.results[j] = result
+        return result
+
+    def step_pow2(self, j: int):
+        """Advance the universe by 2**j generations"""
+        root, (r0, c0) = self.root, self.origin
+
+        # grow until the pattern sits in the centre half with room to spread 2**j cells
+        while root.level < j + 2 or self._inner(root).population != root.population:
+            half = 1 << (root.level - 1)
+            root = self.centre(root)
+            r0, c0 = r0 - half, c0 - half
+        half = 1 << (root.level - 1)
+        root = self.centre(root)
+        r0, c0 = r0 - half, c0 - half
+
+        # the successor is the centre half of the padded root
+        root = self.successor(root, j)
+        r0, c0 = r0 + half, c0 + half
+
+        self.root, self.origin = root, (r0, c0)
+        self.generation += 1 << j
+        self._crop()
+        if len(self._table) > self._limit:
+            self._collect()
+
+    def run(self, generations: int):
+        """Advance the universe by any number of generations, a power of two at a time"""
+        j = 0
+        while generations:
+            if generations & 1:
+                self.step_pow2(j)
+            generations >>= 1
+            j += 1
+
+    def _crop(self):
+        """Shrink the root while the pattern fits inside its centre"""
+        root, (r0, c0) = self.root, self.origin
+        while root.level > 3 and self._inner(root).population == root.population:
+            quarter = 1 << (root.level - 2)
+            root = self._inner(root)
+            r0, c0 = r0 + quarter, c0 + quarter
+        self.root, self.origin = root, (r0, c0)
+
+    def _collect(self):
+        """Evict every node that neither the universe nor the step in progress reaches
+
+        Memoized results are followed too, so they survive, unless that keeps
+        more than half of max_nodes; then only the nodes themselves are kept,
+        and the results that point at them. The nodes a step holds between
+        calls, which may have left the table, stay valid: a node that is
+        needed again is simply built anew.
+        """
+        table = self._mark(results=True)
+        if len(table) > self.max_nodes // 2:
+            table = self._mark(results=False)
+            for node in table.values():
+                if node.results:
+                    node.results = {j: result for j, result in node.results.items()
+                                    if result.level == 0 or table.get(self._key(result)) is result}
+        self._table = table
+        self._limit = max(self.max_nodes, 2 * len(table))
+
+    @staticmethod
+    def _key(node: Node) -> tuple:
+        return (id(node.nw), id(node.ne), id(node.sw), id(node.se))
+
+    def _mark(self, results: bool) -> dict:
+        """The table of the nodes reachable from the root, the empty nodes and the step in progress"""
+        table = {}
+        stack = [self.root] + self._zeros[1:] + self._working
+        while stack:
+            node = stack.pop()
+            if node.level == 0:
+                continue
+            key = self._key(node)
+            if key not in table:
+                table[key] = node
+                stack.extend((node.nw, node.ne, node.sw, node.se))
+                if results:
+                    stack.extend(node.results.values())
+        return table
+
+    ############################################
+    #   numpy grids
+    ############################################
+
+    @classmethod
+    def from_array(cls, grid: npt.NDArray[np.int8], max_nodes: int = 1 << 20) -> "HashLife":
+        """Build a universe from a grid, with grid[0, 0] at row 0 and column 0"""
+        life = cls(max_nodes)
+        level = 3
+        while (1 << level) < max(grid.shape):
+            level += 1
+        padded = np.zeros((1 << level, 1 << level), dtype=bool)
+        padded[:grid.shape[0], :grid.shape[1]] = grid
+        life.root = life._build(padded, level)
+        life.origin = (0, 0)
+        life._crop()
+        return life
+
+    def _build(self, cells: npt.NDArray[np.bool_], level: int) -> Node:
+        if not cells.any():
+            return self.zero(level)
+        if level == 0:
+            return ON
+        half = 1 << (level - 1)
+        return self.join(self._build(cells[:half, :half], level - 1),
+                         self._build(cells[:half, half:], level - 1),
+                         self._build(cells[half:, :half], level - 1),
+                         self._build(cells[half:, half:], level - 1))
+
+    def to_array(self, shape: tuple, origin: tuple = (0, 0)) -> npt.NDArray[np.int8]:
+        """Render the window of the given shape whose top left cell is at origin"""
+        grid = np.zeros(shape, dtype=np.int8)
+        self._render(grid, self.root, self.origin[0] - origin[0], self.origin[1] - origin[1])
+        return grid
+
+    def _render(self, grid: npt.NDArray[np.int8], node: Node, r: int, c: int):
+        size = 1 << node.level
+        if node.population == 0 or r >= grid.shape[0] or c >= grid.shape[1] or r + size <= 0 or c + size <= 0:
+            return
+        if node.level == 0:
+            grid[r, c] = 1
+            return
+        half = size >> 1
+        self._render(grid, node.nw, r, c)
+        self._render(grid, node.ne, r, c + half)
+        self._render(grid, node.sw, r + half, c)
+        self._render(grid, node.se, r + half, c + half)
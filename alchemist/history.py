@@ -0,0 +1,154 @@
+import os
+import json
+import zlib
+
+import numpy as np
+import numpy.typing as npt
+
+# Simulation history
+
+# A history is a directory holding every recorded generation of a biome:
+#   meta.json    the grid shape and dtype, and how often a keyframe is written
+#   index.bin    one fixed size record per generation: (offset, length, keyframe)
+#   frames.bin   the zlib compressed frames, back to back
+#
+# Every keyframe_every generations the whole grid is stored as a keyframe.
+# Every other generation is stored as the XOR of the grid with the generation before it,
+# which is almost all zeros and compresses to a few bytes when little has changed.
+# Seeking to a generation decodes its keyframe and at most keyframe_every - 1 deltas,
+# so it costs the same at generation ten as at generation ten million.
+#
+# The writer only ever holds the last grid, and the reader memory maps both files,
+# so neither grows in memory with the length of the run.
+
+INDEX = np.dtype([('offset', '<u8'), ('length', '<u4'), ('keyframe', 'u1')])
+
+
+############################################
+#
+#
+#   HistoryWriter: records generations as they are made
+#
+#
+############################################
+
+class HistoryWriter():
+    """Append generations of a grid to a history directory
+
+    Attach it to a biome with ConnwaysGameOfLife.record, or call record
+    with each generation yourself. Close it (or use it as a context
+    manager) to flush the files.
+    """
+    def __init__(self, path: str, shape: tuple, dtype=np.int8, keyframe_every: int = 64, level: int = 1):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.keyframe_every = keyframe_every
+        self.level = level
+        self.generations = 0
+
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'shape': self.shape, 'dtype': self.dtype.str, 'keyframe_every': keyframe_every}, f)
+        self._index = open(os.path.join(path, 'index.bin'), 'wb')
+        self._frames = open(os.path.join(path, 'frames.bin'), 'wb')
+        self._offset = 0
+        self._last = np.zeros(self.shape, dtype=self.dtype)
+        self._delta = np.zeros(self.shape, dtype=self.dtype)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, grid: npt.NDArray[np.int8]):
+        """Append the grid as the next generation"""
+        keyframe = self.generations % self.keyframe_every == 0
+        if keyframe:
+            frame = grid
+        else:
+            frame = np.bitwise_xor(grid, self._last, out=self._delta)
+        blob = zlib.compress(np.ascontiguousarray(frame, dtype=self.dtype).tobytes(), self.level)
+
+        self._frames.write(blob)
+        record = np.array([(self._offset, len(blob), keyframe)], dtype=INDEX)
+        self._index.write(record.tobytes())
+        self._offset += len(blob)
+        self._last[...] = grid
+        self.generations += 1
+
+    def flush(self):
+        self._frames.flush()
+        self._index.flush()
+
+    def close(self):
+        if not self._index.closed:
+            self._frames.close()
+            self._index.close()
+
+
+############################################
+#
+#
+#   HistoryReader: seeks and replays a recorded run
+#
+#
+############################################
+
+class HistoryReader():
+    """Read any generation of a history directory
+
+    reader[n] gives generation n. The last decoded generation is kept, so
+    replaying forwards one generation at a time decodes one delta per step.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        self.shape = tuple(meta['shape'])
+        self.dtype = np.dtype(meta['dtype'])
+        self.keyframe_every = meta['keyframe_every']
+
+        self._index = self._map(os.path.join(path, 'index.bin'), INDEX)
+        self._frames = self._map(os.path.join(path, 'frames.bin'), np.uint8)
+        self._generation = None
+        self._grid = np.zeros(self.shape, dtype=self.dtype)
+
+    @staticmethod
+    def _map(path: str, dtype) -> np.ndarray:
+        # numpy refuses to memory map an empty file
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, generation: int) -> npt.NDArray[np.int8]:
+        if generation < 0:
+            generation += len(self)
+        if not 0 <= generation < len(self):
+            raise IndexError(f'generation {generation} is not in a history of {len(self)}')
+        return self.seek(generation).copy()
+
+    def __iter__(self):
+        for generation in range(len(self)):
+            yield self[generation]
+
+    def _decode(self, generation: int) -> npt.NDArray[np.int8]:
+        offset, length, keyframe = self._index[generation]
+        raw = zlib.decompress(self._frames[int(offset):int(offset) + int(length)])
+        return np.frombuffer(raw, dtype=self.dtype).reshape(self.shape)
+
+    def seek(self, generation: int) -> npt.NDArray[np.int8]:
+        """Decode the given generation into the reader's own grid and return it"""
+        key = generation - generation % self.keyframe_every
+        current = self._generation
+        if current is None or not key <= current <= generation:
+            self._grid[...] = self._decode(key)
+            current = key
+        for g in range(current + 1, generation + 1):
+            np.bitwise_xor(self._grid, self._decode(g), out=self._grid)
+        self._generation = generation
+        return self._grid
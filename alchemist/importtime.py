@@ -0,0 +1,80 @@
+import re
+import ast
+import sys
+import subprocess
+
+# Import time budget
+#
+#   python -m alchemist.importtime [budget_ms] [module]
+#
+# imports numpy, then the module (alchemist by default), in a fresh interpreter under
+# python -X importtime, and adds up the time of every import made after numpy's.
+# numpy is left out because every worker pays for it whatever it runs; it is reported
+# on its own. The check fails if the rest goes over the budget, or if the import pulled
+# in any of the GUI or profiling backends, which should only load when used.
+#
+# Bytecode is compiled first, so the measurement is of a normal (warm) start.
+
+BUDGET_MS = 10.0
+BACKENDS = ('pyglet', 'matplotlib', 'cProfile', 'profile', 'PIL', 'IPython')
+
+_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def measure(module: str = 'alchemist') -> dict:
+    """Time importing module after numpy, in a fresh interpreter, in milliseconds"""
+    code = ('import numpy, sys; before = set(sys.modules); '
+            f'import {module}; '
+            f'print(sorted(m for m in set(sys.modules) - before if m.split(".")[0] in {BACKENDS!r}))')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, check=True)
+
+    numpy = None
+    total = 0
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match is None:
+            continue
+        own, cumulative, depth, name = int(match.group(1)), int(match.group(2)), len(match.group(3)), match.group(4)
+        if numpy is None:
+            if name == 'numpy' and depth == 1:
+                numpy = cumulative
+            continue
+        total += own
+        modules[name] = own
+
+    slowest = sorted(modules.items(), key=lambda item: -item[1])[:10]
+    return {
+        'module': module,
+        'numpy_ms': (numpy or 0) / 1000,
+        'import_ms': total / 1000,
+        'slowest': [(name, us / 1000) for name, us in slowest],
+        'backends': ast.literal_eval(result.stdout.strip().splitlines()[-1]),
+    }
+
+
+def check(budget_ms: float = BUDGET_MS, module: str = 'alchemist') -> bool:
+    """Print the measurement and return whether it is within budget"""
+    import compileall
+    import importlib.util
+
+    spec = importlib.util.find_spec(module)
+    if spec is not None and spec.submodule_search_locations:
+        compileall.compile_dir(list(spec.submodule_search_locations)[0], quiet=1)
+
+    report = measure(module)
+    ok = report['import_ms'] <= budget_ms and not report['backends']
+    print(f"import {module}: {report['import_ms']:.1f} ms (budget {budget_ms:.1f} ms), "
+          f"numpy {report['numpy_ms']:.1f} ms")
+    for name, ms in report['slowest']:
+        print(f'  {ms:7.2f} ms  {name}')
+    if report['backends']:
+        print(f"  backends loaded at import: {', '.join(report['backends'])}")
+    print('ok' if ok else 'over budget')
+    return ok
+
+
+if __name__ == '__main__':
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+    sys.exit(0 if check(budget, *sys.argv[2:3]) else 1)
@@ -0,0 +1,191 @@
+import os
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .alchemy import ConnwaysGameOfLife, VectorizedEngine
+
+# Parallel biomes
+
+# The grid is cut into horizontal strips, one per worker process.
+# Every strip lives in its own block of shared memory, holding two buffers (front and back)
+# of its rows plus one ghost row above and below and a dead column either side.
+# A generation is two phases separated by a barrier:
+#   1. every worker steps its strip from the front buffer into the back buffer
+#   2. every worker copies the edge rows of its neighbours' back buffers into its own ghost rows
+# after which all of them swap buffers. The ghost rows of the first and last strip
+# stay dead, which is exactly the edge of the serial biome.
+
+
+############################################
+#
+#
+#   Worker: steps one strip
+#
+#
+############################################
+
+def _attach(name: str, rows: int, width: int):
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray((2, rows + 2, width + 2), dtype=np.int8, buffer=shm.buf)
+
+
+def _worker(index: int, names: list, heights: list, width: int, barrier, conn):
+    """Wait for run commands and step the strip at index, in lockstep with the other workers"""
+    blocks = [_attach(names[i], heights[i], width) if abs(i - index) <= 1 else None
+              for i in range(len(names))]
+    strip = blocks[index][1]
+    above = blocks[index - 1][1] if index > 0 else None
+    below = blocks[index + 1][1] if index + 1 < len(names) else None
+    engine = VectorizedEngine((heights[index], width))
+
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        front, generations = msg
+        for i in range(generations):
+            back = 1 - front
+            engine.step_padded(strip[front], strip[back])
+            barrier.wait()
+
+            # exchange halos: pull the neighbours' edge rows into the ghost rows
+            if above is not None:
+                strip[back, 0] = above[back, -2]
+            if below is not None:
+                strip[back, -1] = below[back, 1]
+            barrier.wait()
+            front = back
+        conn.send(front)
+
+    for block in blocks:
+        if block is not None:
+            block[0].close()
+
+
+############################################
+#
+#
+#   ParallelRunner: steps a biome on many cores
+#
+#
+############################################
+
+class ParallelRunner():
+    """Run a biome on a pool of worker processes, one horizontal strip each
+
+    The workers stay alive between calls to run, so the cost of spawning them
+    and attaching the shared memory is paid once. Call close, or use the runner
+    as a context manager, to stop them and free the shared memory.
+    """
+    def __init__(self, biome: ConnwaysGameOfLife, workers: int = None):
+        self.biome = biome
+        h, w = biome.grid.shape
+        workers = min(workers or os.cpu_count() or 1, h)
+        self.workers = workers
+        self.stats = {}
+
+        bounds = np.linspace(0, h, workers + 1).astype(int)
+        self._bounds = list(zip(bounds[:-1], bounds[1:]))
+        heights = [int(r1 - r0) for r0, r1 in self._bounds]
+
+        self._shms = [shared_memory.SharedMemory(create=True, size=2 * (r + 2) * (w + 2)) for r in heights]
+        self._strips = [np.ndarray((2, r + 2, w + 2), dtype=np.int8, buffer=shm.buf)
+                        for r, shm in zip(heights, self._shms)]
+        for strip in self._strips:
+            strip[...] = 0
+        self._front = 0
+
+        barrier = mp.Barrier(workers)
+        names = [shm.name for shm in self._shms]
+        self._conns = []
+        self._procs = []
+        for i in range(workers):
+            parent, child = mp.Pipe()
+            proc = mp.Process(target=_worker, args=(i, names, heights, w, barrier, child), daemon=True)
+            proc.start()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def run(self, generations: int):
+        """Advance the biome's grid in place by the given number of generations"""
+        if generations <= 0:
+            return
+        grid = self.biome.grid
+        front = self._front
+
+        # scatter the grid into the strips, ghost rows included
+        h = grid.shape[0]
+        for (r0, r1), strip in zip(self._bounds, self._strips):
+            g0, g1 = max(r0 - 1, 0), min(r1 + 1, h)
+            strip[front, 1 + g0 - r0:1 + g1 - r0, 1:-1] = grid[g0:g1]
+
+        start = time.perf_counter()
+        for conn in self._conns:
+            conn.send((front, generations))
+        for conn in self._conns:
+            self._front = conn.recv()
+        elapsed = time.perf_counter() - start
+
+        # gather the strips back into the grid
+        for (r0, r1), strip in zip(self._bounds, self._strips):
+            grid[r0:r1] = strip[self._front, 1:-1, 1:-1]
+
+        self.stats['seconds_per_generation'] = elapsed / generations
+        self.stats['cells_per_second'] = grid.size * generations / elapsed
+
+    def scaling(self, generations: int = 10) -> dict:
+        """Time the serial vectorized engine and this runner on a copy of the biome
+
+        Efficiency is the speedup divided by the number of workers, so 1.0 is
+        perfect scaling and anything much lower means the strips are too thin
+        for the halo exchange and barriers to pay for themselves.
+        """
+        grid = self.biome.grid
+        serial = ConnwaysGameOfLife(grid.copy(), engine='vectorized')
+        start = time.perf_counter()
+        serial.run(generations)
+        serial_time = time.perf_counter() - start
+
+        biome, self.biome = self.biome, ConnwaysGameOfLife(grid.copy())
+        try:
+            self.run(generations)
+        finally:
+            self.biome = biome
+        parallel_time = self.stats['seconds_per_generation'] * generations
+
+        speedup = serial_time / parallel_time
+        return {
+            'workers': self.workers,
+            'generations': generations,
+            'serial_seconds': serial_time,
+            'parallel_seconds': parallel_time,
+            'speedup': speedup,
+            'efficiency': speedup / self.workers,
+        }
+
+    def close(self):
+        """Stop the workers and release the shared memory"""
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=1)
+            if proc.is_alive():
+                proc.terminate()
+        self._conns, self._procs = [], []
+        self._strips = []
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+        self._shms = []
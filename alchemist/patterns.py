@@ -0,0 +1,252 @@
+import os
+import re
+
+import numpy as np
+import numpy.typing as npt
+
+from .alchemy import Cell
+
+# Pattern files
+
+# Patterns from Golly and the LifeWiki catalogue come as RLE or plaintext files.
+#
+# RLE (https://conwaylife.com/wiki/Run_Length_Encoded):
+#   #N Glider                  comment lines start with #, #N is the name
+#   x = 3, y = 3, rule = B3/S23
+#   bob$2bo$3o!                runs of b (dead) o (alive) and $ (end of row), closed by !
+# a run count may have any number of digits and the body may be split over many lines.
+# Multi-state patterns use . for empty and A to X for states 1 to 24.
+#
+# Plaintext (https://conwaylife.com/wiki/Plaintext):
+#   !Name: Glider              comment lines start with !
+#   .O.                        one row per line, . dead and O alive
+#   ..O
+#   OOO
+#
+# Both readers work on the raw bytes as numpy arrays, so the body of a pattern is
+# decoded with a fixed number of array operations rather than a loop over characters.
+# Files are memory mapped, so multi-megabyte patterns are never read into Python strings.
+
+
+_HEADER = re.compile(rb'x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)(?:\s*,\s*rule\s*=\s*([^\s,]+))?', re.IGNORECASE)
+
+# the state every RLE tag stands for, or -1 for $ and -2 for characters that are not tags
+_TAGS = np.full(256, -2, dtype=np.int16)
+_TAGS[ord('b')] = _TAGS[ord('.')] = 0
+_TAGS[ord('o')] = 1
+_TAGS[np.frombuffer(b'ABCDEFGHIJKLMNOPQRSTUVWX', dtype=np.uint8)] = np.arange(1, 25)
+_TAGS[ord('$')] = -1
+
+_POWERS = 10 ** np.arange(18, dtype=np.int64)
+
+
+############################################
+#
+#
+#   Reading
+#
+#
+############################################
+
+def load(path: str) -> Cell:
+    """Load a .rle or .cells file as a Cell"""
+    if os.path.getsize(path) == 0:
+        raise ValueError(f'{path} is empty')
+    # the map is closed once the last view of it is dropped, so a parse error
+    # holding views in its traceback cannot stop it closing
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    if path.lower().endswith('.cells'):
+        return _parse_cells(data)
+    return _parse_rle(data)
+
+
+def iter_load(paths) -> "iter":
+    """Load many pattern files one at a time, yielding a Cell for each"""
+    for path in paths:
+        yield load(path)
+
+
+def loads(text) -> Cell:
+    """Parse the text of an RLE or plaintext pattern, such as one pasted from the clipboard"""
+    data = text.encode() if isinstance(text, str) else bytes(text)
+    if _HEADER.search(data):
+        return _parse_rle(data)
+    return _parse_cells(data)
+
+
+def _lines(raw: npt.NDArray[np.uint8]) -> tuple:
+    """The start and end of every line in raw"""
+    ends = np.flatnonzero(raw == ord('\n'))
+    starts = np.concatenate(([0], ends + 1))
+    ends = np.concatenate((ends, [len(raw)]))
+    return starts, ends
+
+
+def _parse_rle(data) -> Cell:
+    raw = np.frombuffer(data, dtype=np.uint8)
+    starts, ends = _lines(raw)
+
+    # the comments and header come first, the body is everything after the header line
+    name = None
+    header = None
+    for start, end in zip(starts, ends):
+        line = bytes(data[start:end]).strip()
+        if line.startswith(b'#N'):
+            name = line[2:].strip().decode(errors='replace')
+        elif line and not line.startswith(b'#'):
+            header = _HEADER.match(line)
+            if header is None:
+                raise ValueError(f'bad RLE header: {line[:80]!r}')
+            body = raw[end:]
+            break
+    else:
+        raise ValueError('no RLE header')
+
+    width, height = int(header.group(1)), int(header.group(2))
+    rule = header.group(3).decode() if header.group(3) else None
+
+    # everything up to ! with the whitespace dropped
+    stop = np.flatnonzero(body == ord('!'))
+    body = body[:stop[0]] if len(stop) else body
+    body = body[body > ord(' ')]
+    grid = np.zeros((height, width), dtype=np.int8)
+    if len(body) == 0:
+        return Cell(grid, name=name, rule=rule)
+
+    # every tag with the run count written before it, 1 if there is none
+    digit = (body >= ord('0')) & (body <= ord('9'))
+    tags = np.flatnonzero(~digit)
+    states = _TAGS[body[tags]]
+    if (states == -2).any():
+        bad = bytes(body[tags[states == -2][:1]])
+        raise ValueError(f'unexpected {bad!r} in RLE body')
+    digits = np.flatnonzero(digit)
+    if len(digits) and digits[-1] > tags[-1]:
+        raise ValueError('RLE body ends in a run count')
+    owner = np.cumsum(~digit)[digits]
+    place = tags[owner] - digits - 1
+    if len(place) and place.max() >= len(_POWERS):
+        raise ValueError('RLE run count too long')
+    counts = np.zeros(len(tags), dtype=np.int64)
+    np.add.at(counts, owner, (body[digits] - ord('0')) * _POWERS[place])
+    counts[np.bincount(owner, minlength=len(tags)) == 0] = 1
+
+    # rows advance by the count of every $, columns by the runs since the last $
+    newline = states == -1
+    rows = np.cumsum(np.where(newline, counts, 0)) - np.where(newline, counts, 0)
+    runs = np.where(newline, 0, counts)
+    ends = np.cumsum(runs)
+    row_start = np.maximum.accumulate(np.where(newline, ends, 0))
+    cols = ends - runs - row_start
+
+    live = states > 0
+    rows, cols, runs, states = rows[live], cols[live], runs[live], states[live]
+    if len(rows) and (rows.max() >= height or (cols + runs).max() > width):
+        raise ValueError(f'RLE body does not fit in x = {width}, y = {height}')
+
+    # expand every live run into its cells at once
+    total = int(runs.sum())
+    first = np.repeat(rows * width + cols - np.cumsum(runs) + runs, runs)
+    grid.ravel()[first + np.arange(total)] = np.repeat(states, runs)
+    return Cell(grid, name=name, rule=rule)
+
+
+def _parse_cells(data) -> Cell:
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if len(raw) == 0:
+        return Cell(np.zeros((0, 0), dtype=np.int8))
+    starts, ends = _lines(raw)
+
+    name = None
+    comment = starts < len(raw)
+    comment[comment] = raw[starts[comment]] == ord('!')
+    for start, end in zip(starts[comment], ends[comment]):
+        line = bytes(data[start:end]).strip()
+        if line.startswith(b'!Name:'):
+            name = line[6:].strip().decode(errors='replace')
+
+    # drop carriage returns so lines of \r\n files measure the same as \n files
+    ends = ends - ((ends > starts) & (raw[np.maximum(ends - 1, 0)] == ord('\r')))
+    starts, ends = starts[~comment], ends[~comment]
+    while len(starts) and ends[-1] == starts[-1]:
+        starts, ends = starts[:-1], ends[:-1]
+
+    height = len(starts)
+    width = int((ends - starts).max()) if height else 0
+    grid = np.zeros((height, width), dtype=np.int8)
+    if height == 0:
+        return Cell(grid, name=name)
+
+    # the row and column of every byte of every pattern line
+    lengths = ends - starts
+    rows = np.repeat(np.arange(height), lengths)
+    offsets = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    chars = raw[np.repeat(starts, lengths) + offsets]
+    live = (chars == ord('O')) | (chars == ord('*'))
+    grid[rows[live], offsets[live]] = 1
+    return Cell(grid, name=name)
+
+
+############################################
+#
+#
+#   Writing
+#
+#
+############################################
+
+def dumps(grid: npt.NDArray[np.int8], name: str = None, rule: str = 'B3/S23') -> str:
+    """Encode a grid as RLE, using . and A to X when it has more than two states"""
+    height, width = grid.shape
+    header = f'x = {width}, y = {height}' + (f', rule = {rule}' if rule else '')
+    if grid.size == 0:
+        return '\n'.join(([f'#N {name}'] if name else []) + [header, '!']) + '\n'
+    multi = grid.max(initial=0) > 1
+    letters = np.frombuffer((b'.ABCDEFGHIJKLMNOPQRSTUVWX' if multi else b'bo'), dtype=np.uint8)
+
+    # runs of equal cells, broken at the end of every row
+    flat = grid.ravel()
+    edge = np.ones(flat.size, dtype=bool)
+    edge[1:] = flat[1:] != flat[:-1]
+    edge[::width] = True
+    starts = np.flatnonzero(edge)
+    lengths = np.diff(np.append(starts, flat.size))
+    states = flat[starts]
+    rows = starts // width
+
+    # the trailing dead run of a row is left out, the end of the row says it
+    trailing = (states == 0) & ((starts + lengths) % width == 0)
+    starts, lengths, states, rows = starts[~trailing], lengths[~trailing], states[~trailing], rows[~trailing]
+
+    tags = [chr(letter) for letter in letters]
+    skips = np.diff(rows, prepend=0).tolist()
+    tokens = []
+    for skip, length, state in zip(skips, lengths.tolist(), states.tolist()):
+        if skip:
+            tokens.append(f'{skip}$' if skip > 1 else '$')
+        tokens.append(f'{length}{tags[state]}' if length > 1 else tags[state])
+    tokens.append('!')
+
+    # RLE lines are kept under 70 characters
+    lines = []
+    line = ''
+    for token in tokens:
+        if len(line) + len(token) > 70:
+            lines.append(line)
+            line = ''
+        line += token
+    lines.append(line)
+
+    return '\n'.join(([f'#N {name}'] if name else []) + [header] + lines) + '\n'
+
+
+def dump(grid: npt.NDArray[np.int8], path: str, name: str = None, rule: str = 'B3/S23'):
+    """Write a grid snapshot to a .rle or .cells file"""
+    if path.lower().endswith('.cells'):
+        rows = np.where(grid > 0, ord('O'), ord('.')).astype(np.uint8)
+        body = b'\n'.join(bytes(row) for row in rows)
+        text = ((f'!Name: {name}\n' if name else '') + body.decode() + '\n')
+    else:
+        text = dumps(grid, name=name, rule=rule)
+    with open(path, 'w') as f:
+        f.write(text)
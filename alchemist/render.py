@@ -0,0 +1,121 @@
+import pyglet
+pyglet.options['debug_gl'] = False
+import numpy as np
+import numpy.typing as npt
+
+# Rendering grids
+
+# A grid is drawn as a single sprite over one persistent texture with one texel per cell.
+# Every frame the grid is compared with the states last uploaded, tile by tile,
+# and only the tiles that changed are coloured through the palette and uploaded.
+# The simulation array is only ever read: the tiles are coloured straight from views of it.
+
+# the colour of each cell state, as RGBA
+PALETTE = np.array([
+    [0, 0, 0, 255],         # empty
+    [255, 255, 255, 255],   # alive
+    [230, 60, 50, 255],
+    [250, 170, 40, 255],
+    [250, 230, 80, 255],
+    [90, 200, 90, 255],
+    [60, 140, 230, 255],
+    [150, 90, 220, 255],
+], dtype=np.uint8)
+
+
+def palette(colors) -> npt.NDArray[np.uint8]:
+    """Build a palette from RGB or RGBA tuples, one per state"""
+    table = np.full((len(colors), 4), 255, dtype=np.uint8)
+    for state, color in enumerate(colors):
+        table[state, :len(color)] = color
+    return table
+
+
+############################################
+#
+#
+#   GridRenderer: a grid as a texture
+#
+#
+############################################
+
+class GridRenderer():
+    """Draw a grid of cell states as a scaled sprite, uploading only what changed
+
+    Pass the pyglet Batch (and Group) the sprite should join, or call draw
+    yourself. update takes the grid to show; engines that already know
+    which tiles changed, such as the tiled engine, can pass their dirty
+    bitmap to skip the comparison, as long as it uses the same tile size
+    and the grid advanced a single generation since the last update.
+    When more than full_upload of the tiles changed, the rows spanning
+    them go up as one upload instead. Rule grids can hold more states than
+    the palette has colours; the states past the end of it cycle through
+    its live colours.
+    """
+    def __init__(self, shape: tuple, x: float = 0, y: float = 0, scale: float = 1,
+                 colors: npt.NDArray[np.uint8] = PALETTE, tile: int = 32, full_upload: float = 0.5,
+                 batch=None, group=None):
+        from pyglet.gl import GL_NEAREST
+
+        h, w = shape
+        self.shape = (h, w)
+        self.tile = tile
+        self.full_upload = full_upload
+        self.colors = np.asarray(colors, dtype=np.uint8)
+        # a colour for every byte a cell can hold, so no state indexes past the table
+        states = np.arange(256)
+        live = len(self.colors) - 1
+        if live > 0:
+            states = np.where(states < len(self.colors), states, 1 + (states - 1) % live)
+        self._lookup = self.colors[np.minimum(states, len(self.colors) - 1)]
+        self.tiles_shape = (-(-h // tile), -(-w // tile))
+        th, tw = self.tiles_shape
+
+        self.texture = pyglet.image.Texture.create(w, h, min_filter=GL_NEAREST, mag_filter=GL_NEAREST)
+        self.sprite = pyglet.sprite.Sprite(self.texture, x=x, y=y, batch=batch, group=group)
+        self.sprite.scale = scale
+
+        # the states in the texture, -1 until the first upload
+        self._shown = np.full((h, w), -1, dtype=np.int8)
+        self._uploaded = False
+        self._changed = np.zeros((th * tile, tw * tile), dtype=bool)
+        self.stats = {'tiles': th * tw, 'uploaded_tiles': 0}
+
+    def update(self, grid: npt.NDArray[np.int8], dirty: npt.NDArray[np.bool_] = None) -> int:
+        """Upload the tiles of the grid that changed since the last update, returning how many"""
+        h, w = self.shape
+        t = self.tile
+        th, tw = self.tiles_shape
+
+        if dirty is None or not self._uploaded:
+            np.not_equal(grid, self._shown, out=self._changed[:h, :w])
+            dirty = self._changed.reshape(th, t, tw, t).any(axis=(1, 3))
+        ti, tj = np.nonzero(dirty)
+        self._uploaded = True
+        self.stats['uploaded_tiles'] = len(ti)
+        if len(ti) == 0:
+            return 0
+
+        if len(ti) > self.full_upload * th * tw:
+            self._upload(grid, ti.min() * t, min((ti.max() + 1) * t, h), 0, w)
+        else:
+            for i, j in zip(ti.tolist(), tj.tolist()):
+                self._upload(grid, i * t, min((i + 1) * t, h), j * t, min((j + 1) * t, w))
+        return len(ti)
+
+    def _upload(self, grid: npt.NDArray[np.int8], r0: int, r1: int, c0: int, c1: int):
+        cells = grid[r0:r1, c0:c1]
+        rgba = self._lookup[cells.view(np.uint8)]
+        self._shown[r0:r1, c0:c1] = cells
+
+        # grid rows run top down, texture rows bottom up: a negative pitch says so
+        width = c1 - c0
+        image = pyglet.image.ImageData(width, r1 - r0, 'RGBA', rgba.tobytes(), pitch=-width * 4)
+        self.texture.blit_into(image, c0, self.shape[0] - r1, 0)
+
+    def draw(self):
+        self.sprite.draw()
+
+    def delete(self):
+        self.sprite.delete()
+        self.texture.delete()
@@ -0,0 +1,230 @@
+import re
+
+import numpy as np
+import numpy.typing as npt
+
+# Rules and elements
+
+# Every automaton in the alchemy system is a set of elements.
+# An element owns some micro states of a cell, weighs its states with a value,
+# and sums those values over a 3x3 kernel around each cell.
+# Its rules map a (micro state, neighbour sum) pair to the next micro state.
+# Compiling the elements gives one lookup table per element, so a generation
+# is a kernel sum and a table lookup over the whole grid no matter the element.
+
+# Life-like rules are single elements written as rulestrings:
+#   B3/S23      born with 3 neighbours, survives with 2 or 3 (Conway's Game of Life)
+#   B36/S23     HighLife
+#   23/3        the same rule as S/B
+#   B2/S/C3     Generations: dying cells pass through the extra states before they are empty
+
+
+MOORE = np.array([[1, 1, 1],
+                  [1, 0, 1],
+                  [1, 1, 1]], dtype=np.int16)
+
+LAPLACIAN = np.array([[1, 2, 1],
+                      [2, -12, 2],
+                      [1, 2, 1]], dtype=np.int16)
+
+KERNELS = {
+    'moore': MOORE,
+    'laplacian': LAPLACIAN,
+}
+
+
+_BS = re.compile(r'^B([0-8]*)/?S([0-8]*)(?:/?[CG]?(\d+))?$', re.IGNORECASE)
+_SB = re.compile(r'^([0-8]*)/([0-8]*)(?:/(\d+))?$')
+
+
+############################################
+#
+#
+#   Element: one kind of matter in a biome
+#
+#
+############################################
+
+class Element():
+    """A kind of cell with its own micro states, kernel and rules
+
+    micro_state_rules maps each micro state to a mapping of neighbour sum to
+    next micro state. Sums a state does not list lead to the empty state 0.
+    values gives the weight of each micro state in the neighbour sums of this
+    element; by default every state but the empty one weighs 1.
+    """
+    def __init__(self, name: str, micro_state_rules: dict, states: int = None, values: list = None,
+                 kernel='moore', symbol: str = '', color: str = ''):
+        self.name = name
+        self.symbol = symbol
+        self.color = color
+        self.micro_state_rules = micro_state_rules
+        self.states = states or max(max(micro_state_rules) + 1, 2)
+        self.values = np.array(values if values is not None else [0] + [1] * (self.states - 1), dtype=np.int16)
+        self.kernel = np.asarray(KERNELS[kernel] if isinstance(kernel, str) else kernel, dtype=np.int16)
+
+        if self.values.shape != (self.states,):
+            raise ValueError(f'{name} has {self.states} states but {len(self.values)} values')
+        if self.kernel.shape != (3, 3):
+            raise ValueError(f'{name} needs a 3x3 kernel, not {self.kernel.shape}')
+
+    def __repr__(self):
+        return f'Element({self.name!r}, states={self.states})'
+
+    @classmethod
+    def from_rulestring(cls, rulestring: str, name: str = None) -> "Element":
+        """Build a Life-like (or Generations) element from a rulestring such as B3/S23"""
+        text = rulestring.replace(' ', '')
+        match = _BS.match(text)
+        if match:
+            born, survive, states = match.groups()
+        else:
+            match = _SB.match(text)
+            if not match:
+                raise ValueError(f'not a rulestring: {rulestring!r}')
+            survive, born, states = match.groups()
+        states = int(states) if states else 2
+        if states < 2:
+            raise ValueError(f'a rule needs at least 2 states, not {states}')
+
+        # only live cells (micro state 1) count as neighbours; older states are dying
+        rules = {
+            0: {int(n): 1 for n in born},
+            1: {n: 1 if str(n) in survive else 2 % states for n in range(9)},
+        }
+        for state in range(2, states):
+            rules[state] = {n: (state + 1) % states for n in range(9)}
+        values = [0, 1] + [0] * (states - 2)
+        return cls(name or rulestring, rules, states=states, values=values)
+
+    def sum_range(self) -> tuple:
+        """The smallest and largest neighbour sum the kernel can produce"""
+        lo, hi = int(self.values.min()), int(self.values.max())
+        low = sum(min(k * lo, k * hi) for k in self.kernel.ravel())
+        high = sum(max(k * lo, k * hi) for k in self.kernel.ravel())
+        return low, high
+
+
+############################################
+#
+#
+#   Rule: elements compiled to lookup tables
+#
+#
+############################################
+
+class Rule():
+    """A compiled set of elements sharing one grid
+
+    The empty state is 0 and every element's other micro states follow in
+    order, so an element's micro state m > 0 is the grid state
+    offsets[element] + m. Each element gets a layer of:
+
+        values  the weight of every grid state in this element's sums
+        kernel  the 3x3 kernel those weights are summed over
+        low     the smallest possible sum, subtracted before the lookup
+        table   (states, sums) grid state -> next grid state, or -1 for
+                cells owned by another element
+
+    An empty cell is taken by the first element whose table gives it a
+    birth, so earlier elements win ties.
+    """
+    def __init__(self, elements: list):
+        self.elements = list(elements)
+        self.offsets = []
+        states = 1
+        for element in self.elements:
+            self.offsets.append(states - 1)
+            states += element.states - 1
+        if states > 127:
+            raise ValueError(f'{states} states do not fit an int8 grid')
+        self.states = states
+
+        self.layers = []
+        for element, offset in zip(self.elements, self.offsets):
+            owned = np.arange(offset + 1, offset + element.states)
+
+            values = np.zeros(states, dtype=np.int16)
+            values[owned] = element.values[1:]
+            values[0] = element.values[0]
+
+            low, high = element.sum_range()
+            table = np.full((states, high - low + 1), -1, dtype=np.int8)
+            table[0] = 0
+            table[owned] = 0
+            for micro, sums in element.micro_state_rules.items():
+                state = 0 if micro == 0 else offset + micro
+                for total, nxt in sums.items():
+                    if low <= total <= high:
+                        table[state, total - low] = 0 if nxt == 0 else offset + nxt
+            self.layers.append((values, element.kernel, low, table))
+
+    def __repr__(self):
+        return f'Rule({self.elements})'
+
+    @classmethod
+    def from_string(cls, rulestring: str) -> "Rule":
+        return cls([Element.from_rulestring(rulestring)])
+
+
+def compile_rule(rule) -> Rule:
+    """Compile a rulestring, an element, or a list of elements, passing Rules through"""
+    if isinstance(rule, Rule):
+        return rule
+    if isinstance(rule, str):
+        return Rule.from_string(rule)
+    if isinstance(rule, Element):
+        return Rule([rule])
+    return Rule(rule)
+
+
+class RuleStepper():
+    """Applies a compiled rule to a grid of one shape, with buffers allocated once"""
+    def __init__(self, rule: Rule, shape: tuple):
+        self.rule = rule
+        h, w = shape
+        self._weights = np.zeros((h + 2, w + 2), dtype=np.int16)
+        self._sums = np.zeros((h, w), dtype=np.int16)
+        self._term = np.zeros((h, w), dtype=np.int16)
+        self._index = np.zeros((h, w), dtype=np.intp)
+        self._next = np.zeros((h, w), dtype=np.int8)
+        self._other = np.zeros((h, w), dtype=np.int8)
+        self._take = np.zeros((h, w), dtype=bool)
+        self._born = np.zeros((h, w), dtype=bool)
+
+    def step(self, grid: npt.NDArray[np.int8]) -> npt.NDArray[np.int8]:
+        """Advance the grid in place by one generation"""
+        h, w = grid.shape
+        nxt = self._next
+        for i, (values, kernel, low, table) in enumerate(self.rule.layers):
+            out = nxt if i == 0 else self._other
+
+            # the weighted neighbour sum of every cell, offset so the smallest is 0
+            np.take(values, grid, out=self._weights[1:-1, 1:-1])
+            self._sums[...] = -low
+            for (di, dj), k in np.ndenumerate(kernel):
+                if k == 0:
+                    continue
+                view = self._weights[di:di + h, dj:dj + w]
+                if k == 1:
+                    np.add(self._sums, view, out=self._sums)
+                else:
+                    np.multiply(view, k, out=self._term)
+                    np.add(self._sums, self._term, out=self._sums)
+
+            # the table lookup, with (state, sum) flattened to one index
+            np.multiply(grid, table.shape[1], out=self._index)
+            np.add(self._index, self._sums, out=self._index)
+            np.take(table, self._index, out=out)
+
+            if i > 0:
+                # owned cells take their owner's answer, empty cells the first birth
+                np.equal(nxt, 0, out=self._take)
+                np.greater(out, 0, out=self._born)
+                np.logical_and(self._take, self._born, out=self._born)
+                np.equal(nxt, -1, out=self._take)
+                np.logical_or(self._take, self._born, out=self._take)
+                np.copyto(nxt, out, where=self._take)
+
+        grid[...] = nxt
+        return grid
@@ -0,0 +1,290 @@
+import numpy as np
+import numpy.typing as npt
+
+from . import esper
+
+# Entities on the grid
+
+# An entity with a GridPosition sits on a cell of a biome grid, and covers the square of
+# cells within radius of it. The SpatialHash files every such entity in a bucket of
+# bucket x bucket cells (a dict of sets, so empty space costs nothing) and keeps its
+# row, column and radius in flat arrays, so questions about the cells under many entities
+# are answered with one gather from the grid rather than a loop over entities:
+#   counts(grid)             live cells under each entity
+#   overlapping(grid)        the entities standing on a live cell
+#   cells_under(grid, e)     the live cells one entity covers
+#   entities_in(dirty, t)    the entities in the changed tiles of a TiledEngine
+#   query(r0, c0, r1, c1)    the entities in a rectangle, from the buckets it spans
+# None of them touch more of the grid than the entities cover, so they cost the same
+# on a small biome as on a huge one.
+#
+# The SpatialProcessor keeps the hash in step with the World without rescanning it:
+# a filed GridPosition reports its entity to the processor whenever it is changed, so
+# a process refiles only the entities that moved. Entities gaining or losing a
+# GridPosition rebuild the World's cached GridPosition query, so the positions are
+# only walked again, to file the new entities and drop the gone ones, on those frames.
+
+
+class GridPosition:
+    """The cell an entity sits on, and how many cells around it it covers
+
+    A GridPosition belongs to one entity. Once a SpatialProcessor has filed it,
+    setting row, col or radius marks the entity to be refiled on the next process.
+    """
+    __slots__ = ('_row', '_col', '_radius', '_entity', '_moved')
+
+    def __init__(self, row: int = 0, col: int = 0, radius: int = 0):
+        self._row = row
+        self._col = col
+        self._radius = radius
+        self._entity = None
+        self._moved = None
+
+    def __repr__(self):
+        return f'GridPosition(row={self._row}, col={self._col}, radius={self._radius})'
+
+    def _watch(self, entity: int, moved):
+        """Report changes to this position by adding entity to the set moved, or stop if it is None"""
+        self._entity = entity
+        self._moved = moved
+
+    def _changed(self):
+        if self._moved is not None:
+            self._moved.add(self._entity)
+
+    @property
+    def row(self) -> int:
+        return self._row
+
+    @row.setter
+    def row(self, value: int):
+        self._row = value
+        self._changed()
+
+    @property
+    def col(self) -> int:
+        return self._col
+
+    @col.setter
+    def col(self, value: int):
+        self._col = value
+        self._changed()
+
+    @property
+    def radius(self) -> int:
+        return self._radius
+
+    @radius.setter
+    def radius(self, value: int):
+        self._radius = value
+        self._changed()
+
+
+############################################
+#
+#
+#   SpatialHash: entities bucketed by cell
+#
+#
+############################################
+
+class SpatialHash():
+    """A uniform grid of buckets over entity positions, updated one move at a time"""
+    def __init__(self, bucket: int = 16):
+        self.bucket = bucket
+        self.buckets = {}
+
+        # one slot per entity in flat arrays, kept packed by moving the last slot into a freed one
+        self.count = 0
+        self.entities = np.zeros(64, dtype=np.int64)
+        self.rows = np.zeros(64, dtype=np.int64)
+        self.cols = np.zeros(64, dtype=np.int64)
+        self.radii = np.zeros(64, dtype=np.int64)
+        self._slots = {}
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, entity: int) -> bool:
+        return entity in self._slots
+
+    def _key(self, row: int, col: int) -> tuple:
+        return (row // self.bucket, col // self.bucket)
+
+    def insert(self, entity: int, row: int, col: int, radius: int = 0):
+        if entity in self._slots:
+            self.move(entity, row, col, radius)
+            return
+        if self.count == len(self.entities):
+            for name in ('entities', 'rows', 'cols', 'radii'):
+                setattr(self, name, np.resize(getattr(self, name), 2 * self.count))
+        slot = self.count
+        self.entities[slot] = entity
+        self.rows[slot] = row
+        self.cols[slot] = col
+        self.radii[slot] = radius
+        self._slots[entity] = slot
+        self.count += 1
+        self.buckets.setdefault(self._key(row, col), set()).add(entity)
+
+    def move(self, entity: int, row: int, col: int, radius: int = None):
+        """Refile an entity, touching its buckets only when it crossed into another"""
+        slot = self._slots[entity]
+        old = self._key(int(self.rows[slot]), int(self.cols[slot]))
+        new = self._key(row, col)
+        if old != new:
+            self._discard(old, entity)
+            self.buckets.setdefault(new, set()).add(entity)
+        self.rows[slot] = row
+        self.cols[slot] = col
+        if radius is not None:
+            self.radii[slot] = radius
+
+    def remove(self, entity: int):
+        slot = self._slots.pop(entity)
+        self._discard(self._key(int(self.rows[slot]), int(self.cols[slot])), entity)
+        last = self.count - 1
+        if slot != last:
+            moved = int(self.entities[last])
+            for array in (self.entities, self.rows, self.cols, self.radii):
+                array[slot] = array[last]
+            self._slots[moved] = slot
+        self.count = last
+
+    def _discard(self, key: tuple, entity: int):
+        members = self.buckets[key]
+        members.discard(entity)
+        if not members:
+            del self.buckets[key]
+
+    def position(self, entity: int) -> tuple:
+        slot = self._slots[entity]
+        return int(self.rows[slot]), int(self.cols[slot]), int(self.radii[slot])
+
+    def _select(self, entities) -> npt.NDArray[np.int64]:
+        if entities is None:
+            return np.arange(self.count)
+        return np.fromiter((self._slots[e] for e in entities), dtype=np.int64)
+
+    ########################################
+    #   Queries
+    ########################################
+
+    def query(self, r0: int, c0: int, r1: int, c1: int) -> list:
+        """The entities on cells r0 <= row < r1, c0 <= col < c1"""
+        b = self.bucket
+        found = []
+        for i in range(r0 // b, (r1 - 1) // b + 1):
+            for j in range(c0 // b, (c1 - 1) // b + 1):
+                members = self.buckets.get((i, j))
+                if members is None:
+                    continue
+                for entity in members:
+                    slot = self._slots[entity]
+                    if r0 <= self.rows[slot] < r1 and c0 <= self.cols[slot] < c1:
+                        found.append(entity)
+        return found
+
+    def entities_in(self, dirty: npt.NDArray[np.bool_], tile: int = 1) -> npt.NDArray[np.int64]:
+        """The entities on cells whose tile is set in dirty, such as TiledEngine.dirty"""
+        rows = self.rows[:self.count] // tile
+        cols = self.cols[:self.count] // tile
+        inside = (rows >= 0) & (rows < dirty.shape[0]) & (cols >= 0) & (cols < dirty.shape[1])
+        hit = np.zeros(self.count, dtype=bool)
+        hit[inside] = dirty[rows[inside], cols[inside]]
+        return self.entities[:self.count][hit]
+
+    def counts(self, grid: npt.NDArray[np.int8], entities=None) -> npt.NDArray[np.int64]:
+        """The live cells under each entity, in the order of entities (default: all, in slot order)
+
+        Entities of the same radius are counted together, by gathering the
+        square each covers out of the grid in one fancy index. Cells off the
+        edge of the grid count as dead.
+        """
+        slots = self._select(entities)
+        counts = np.zeros(len(slots), dtype=np.int64)
+        h, w = grid.shape
+        radii = self.radii[slots]
+        for radius in np.unique(radii).tolist():
+            group = np.flatnonzero(radii == radius)
+            offsets = np.arange(-radius, radius + 1)
+            rows = self.rows[slots[group]][:, None, None] + offsets[None, :, None]
+            cols = self.cols[slots[group]][:, None, None] + offsets[None, None, :]
+            inside = (rows >= 0) & (rows < h) & (cols >= 0) & (cols < w)
+            live = grid[np.clip(rows, 0, h - 1), np.clip(cols, 0, w - 1)] > 0
+            counts[group] = (live & inside).sum(axis=(1, 2))
+        return counts
+
+    def overlapping(self, grid: npt.NDArray[np.int8]) -> npt.NDArray[np.int64]:
+        """The entities covering at least one live cell"""
+        return self.entities[:self.count][self.counts(grid) > 0]
+
+    def cells_under(self, grid: npt.NDArray[np.int8], entity: int) -> npt.NDArray[np.int64]:
+        """The (row, col) of every live cell an entity covers"""
+        row, col, radius = self.position(entity)
+        r0, c0 = max(row - radius, 0), max(col - radius, 0)
+        window = grid[r0:max(row + radius + 1, 0), c0:max(col + radius + 1, 0)]
+        return np.argwhere(window > 0) + (r0, c0)
+
+
+############################################
+#
+#
+#   SpatialProcessor: keeps the hash in step
+#
+#
+############################################
+
+class SpatialProcessor(esper.Processor):
+    """Refile the entities whose GridPosition changed since the last process
+
+    The processor writes its index, so Processors that query it should declare
+    SpatialHash in their reads to run in a later stage rather than alongside it.
+    """
+    reads = (GridPosition,)
+    writes = (SpatialHash,)
+
+    def __init__(self, bucket: int = 16):
+        self.index = SpatialHash(bucket)
+        self._moved = set()
+        self._filed = {}
+        self._positions = None
+
+    def process(self, *args, **kwargs):
+        # the World hands back the same cached list until an entity gains, loses or replaces a GridPosition
+        positions = self.world.get_component(GridPosition)
+        if positions is not self._positions:
+            self._refile(positions)
+            self._positions = positions
+
+        index = self.index
+        filed = self._filed
+        for entity in self._moved:
+            position = filed.get(entity)
+            if position is not None:
+                index.insert(entity, position.row, position.col, position.radius)
+        self._moved.clear()
+
+    def _refile(self, positions: list):
+        """Watch the new positions and drop the entities that no longer have one"""
+        filed = self._filed
+        current = {}
+        for entity, position in positions:
+            current[entity] = position
+            old = filed.pop(entity, None)
+            if old is not position:
+                if old is not None:
+                    self._forget(entity, old)
+                position._watch(entity, self._moved)
+                self._moved.add(entity)
+
+        # whatever is left was deleted or lost its GridPosition
+        for entity, position in filed.items():
+            self._forget(entity, position)
+            self.index.remove(entity)
+        self._filed = current
+
+    def _forget(self, entity: int, position: GridPosition):
+        # unless it has since been given to another entity
+        if position._entity == entity and position._moved is self._moved:
+            position._watch(None, None)
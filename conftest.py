@@ -0,0 +1 @@
+# lets pytest import the alchemist package from the root of the checkout
@@ -1,30 +1,32 @@
 ## Alchemist: a 2D game with a sophisticated chemistry engine
 
 ## import modules
-import os
 import pyglet
 from pyglet import app
 from pyglet.window import Window
 from alchemist import Biome
 from alchemist import Cell
 import alchemist as alch
+from alchemist.assets import AtlasLoader
 
 
 
 ## create main window
 
 def main():
+    # decode (or reload) the sprites and tiles while the window opens
+    loader = AtlasLoader(["player_sprites", "Tiles"])
+    loader.start()
+
     window = Window(1280, 780, caption="Alchemist")
     batch = pyglet.graphics.Batch()
+    atlas = loader.atlas()
 
-    lil_dude = pyglet.resource.image("assets/player_sprites/LIL_DUDE.png")
+    lil_dude = atlas["player_sprites/LIL_DUDE"]
     lil_dude.anchor_x = lil_dude.width // 2
     lil_dude.anchor_y = lil_dude.height // 2
 
-    walk = []
-    for spr in os.listdir("assets/player_sprites/walk"):
-        if spr.endswith(".png"):
-            walk.append(pyglet.resource.image("assets/player_sprites/walk/" + spr))
+    walk = atlas.sequence("player_sprites/walk")
     walk_animation = pyglet.image.Animation.from_image_sequence(walk, 0.1, True)
     sprite = pyglet.sprite.Sprite(walk_animation, x=500, y=500, batch=batch)
 
@@ -0,0 +1,35 @@
+import numpy as np
+
+from alchemist import ConnwaysGameOfLife
+
+GLIDER = np.array([[0, 1, 0],
+                   [0, 0, 1],
+                   [1, 1, 1]], dtype=np.int8)
+R_PENTOMINO = np.array([[0, 1, 1],
+                        [1, 1, 0],
+                        [0, 1, 0]], dtype=np.int8)
+
+
+def soup(shape, seed, density=0.35):
+    """A seeded random grid"""
+    return (np.random.default_rng(seed).random(shape) < density).astype(np.int8)
+
+
+def centred(size, pattern):
+    """A size x size grid with the pattern in its middle"""
+    grid = np.zeros((size, size), dtype=np.int8)
+    h, w = pattern.shape
+    grid[(size - h) // 2:(size - h) // 2 + h, (size - w) // 2:(size - w) // 2 + w] = pattern
+    return grid
+
+
+def reference(grid, generations):
+    """The grid after generations, stepped by the vectorized engine"""
+    life = ConnwaysGameOfLife(grid.copy())
+    life.run(generations)
+    return life.grid
+
+
+def assert_unbounded(grid):
+    # the bounded reference only stands for an unbounded world while nothing reaches its edge
+    assert not (grid[0].any() or grid[-1].any() or grid[:, 0].any() or grid[:, -1].any())
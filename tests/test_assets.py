@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pytest
+
+pyglet = pytest.importorskip('pyglet')
+pyglet.options['headless'] = True
+
+from alchemist.assets import Atlas, AtlasLoader, _files, pack  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets')
+
+
+def test_lost_cache_race_leaves_no_partial(tmp_path):
+    loader = AtlasLoader(['Tiles'], root=ROOT, cache=str(tmp_path))
+    # another process got there first, with a folder the rename cannot replace
+    folder = tmp_path / loader.key(_files(ROOT, ['Tiles']))
+    folder.mkdir()
+    (folder / 'other').write_text('')
+    pixels, manifest = loader._load()
+    assert len(manifest['regions']) == len(os.listdir(os.path.join(ROOT, 'Tiles')))
+    assert sorted(os.listdir(tmp_path)) == [folder.name]
+
+
+def test_pack_places_every_rectangle_apart():
+    sizes = [(30, 12), (5, 40), (64, 3), (17, 17), (1, 1), (200, 9)] * 4
+    places, (width, height) = pack(sizes, width=100, padding=1)
+    # the width grows to fit the widest rectangle but is not rounded, the height is
+    assert width == 202
+    assert height == 1 << (height - 1).bit_length()
+    covered = np.zeros((height, width), dtype=np.int8)
+    for (x, y), (w, h) in zip(places, sizes):
+        covered[y - 1:y + h + 1, x - 1:x + w + 1] += 1
+    assert covered.max() == 1
+
+
+def test_atlas_texture_is_nearest_filtered():
+    from ctypes import byref
+    from pyglet.gl import GL_NEAREST, GL_TEXTURE_MAG_FILTER, GL_TEXTURE_MIN_FILTER, GLint, glBindTexture, glGetTexParameteriv
+
+    pixels = np.zeros((4, 8, 4), dtype=np.uint8)
+    pixels[0, 0] = (255, 0, 0, 255)
+    pixels[3, 7] = (0, 0, 255, 255)
+    try:
+        atlas = Atlas(pixels, {'regions': {'corner': (6, 2, 2, 2)}})
+    except Exception as error:  # no GL context to upload to
+        pytest.skip(f'cannot create a texture: {error}')
+    # ask GL, not the texture object, which keeps whatever is assigned to it
+    texture = atlas.texture
+    glBindTexture(texture.target, texture.id)
+    for parameter in (GL_TEXTURE_MIN_FILTER, GL_TEXTURE_MAG_FILTER):
+        value = GLint()
+        glGetTexParameteriv(texture.target, parameter, byref(value))
+        assert value.value == GL_NEAREST
+    # the texture holds the pixels, top row first
+    data = atlas.texture.get_image_data().get_data('RGBA', -8 * 4)
+    assert np.array_equal(np.frombuffer(data, dtype=np.uint8).reshape(4, 8, 4), pixels)
+    assert atlas.uvs['corner'] == (0.75, 0.0, 1.0, 0.5)
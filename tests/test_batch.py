@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from alchemist import BiomeBatch, ConnwaysGameOfLife
+
+from grids import soup
+
+SHAPE = (20, 24)
+
+
+def stepped(grid, generations, rule='B3/S23'):
+    life = ConnwaysGameOfLife(grid.copy(), engine='rule', rule=rule)
+    life.run(generations)
+    return life.grid
+
+
+def test_batch_matches_biomes_stepped_alone():
+    grids = [soup(SHAPE, seed) for seed in range(5)]
+    rules = ['B3/S23', 'B36/S23', 'B3/S23', 'B2/S', '23/36']
+    batch = BiomeBatch(SHAPE, block_size=2)
+    ids = [batch.add(grid, rule=rule) for grid, rule in zip(grids, rules)]
+    assert len(batch) == 5 and sorted(batch) == sorted(ids)
+    batch.run(9)
+    for biome, grid, rule in zip(ids, grids, rules):
+        assert np.array_equal(batch.grid(biome), stepped(grid, 9, rule))
+
+
+def test_pause_remove_and_add():
+    grids = [soup(SHAPE, seed) for seed in range(4)]
+    batch = BiomeBatch(SHAPE, block_size=2)
+    ids = [batch.add(grid) for grid in grids]
+    batch.run(3)
+
+    # a paused biome keeps its cells, then picks up where it stopped
+    batch.pause(ids[1])
+    batch.run(4)
+    assert np.array_equal(batch.grid(ids[1]), stepped(grids[1], 3))
+    batch.pause(ids[1], False)
+
+    # a removed biome's slot goes to the next one added, which starts from its own grid
+    batch.remove(ids[2])
+    with pytest.raises(KeyError):
+        batch.grid(ids[2])
+    fresh = soup(SHAPE, seed=10)
+    added = batch.add(fresh)
+    assert added == ids[2]
+
+    batch.run(5)
+    assert np.array_equal(batch.grid(ids[0]), stepped(grids[0], 12))
+    assert np.array_equal(batch.grid(ids[1]), stepped(grids[1], 8))
+    assert np.array_equal(batch.grid(ids[3]), stepped(grids[3], 12))
+    assert np.array_equal(batch.grid(added), stepped(fresh, 5))
+
+
+def test_set_rule():
+    grid = soup(SHAPE, seed=3)
+    batch = BiomeBatch(SHAPE)
+    biome = batch.add(grid)
+    batch.run(2)
+    batch.set_rule(biome, 'B36/S23')
+    batch.run(3)
+    assert np.array_equal(batch.grid(biome), stepped(stepped(grid, 2), 3, 'B36/S23'))
+
+
+def test_only_two_state_rules():
+    batch = BiomeBatch(SHAPE)
+    with pytest.raises(ValueError):
+        batch.add(np.zeros(SHAPE, dtype=np.int8), rule='B2/S/C3')
+    with pytest.raises(ValueError):
+        batch.add(np.zeros((3, 3), dtype=np.int8))
+    assert len(batch) == 0
@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+import pytest
+
+from alchemist import bench, loads
+
+
+def report(results: dict) -> dict:
+    return {'meta': {'seed': 0}, 'results': results}
+
+
+def test_compare_flags_only_real_slowdowns():
+    baseline = report({
+        'engine/vectorized/gun/128': {'generations_per_s': 1000.0, 'cells_per_s': 16384000.0},
+        'stamp/apply': {'stamps_per_s': 200.0},
+        'esper/create_entity': {'entities_per_s': 0.0},
+        'gone': {'frames_per_s': 10.0},
+    })
+    current = report({
+        'engine/vectorized/gun/128': {'generations_per_s': 850.0, 'cells_per_s': 16384000.0 * 0.95},
+        'stamp/apply': {'stamps_per_s': 400.0},
+        'esper/create_entity': {'entities_per_s': 5.0},
+        'new': {'frames_per_s': 1.0},
+    })
+    rows = bench.compare(current, baseline, tolerance=0.1)
+    # benchmarks missing from either run, and zero baselines, are not compared
+    assert [(name, metric) for name, metric, _, _ in rows] == [
+        ('engine/vectorized/gun/128', 'generations_per_s'),
+        ('engine/vectorized/gun/128', 'cells_per_s'),
+        ('stamp/apply', 'stamps_per_s'),
+    ]
+    assert [pytest.approx(ratio) for _, _, ratio, _ in rows] == [0.85, 0.95, 2.0]
+    assert [regressed for *_, regressed in rows] == [True, False, False]
+    assert not any(regressed for *_, regressed in bench.compare(current, baseline, tolerance=0.2))
+
+
+def test_main_writes_json_and_fails_on_regression(monkeypatch, tmp_path, capsys):
+    results = {'stamp/apply': {'stamps_per_s': 100.0}, 'esper/process-churn': {'frames_per_s': 50.0}}
+    calls = []
+
+    def run_all(quick, repeats, seed):
+        calls.append((quick, repeats, seed))
+        return report(results)
+
+    monkeypatch.setattr(bench, 'run_all', run_all)
+    out = tmp_path / 'results.json'
+    assert bench.main(['--quick', '--repeats', '1', '--seed', '4', '--out', str(out)]) == 0
+    assert calls == [(True, 1, 4)]
+    assert json.loads(out.read_text()) == report(results)
+    assert 'stamp/apply' in capsys.readouterr().out
+
+    # the same numbers pass against themselves
+    assert bench.main(['--baseline', str(out)]) == 0
+    assert '0 regressed' in capsys.readouterr().out
+
+    # a baseline twice as fast at stamping is a regression
+    faster = tmp_path / 'faster.json'
+    faster.write_text(json.dumps(report({**results, 'stamp/apply': {'stamps_per_s': 200.0}})))
+    assert bench.main(['--baseline', str(faster)]) == 1
+    printed = capsys.readouterr().out
+    assert '1 regressed' in printed and 'stamp/apply stamps_per_s: 0.50x' in printed
+    assert bench.main(['--baseline', str(faster), '--tolerance', '0.6']) == 0
+
+
+def test_seeds_are_reproducible():
+    first = bench.seeds(64, np.random.default_rng(3))
+    second = bench.seeds(64, np.random.default_rng(3))
+    assert sorted(first) == ['gun', 'r-pentomino', 'soup-0.1', 'soup-0.3', 'soup-0.5']
+    assert all(np.array_equal(first[name], second[name]) for name in first)
+    assert first['gun'].sum() == loads(bench.GLIDER_GUN).grid.sum() == 36
+    assert abs(first['soup-0.3'].mean() - 0.3) < 0.05
+
+
+def test_benchmarks_report_every_metric(monkeypatch):
+    # small and few, to check what is reported rather than how fast it is
+    monkeypatch.setattr(bench, 'ENGINES', {'vectorized': None, 'rule': None, 'legacy': None})
+    monkeypatch.setattr(bench, 'MAX_SIZE', {'rule': 40})
+    monkeypatch.setattr(bench, 'LEGACY', ('soup-0.3', 40, 1))
+    results = bench.bench_engines((40, 48), repeats=1, seed=0)
+    # engine/<engine>/<seed>/<size>, with rule past its largest size and legacy on one soup left out
+    timed = {(name.split('/')[1], name.split('/')[3]) for name in results}
+    assert timed == {('vectorized', '40'), ('vectorized', '48'), ('rule', '40'), ('legacy', '40')}
+    assert len(results) == 5 + 5 + 5 + 1
+
+    results.update(bench.bench_stamping(repeats=1, seed=0, count=50, size=64))
+    results.update(bench.bench_esper(repeats=1, seed=0, entities=50, frames=2, churn=5))
+    assert {'stamp/apply', 'stamp/batched', 'stamp/batched-or',
+            'esper/create_entity', 'esper/get_components', 'esper/process-churn'} <= set(results)
+    assert all(value > 0 for metrics in results.values() for value in metrics.values())
+    json.dumps(report(results))
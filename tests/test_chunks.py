@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from alchemist import ChunkedWorld, ConnwaysGameOfLife
+
+from grids import GLIDER, soup, centred, assert_unbounded
+
+
+def test_chunked_world_matches_vectorized(tmp_path):
+    size = 256
+    grid = centred(size, soup((48, 48), seed=1))
+    grid[20:23, 20:23] = GLIDER
+    expected = ConnwaysGameOfLife(grid.copy())
+    with ChunkedWorld(chunk=16, spill=str(tmp_path)) as world:
+        world.paste(grid, -size // 2, -size // 2)
+        for _ in range(4):
+            world.run(20)
+            expected.run(20)
+            assert_unbounded(expected.grid)
+            assert np.array_equal(world.cut(-size // 2, -size // 2, size, size), expected.grid)
+            assert world.population == int(expected.grid.sum())
+
+
+def test_chunks_follow_what_is_alive():
+    # a glider crosses many chunks, but only the few around it exist at any time
+    with ChunkedWorld(chunk=16) as world:
+        world.paste(GLIDER, 0, 0)
+        world.run(4000)
+        assert world.population == GLIDER.sum()
+        assert np.array_equal(world.cut(1000, 1000, 3, 3), GLIDER)
+        assert len(world.chunks) <= 4
+
+
+def test_chunked_world_spills_and_wakes(tmp_path):
+    # still lifes far from the focus are spilled, and read back unchanged
+    block = np.ones((2, 2), dtype=np.int8)
+    with ChunkedWorld(chunk=16, budget=16 * 16 * 3, keep=1, spill=str(tmp_path)) as world:
+        for i in range(1, 11):
+            world.paste(block, 5, i * 100 + 5)
+        world.run(4)
+        assert world.stats['spills'] and world.population == 40
+        world.move_focus(5, 505)
+        assert world.stats['loads']
+        assert np.array_equal(world.cut(4, 504, 4, 4), np.pad(block, 1))
+        world.run(4)
+        assert world.population == 40
+
+
+def test_birth_on_empty_cells_is_rejected():
+    with pytest.raises(ValueError):
+        ChunkedWorld(rule='B0/S8')
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from alchemist import ConnwaysGameOfLife, CycleDetector
+
+
+def test_colliding_cells_hash_apart():
+    # one live cell at (3, 7) and one at (4, 31) collided under the old linear hash
+    a = np.zeros((64, 64), dtype=np.int8)
+    b = np.zeros((64, 64), dtype=np.int8)
+    a[3, 7] = 1
+    b[4, 31] = 1
+    cycles = CycleDetector(a.shape)
+    assert cycles.hash(a)[0] != cycles.hash(b)[0]
+    assert (cycles.hash(a)[1] != cycles.hash(b)[1]).any()
+
+
+def seeded(name: str) -> np.ndarray:
+    grid = np.zeros((48, 48), dtype=np.int8)
+    if name == 'blinker':
+        grid[10, 10:13] = 1
+    elif name == 'glider':
+        grid[1:4, 1:4] = [[0, 1, 0], [0, 0, 1], [1, 1, 1]]
+    else:
+        grid[:] = np.random.default_rng(int(name[5:])).random(grid.shape) < 0.3
+    return grid
+
+
+@pytest.mark.parametrize('name', ['blinker', 'glider', 'soup-0', 'soup-1', 'soup-2'])
+def test_skipping_periods_matches_stepping(name):
+    plain = ConnwaysGameOfLife(seeded(name))
+    detected = ConnwaysGameOfLife(seeded(name))
+    detected.detect_cycles(window=256, tile=16)
+    for generations in (1, 7, 300, 1000):
+        plain.run(generations)
+        detected.run(generations)
+        assert np.array_equal(plain.grid, detected.grid)
+
+
+def test_false_candidate_is_not_skipped():
+    life = ConnwaysGameOfLife(seeded('glider'))
+    cycles = life.detect_cycles()
+    life.run(1)
+    # pretend the digests collided: a glider still crossing the grid has no period 1
+    cycles.period = 1
+    plain = ConnwaysGameOfLife(seeded('glider'))
+    plain.run(11)
+    life.run(10)
+    assert np.array_equal(plain.grid, life.grid)
+    assert not cycles.confirmed
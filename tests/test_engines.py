@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from alchemist import ConnwaysGameOfLife
+
+from grids import GLIDER, soup, reference
+
+
+def test_blinker_oscillates():
+    grid = np.zeros((5, 5), dtype=np.int8)
+    grid[2, 1:4] = 1
+    life = ConnwaysGameOfLife(grid.copy())
+    life.run(1)
+    assert np.array_equal(np.argwhere(life.grid), [[1, 2], [2, 2], [3, 2]])
+    life.run(1)
+    assert np.array_equal(life.grid, grid)
+    assert life.generation == 2
+
+
+def test_glider_moves_one_cell_every_four_generations():
+    grid = np.zeros((12, 12), dtype=np.int8)
+    grid[1:4, 1:4] = GLIDER
+    life = ConnwaysGameOfLife(grid)
+    life.run(8)
+    assert np.array_equal(life.grid[3:6, 3:6], GLIDER)
+    assert life.grid.sum() == GLIDER.sum()
+
+
+def test_cells_past_the_edge_are_dead():
+    # a block in the corner stays, it does not wrap round to the far side
+    grid = np.zeros((6, 6), dtype=np.int8)
+    grid[:2, :2] = 1
+    assert np.array_equal(reference(grid, 5), grid)
+
+
+@pytest.mark.parametrize('shape', [(12, 14), (9, 6)])
+def test_legacy_matches_vectorized(shape):
+    grid = soup(shape, seed=3)
+    legacy = ConnwaysGameOfLife(grid.copy(), engine='legacy')
+    legacy.run(3)
+    assert np.array_equal(legacy.grid, reference(grid, 3))
@@ -0,0 +1,406 @@
+import random
+
+import numpy as np
+import pytest
+
+from alchemist import esper
+
+
+class Body(esper.Column):
+    fields = {'x': 'f8', 'y': 'f8'}
+
+
+class Ball(Body):
+    pass
+
+
+def test_column_added_with_type_alias():
+    world = esper.World()
+    ball = Ball(x=1.0, y=2.0)
+    entity = world.create_entity()
+    world.add_component(entity, ball, type_alias=Body)
+    assert ball.x == 1.0 and ball.y == 2.0
+    ball.x = 5.0
+    assert world.component_for_entity(entity, Body) is ball
+    [(entities, (bodies,))] = world.get_columns(Body)
+    assert list(entities) == [entity]
+    assert np.array_equal(bodies.x, [5.0])
+
+    # the values stay with the instance once it leaves the world
+    world.remove_component(entity, Body)
+    assert ball.x == 5.0 and ball.y == 2.0
+
+
+class Listener:
+    def __init__(self):
+        self.batches = []
+
+    def on_hit(self, events):
+        self.batches.append(events)
+
+
+def test_remove_batch_handler():
+    batches = []
+
+    def on_hit(events):
+        batches.append(events)
+
+    listener = Listener()
+    esper.set_batch_handler('hit', on_hit)
+    esper.set_batch_handler('hit', listener.on_hit)
+    esper.queue_event('hit', 1)
+    esper.flush_events()
+    assert batches == [[(1,)]] and listener.batches == [[(1,)]]
+
+    esper.remove_batch_handler('hit', on_hit)
+    esper.remove_batch_handler('hit', listener.on_hit)
+    assert 'hit' not in esper.batch_registry
+    esper.queue_event('hit', 2)
+    esper.flush_events()
+    assert batches == [[(1,)]] and listener.batches == [[(1,)]]
+
+
+class A:
+    pass
+
+
+class B:
+    pass
+
+
+class C:
+    pass
+
+
+class D:
+    pass
+
+
+QUERIES = [(A,), (B,), (A, B), (B, C), (A, B, C), (D,), (C, A)]
+
+
+class Model:
+    """What a World should hold, as plain dicts: the components of every entity that has any"""
+
+    def __init__(self):
+        self.entities = {}
+        self.dead = set()
+
+    def add(self, entity, component):
+        self.entities.setdefault(entity, {})[type(component)] = component
+
+    def remove(self, entity, component_type):
+        del self.entities[entity][component_type]
+        if not self.entities[entity]:
+            del self.entities[entity]
+
+    def delete(self, entity, immediate):
+        if immediate:
+            self.entities.pop(entity, None)
+            self.dead.discard(entity)
+        else:
+            self.dead.add(entity)
+
+    def process(self):
+        for entity in self.dead:
+            self.entities.pop(entity, None)
+        self.dead.clear()
+
+    def exists(self, entity):
+        return entity in self.entities and entity not in self.dead
+
+    def query(self, component_types):
+        # entities waiting for the next process to delete them still show up
+        return sorted((entity, tuple(id(components[t]) for t in component_types))
+                      for entity, components in self.entities.items()
+                      if all(t in components for t in component_types))
+
+
+def query(world, component_types):
+    if len(component_types) == 1:
+        return sorted((e, (id(c),)) for e, c in world.get_component(component_types[0]))
+    return sorted((e, tuple(map(id, cs))) for e, cs in world.get_components(*component_types))
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_world_matches_model(seed):
+    rng = random.Random(seed)
+    world, model = esper.World(), Model()
+    entities = []
+    for step in range(1000):
+        op = rng.random()
+        if op < 0.2:
+            components = [t() for t in rng.sample([A, B, C, D], rng.randint(0, 3))]
+            entity = world.create_entity(*components)
+            for component in components:
+                model.add(entity, component)
+            entities.append(entity)
+        elif op < 0.5 and entities:
+            entity = rng.choice(entities)
+            if model.exists(entity):
+                component = rng.choice([A, B, C, D])()
+                world.add_component(entity, component)
+                model.add(entity, component)
+        elif op < 0.7 and entities:
+            entity = rng.choice(entities)
+            if model.exists(entity):
+                component_type = rng.choice(list(model.entities[entity]))
+                world.remove_component(entity, component_type)
+                model.remove(entity, component_type)
+        elif op < 0.8 and entities:
+            entity = rng.choice(entities)
+            if model.exists(entity):
+                immediate = rng.random() < 0.5
+                world.delete_entity(entity, immediate)
+                model.delete(entity, immediate)
+        elif op < 0.85:
+            world.process()
+            model.process()
+        elif op < 0.9:
+            kinds = rng.sample([A, B, C, D], rng.randint(1, 3))
+            rows = [[t() for t in kinds] for _ in range(rng.randint(1, 5))]
+            created = world.create_entities(*map(list, zip(*rows)))
+            for entity, row in zip(created, rows):
+                for component in row:
+                    model.add(entity, component)
+            entities.extend(created)
+        elif op < 0.93 and entities:
+            doomed = [e for e in rng.sample(entities, min(3, len(entities))) if model.exists(e)]
+            immediate = rng.random() < 0.5
+            world.delete_entities(doomed, immediate)
+            for entity in doomed:
+                model.delete(entity, immediate)
+
+        entities = [e for e in entities if e in model.entities]
+        for component_types in QUERIES:
+            assert query(world, component_types) == model.query(component_types), step
+        for entity in entities:
+            assert world.entity_exists(entity) == model.exists(entity), step
+
+
+def test_ids_are_recycled_with_a_new_generation():
+    world = esper.World()
+    a = world.create_entity(A())
+    world.delete_entity(a, immediate=True)
+    b = world.create_entity(A())
+    assert b & 0xFFFFFFFF == a & 0xFFFFFFFF and b != a
+    assert not world.entity_exists(a)
+
+
+def test_unknown_id_can_be_added_to_and_deleted():
+    world = esper.World()
+    world.add_component(1000, A())
+    assert world.entity_exists(1000)
+    world.delete_entity(1000, immediate=True)
+    assert not world.entity_exists(1000)
+    assert [world.create_entity(A()) for _ in range(3)] == [1, 2, 3]
+
+
+def test_ids_given_to_add_component_are_not_handed_out():
+    world = esper.World()
+    world.add_component(2, A())
+    assert [world.create_entity(B()) for _ in range(2)] == [1, 3]
+
+
+def test_stale_id_is_rejected():
+    world = esper.World()
+    a = world.create_entity(A())
+    world.delete_entity(a, immediate=True)
+    b = world.create_entity(B())
+    with pytest.raises(KeyError):
+        world.add_component(a, C())
+    with pytest.raises(KeyError):
+        world.delete_entity(a, immediate=True)
+    c = world.create_entity(C())
+    assert c != b
+    assert world.component_for_entity(b, B) and world.component_for_entity(c, C)
+
+
+def test_bulk_create_and_delete_columns():
+    world = esper.World()
+    xs = np.arange(6, dtype=float)
+    entities = world.create_entities((Body, {'x': xs, 'y': -xs}), [A() for _ in range(6)])
+    assert len(set(entities)) == 6
+
+    world.delete_entities(entities[1::2], immediate=True)
+    [(ids, (bodies,))] = world.get_columns(Body)
+    values = dict(zip(ids.tolist(), bodies.x.tolist()))
+    assert values == {entities[i]: float(i) for i in (0, 2, 4)}
+
+    # a missing Entity leaves the rest in place
+    with pytest.raises(KeyError):
+        world.delete_entities([entities[0], entities[1]], immediate=True)
+    assert world.entity_exists(entities[0])
+
+    # the freed ids come back with new generations, and their rows are fresh
+    again = world.create_entities([Body(x=100.0) for _ in range(3)])
+    assert not set(again) & set(entities)
+    assert sorted(body.x for _, body in world.get_component(Body)) == [0.0, 2.0, 4.0, 100.0, 100.0, 100.0]
+
+    world.delete_entities(again)
+    world.process()
+    assert sorted(body.x for _, body in world.get_component(Body)) == [0.0, 2.0, 4.0]
+
+
+class Step(esper.Processor):
+    def __init__(self, name, log, reads=None, writes=None, barrier=None):
+        self.name = name
+        self.log = log
+        self.reads = reads
+        self.writes = writes
+        self.barrier = barrier
+
+    def process(self):
+        if self.barrier is not None:
+            self.barrier.wait()
+        self.log.append(self.name)
+
+
+class Move(Step):
+    pass
+
+
+def test_stages_group_processors_by_reads_and_writes():
+    world = esper.World(workers=4)
+    log = []
+    world.add_processor(Move('move', log, reads=(B,), writes=(A,)), priority=5)
+    world.add_processor(Step('spawn', log, reads=(C,), writes=(D,)), priority=4)
+    world.add_processor(Step('collide', log, reads=(A,)), priority=3)
+    world.add_processor(Step('render', log, reads=(A, D)), priority=3)
+    world.add_processor(Step('cleanup', log), priority=2)
+    world.add_processor(Step('count', log, reads=(B,)), priority=1)
+    stages = [[processor.name for processor in stage] for stage in world.stages]
+    # readers of what move and spawn write wait for them, readers share a stage,
+    # and an undeclared Processor sits on its own between the others
+    assert stages == [['move', 'spawn'], ['collide', 'render'], ['cleanup'], ['count']]
+
+    world.remove_processor(Move)
+    assert [[processor.name for processor in stage] for stage in world.stages] == \
+        [['spawn', 'collide'], ['render'], ['cleanup'], ['count']]
+    world.close()
+
+
+def test_workers_run_a_stage_at_once():
+    import threading
+
+    # each Processor of the first stage waits for the other, so they only
+    # finish if they run on separate threads
+    barrier = threading.Barrier(2, timeout=5)
+    log = []
+    with esper.World(workers=2) as world:
+        world.add_processor(Step('a', log, writes=(A,), barrier=barrier), priority=2)
+        world.add_processor(Step('b', log, writes=(B,), barrier=barrier), priority=2)
+        world.add_processor(Step('c', log, reads=(A, B)), priority=1)
+        for _ in range(3):
+            world.process()
+            assert sorted(log[:2]) == ['a', 'b'] and log[2:] == ['c']
+            log.clear()
+        executor = world._executor
+        assert executor is not None
+    assert world._executor is None
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
+
+    # a closed World starts a new pool when it runs again
+    world.process()
+    assert sorted(log) == ['a', 'b', 'c']
+    world.close()
+
+
+class Clock:
+    """A stand in for the time module whose clock only moves when told to"""
+    def __init__(self):
+        self.now = 0
+
+    def perf_counter_ns(self):
+        return self.now
+
+
+class Slow(esper.Processor):
+    def __init__(self, clock):
+        self.clock = clock
+        self.runs = 0
+
+    def process(self):
+        self.runs += 1
+        self.clock.now += self.runs * 1_000_000
+        self.world.get_component(A)
+
+
+def test_profiler_timings_and_exports(monkeypatch, tmp_path):
+    import json
+
+    clock = Clock()
+    monkeypatch.setattr(esper, '_time', clock)
+    world = esper.World()
+    profiler = world.enable_profiling(window=50, trace=10)
+    world.create_entity(A())
+    world.add_processor(Slow(clock))
+    for _ in range(100):
+        world.process()
+
+    # the Processor took 1 to 100 ms, and only the last 50 runs are in the window
+    summary = profiler.summary()
+    slow = summary['timings']['Slow']
+    assert slow == {'count': 100, 'last': 100.0, 'p50': 75.0, 'p95': 97.0, 'p99': 99.0, 'max': 100.0}
+    assert summary['timings']['_clear_dead_entities']['count'] == 100
+    assert summary['cache'] == {'hits': {'get_component': 99, 'get_components': 0},
+                                'misses': {'get_component': 1, 'get_components': 0}}
+
+    path = tmp_path / 'profile.json'
+    assert json.loads(profiler.to_json(str(path))) == summary
+    assert json.loads(path.read_text()) == summary
+
+    # the trace keeps the last 10 spans, in microseconds
+    path = tmp_path / 'trace.json'
+    profiler.chrome_trace(str(path))
+    events = json.loads(path.read_text())['traceEvents']
+    assert len(events) == 10
+    assert {event['ph'] for event in events} == {'X'} and {event['tid'] for event in events} == {0}
+    assert [event['dur'] for event in events if event['name'] == 'Slow'] == [96000.0, 97000.0, 98000.0, 99000.0, 100000.0]
+    assert events[-1]['ts'] == sum(range(100)) * 1000.0
+
+    profiler.reset()
+    assert profiler.summary() == {'timings': {}, 'cache': {'hits': {'get_component': 0, 'get_components': 0},
+                                                          'misses': {'get_component': 0, 'get_components': 0}}}
+    world.disable_profiling()
+    world.process()
+    assert world.profiler is None and profiler.summary()['timings'] == {}
+
+
+class Query(esper.Processor):
+    def __init__(self, component_type, barrier):
+        self.reads = (component_type,)
+        self.writes = ()
+        self.component_type = component_type
+        self.barrier = barrier
+
+    def process(self):
+        self.barrier.wait()
+        for _ in range(5000):
+            self.world.get_component(self.component_type)
+
+
+def test_profiler_counts_every_lookup_from_worker_threads():
+    import sys
+    import threading
+
+    barrier = threading.Barrier(4, timeout=5)
+    # switch threads as often as possible, so unguarded counts would lose updates
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with esper.World(workers=4, timed=True) as world:
+            for component_type in (A, B, C, D):
+                world.create_entity(component_type())
+                world.add_processor(Query(component_type, barrier))
+            assert len(world.stages) == 1
+            for _ in range(4):
+                world.process()
+    finally:
+        sys.setswitchinterval(interval)
+
+    summary = world.profiler.summary()
+    assert summary['cache']['misses']['get_component'] == 4
+    assert summary['cache']['hits']['get_component'] == 4 * 4 * 5000 - 4
+    assert summary['timings']['Query']['count'] == 4 * 4
@@ -0,0 +1,142 @@
+import time
+
+import numpy as np
+import pytest
+
+from alchemist import esper, ConnwaysGameOfLife
+from alchemist import gameloop
+from alchemist.gameloop import FixedTimestep, SimulationThread
+
+from grids import soup, reference
+
+
+class Clock:
+    """A stand in for perf_counter that only moves when a system takes time"""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Scheduler:
+    """A stand in for pyglet.clock"""
+    def __init__(self):
+        self.scheduled = []
+
+    def schedule(self, func):
+        self.scheduled.append(func)
+
+    def unschedule(self, func):
+        self.scheduled.remove(func)
+
+
+class Logger(esper.Processor):
+    def __init__(self, log):
+        self.log = log
+
+    def process(self, dt):
+        self.log.append(('world', dt))
+
+
+def test_systems_tick_in_order():
+    log = []
+    world = esper.World()
+    world.add_processor(Logger(log))
+    life = ConnwaysGameOfLife(soup((12, 12), seed=1))
+    start = life.grid.copy()
+
+    # steps of an eighth of a second add up without rounding
+    loop = FixedTimestep(rate=8)
+    loop.add(world)
+    loop.add(life)
+    loop.add(lambda dt: log.append(('callable', dt)))
+    loop.update(0.3125)
+    # two whole steps, with half a step left over to interpolate by
+    assert log == [('world', 0.125), ('callable', 0.125)] * 2
+    assert np.array_equal(life.grid, reference(start, 2))
+    assert loop.stats['ticks'] == 2 and loop.stats['dropped'] == 0
+    assert loop.alpha == pytest.approx(0.5)
+
+    loop.update(0.0625)
+    assert loop.stats['ticks'] == 3 and loop.alpha == 0
+
+
+def test_ticks_past_max_ticks_are_dropped():
+    loop = FixedTimestep(rate=10, max_ticks=5)
+    ticks = []
+    loop.add(ticks.append)
+    loop.update(1.03)
+    assert len(ticks) == 5
+    assert loop.stats == {'ticks': 5, 'dropped': 5, 'tick_time': loop.stats['tick_time']}
+    assert loop.alpha == pytest.approx(0.3)
+
+
+def test_slow_ticks_are_dropped_past_the_budget(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(gameloop.time, 'perf_counter', clock)
+
+    def slow(dt):
+        clock.now += 0.02
+
+    loop = FixedTimestep(rate=60, budget=1 / 60, max_ticks=10)
+    loop.add(slow)
+    # a frame that is a quarter second late still only spends the budget on ticks
+    loop.update(0.25)
+    assert loop.stats['ticks'] == 1
+    assert loop.stats['dropped'] == 14
+    assert loop.stats['tick_time'] == pytest.approx(0.02)
+    assert loop.accumulator < loop.step
+
+
+def test_start_and_stop_on_a_clock():
+    scheduler = Scheduler()
+    loop = FixedTimestep()
+    loop.start(scheduler)
+    assert scheduler.scheduled == [loop.update]
+    loop.stop(scheduler)
+    assert scheduler.scheduled == []
+
+
+def test_thread_publishes_whole_generations():
+    start = soup((64, 64), seed=5)
+    life = ConnwaysGameOfLife(start.copy())
+    sim = SimulationThread(lambda: life.grid, rate=1000)
+    sim.add(life)
+    with sim.frame() as grid:
+        assert np.array_equal(grid, start)
+    sim.start()
+    try:
+        seen = set()
+        deadline = time.monotonic() + 5
+        while len(seen) < 5 and time.monotonic() < deadline:
+            with sim.frame() as grid:
+                generation = sim.generation
+                frame = grid.copy()
+            if generation not in seen and generation <= 40:
+                # the frame is always the generation it is numbered as
+                assert np.array_equal(frame, reference(start, generation))
+                seen.add(generation)
+            time.sleep(0.001)
+    finally:
+        sim.stop()
+    assert not sim.is_alive()
+    assert len(seen) == 5
+    with sim.frame() as grid:
+        assert np.array_equal(grid, life.grid)
+    assert sim.stats['ticks'] == sim.generation
+
+
+def test_thread_drops_overrun_ticks():
+    sim = SimulationThread(np.zeros((4, 4), dtype=np.int8), rate=200)
+    sim.add(lambda dt: time.sleep(0.02))
+    sim.start()
+    try:
+        deadline = time.monotonic() + 5
+        while sim.stats['ticks'] < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        sim.stop()
+    # every tick takes four steps, so about three are dropped after each one
+    assert sim.stats['ticks'] >= 3
+    assert sim.stats['dropped'] >= 3 * sim.stats['ticks'] - 3
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from alchemist import HashLife
+
+from grids import GLIDER, R_PENTOMINO, centred, reference, assert_unbounded
+
+
+def test_round_trip():
+    grid = np.zeros((20, 30), dtype=np.int8)
+    grid[3:6, 20:23] = GLIDER
+    universe = HashLife.from_array(grid)
+    assert universe.population == GLIDER.sum()
+    assert np.array_equal(universe.to_array(grid.shape), grid)
+    assert np.array_equal(universe.to_array((3, 3), origin=(3, 20)), GLIDER)
+
+
+@pytest.mark.parametrize('generations', [1, 2, 3, 7, 64, 301])
+def test_hashlife_matches_vectorized(generations):
+    grid = centred(512, R_PENTOMINO)
+    expected = reference(grid, generations)
+    assert_unbounded(expected)
+    universe = HashLife.from_array(grid)
+    universe.run(generations)
+    assert universe.generation == generations
+    assert np.array_equal(universe.to_array(grid.shape), expected)
+
+
+def test_glider_far_ahead():
+    # a glider moves one cell down and right every four generations, forever
+    universe = HashLife.from_array(GLIDER)
+    universe.run(1 << 40)
+    offset = 1 << 38
+    assert universe.population == GLIDER.sum()
+    assert np.array_equal(universe.to_array((3, 3), origin=(offset, offset)), GLIDER)
+
+
+def test_table_stays_bounded_during_a_step():
+    grid = centred(64, R_PENTOMINO)
+    universe = HashLife.from_array(grid, max_nodes=1000)
+    join = universe.join
+    peak = 0
+
+    def counting(*quadrants):
+        nonlocal peak
+        node = join(*quadrants)
+        peak = max(peak, universe.cache_size)
+        return node
+
+    universe.join = counting
+    # one call, and so a single step of 128 generations
+    universe.run(128)
+    # a collection runs at the start of every successor, a few joins apart
+    assert peak <= 1000 + 64
+    assert universe.population == reference(centred(512, R_PENTOMINO), 128).sum()
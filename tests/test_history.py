@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from alchemist import ConnwaysGameOfLife, HistoryWriter, HistoryReader
+
+from grids import soup
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    """A history of 71 generations of a soup, and the frames it was recorded from"""
+    life = ConnwaysGameOfLife(soup((40, 50), seed=9))
+    frames = []
+    with HistoryWriter(str(tmp_path), life.grid.shape, keyframe_every=16) as writer:
+        life.record(writer)
+        frames.append(life.grid.copy())
+        for _ in range(70):
+            life.run(1)
+            frames.append(life.grid.copy())
+    return HistoryReader(str(tmp_path)), frames
+
+
+def test_iterate(recorded):
+    reader, frames = recorded
+    assert len(reader) == len(frames) == 71
+    for frame, expected in zip(reader, frames):
+        assert np.array_equal(frame, expected)
+
+
+def test_seek_anywhere(recorded):
+    reader, frames = recorded
+    # forwards within a keyframe span, back across spans and from the end
+    for generation in (0, 5, 6, 15, 16, 17, 70, 3, 47, 32, 31, -1, -71):
+        assert np.array_equal(reader[generation], frames[generation])
+    with pytest.raises(IndexError):
+        reader[71]
+
+
+def test_frames_are_copies(recorded):
+    reader, frames = recorded
+    first = reader[0]
+    reader[1]
+    assert np.array_equal(first, frames[0])
+
+
+def test_multi_state_grids(tmp_path):
+    rng = np.random.default_rng(2)
+    frames = [rng.integers(0, 127, (9, 7)).astype(np.int8) for _ in range(10)]
+    with HistoryWriter(str(tmp_path), (9, 7), keyframe_every=4) as writer:
+        for frame in frames:
+            writer.record(frame)
+    reader = HistoryReader(str(tmp_path))
+    assert all(np.array_equal(reader[g], frames[g]) for g in (9, 0, 5, 4, 3))
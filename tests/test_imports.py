@@ -0,0 +1,67 @@
+import subprocess
+import sys
+
+import pytest
+
+import alchemist
+from alchemist import importtime
+
+
+def run(code: str) -> str:
+    """Run code in a fresh interpreter and return what it printed"""
+    return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.strip()
+
+
+def test_import_loads_only_the_core():
+    loaded = run('import sys, numpy; before = set(sys.modules); import alchemist; '
+                 'print(sorted(m for m in set(sys.modules) - before '
+                 'if m.startswith("alchemist") or m.split(".")[0] in %r))' % (importtime.BACKENDS,))
+    assert loaded == str(['alchemist', 'alchemist.alchemy', 'alchemist.rules'])
+
+
+def test_import_has_no_side_effects():
+    # the global random state is untouched, so seeding before the import still decides the run
+    same = run('import numpy, random; numpy.random.seed(7); random.seed(7); '
+               'state = (numpy.random.get_state()[1].tolist(), random.getstate()); '
+               'import alchemist; '
+               'print(state == (numpy.random.get_state()[1].tolist(), random.getstate()))')
+    assert same == 'True'
+
+
+def test_names_load_their_module_on_first_use():
+    code = ('import sys, alchemist; '
+            'assert "alchemist.hashlife" not in sys.modules; '
+            'HashLife = alchemist.HashLife; '
+            'assert "alchemist.hashlife" in sys.modules and HashLife is sys.modules["alchemist.hashlife"].HashLife; '
+            'assert "HashLife" in vars(alchemist); '
+            'assert alchemist.esper is sys.modules["alchemist.esper"]; '
+            'print("ok")')
+    assert run(code) == 'ok'
+
+
+def test_every_lazy_name_exists():
+    for name, module in alchemist._LAZY.items():
+        if module in ('render', 'assets'):
+            continue
+        assert getattr(alchemist, name) is getattr(getattr(alchemist, module), name)
+    assert set(alchemist._LAZY) <= set(dir(alchemist))
+    assert alchemist._SUBMODULES <= set(dir(alchemist))
+    with pytest.raises(AttributeError, match='no attribute'):
+        alchemist.nothing_here
+
+
+def test_pyglet_backends_load_on_use():
+    pytest.importorskip('pyglet')
+    assert run('import sys, alchemist; alchemist.GridRenderer; alchemist.AtlasLoader; '
+               'print("pyglet" in sys.modules)') == 'True'
+
+
+def test_measure_reports_backends():
+    report = importtime.measure('alchemist')
+    assert report['module'] == 'alchemist'
+    assert report['backends'] == []
+    assert report['import_ms'] > 0 and report['numpy_ms'] > 0
+    assert 'alchemist.alchemy' in dict(report['slowest'])
+
+    pytest.importorskip('pyglet')
+    assert 'pyglet' in importtime.measure('alchemist.render')['backends']
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from alchemist import ConnwaysGameOfLife, PackedGrid
+
+from grids import soup, reference
+
+# widths on both sides of a word, and grids one cell thin
+SHAPES = [(30, 40), (64, 64), (17, 129), (5, 1), (1, 65)]
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+def test_round_trip(shape):
+    grid = soup(shape, seed=1)
+    packed = PackedGrid.from_array(grid)
+    assert packed.shape == shape
+    assert np.array_equal(packed.to_array(), grid)
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+def test_packed_grid_matches_vectorized(shape):
+    grid = soup(shape, seed=7)
+    packed = PackedGrid.from_array(grid)
+    packed.step(11)
+    assert np.array_equal(packed.to_array(), reference(grid, 11))
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+def test_bitpacked_engine_matches_vectorized(shape):
+    grid = soup(shape, seed=shape[1])
+    expected = ConnwaysGameOfLife(grid.copy())
+    life = ConnwaysGameOfLife(grid.copy(), engine='bitpacked')
+    for generations in (1, 2, 13):
+        expected.run(generations)
+        life.run(generations)
+        assert np.array_equal(life.grid, expected.grid)
+    # an edit between runs is picked up
+    expected.grid[:3, :3] = 1
+    life.grid[:3, :3] = 1
+    expected.run(9)
+    life.run(9)
+    assert np.array_equal(life.grid, expected.grid)
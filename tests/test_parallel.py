@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from alchemist import ConnwaysGameOfLife, ParallelRunner
+
+from grids import soup, reference
+
+
+@pytest.mark.parametrize('shape, workers', [((7, 9), 3), ((10, 5), 3), ((13, 40), 4), ((2, 30), 5), ((64, 64), 2)])
+def test_strips_match_the_serial_engine(shape, workers):
+    grid = soup(shape, seed=shape[0])
+    biome = ConnwaysGameOfLife(grid.copy())
+    with ParallelRunner(biome, workers=workers) as runner:
+        # never more workers than rows
+        assert runner.workers == min(workers, shape[0])
+        runner.run(5)
+        assert np.array_equal(biome.grid, reference(grid, 5))
+
+        # the workers keep going across calls, and see edits made in between
+        biome.grid[0, :3] = 1
+        edited = biome.grid.copy()
+        runner.run(7)
+        assert np.array_equal(biome.grid, reference(edited, 7))
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from alchemist import dump, dumps, load, loads
+
+
+@pytest.mark.parametrize('text, message', [
+    ('x = 2, y = 2\nboz!\n', 'unexpected'),
+    ('x = 2, y = 2\n3o!\n', 'does not fit'),
+    ('#N only a comment\n', 'no RLE header'),
+])
+def test_load_errors_are_value_errors(tmp_path, text, message):
+    path = tmp_path / 'bad.rle'
+    path.write_text(text)
+    with pytest.raises(ValueError, match=message):
+        load(str(path))
+
+
+def test_load_empty_file(tmp_path):
+    path = tmp_path / 'empty.rle'
+    path.write_text('')
+    with pytest.raises(ValueError, match='empty'):
+        load(str(path))
+
+
+def test_load_cells(tmp_path):
+    path = tmp_path / 'glider.cells'
+    path.write_text('!Name: Glider\r\n.O.\r\n..O\r\nOOO\r\n')
+    cell = load(str(path))
+    assert cell.name == 'Glider'
+    assert np.array_equal(cell.grid, [[0, 1, 0], [0, 0, 1], [1, 1, 1]])
+
+
+@pytest.mark.parametrize('text', ['', '\n', '!Name: nothing\n'])
+def test_loads_empty_text(text):
+    assert loads(text).grid.size == 0
+
+
+
+@pytest.mark.parametrize('shape, states', [((3, 3), 2), ((17, 90), 2), ((40, 7), 25), ((1, 1), 2), ((6, 5), 1)])
+def test_rle_round_trip(shape, states):
+    grid = np.random.default_rng(shape[1]).integers(0, states, shape).astype(np.int8)
+    cell = loads(dumps(grid, name='soup', rule='B36/S23'))
+    assert np.array_equal(cell.grid, grid)
+    assert cell.name == 'soup' and cell.rule == 'B36/S23'
+
+
+@pytest.mark.parametrize('suffix', ['.rle', '.cells'])
+def test_file_round_trip(tmp_path, suffix):
+    grid = np.random.default_rng(5).integers(0, 2, (33, 21)).astype(np.int8)
+    grid[:, -1] = 0
+    grid[0, -1] = 1
+    path = str(tmp_path / f'soup{suffix}')
+    dump(grid, path, name='soup')
+    cell = load(path)
+    assert np.array_equal(cell.grid, grid)
+    assert cell.name == 'soup'
+
+
+@pytest.mark.parametrize('shape', [(0, 0), (0, 5), (3, 0)])
+def test_empty_round_trip(shape):
+    grid = np.zeros(shape, dtype=np.int8)
+    assert loads(dumps(grid)).grid.shape == shape
+    assert dumps(loads('').grid) == 'x = 0, y = 0, rule = B3/S23\n!\n'
@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+pyglet = pytest.importorskip('pyglet')
+pyglet.options['headless'] = True
+
+from alchemist.render import GridRenderer, PALETTE  # noqa: E402
+
+
+def test_states_past_the_palette():
+    try:
+        renderer = GridRenderer((16, 16), tile=8)
+    except Exception as error:  # no GL context to draw with
+        pytest.skip(f'cannot create a texture: {error}')
+    grid = (np.arange(16 * 16).reshape(16, 16) % 128).astype(np.int8)
+    assert renderer.update(grid) == 4
+    lookup = renderer._lookup
+    assert np.array_equal(lookup[:len(PALETTE)], PALETTE)
+    # the live colours repeat in order past the end of the palette
+    assert np.array_equal(lookup[len(PALETTE):2 * len(PALETTE) - 1], PALETTE[1:])
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from alchemist import ConnwaysGameOfLife, Element, Rule, compile_rule
+
+from grids import soup, reference
+
+
+def run(grid, generations, rule):
+    life = ConnwaysGameOfLife(grid.copy(), engine='rule', rule=rule)
+    life.run(generations)
+    return life.grid
+
+
+@pytest.mark.parametrize('shape', [(30, 40), (17, 129), (5, 1)])
+def test_life_matches_vectorized(shape):
+    grid = soup(shape, seed=shape[1])
+    assert np.array_equal(run(grid, 13, 'B3/S23'), reference(grid, 13))
+
+
+@pytest.mark.parametrize('sb, bs', [('23/3', 'B3/S23'), ('23/36', 'B36/S23'), ('/2', 'B2/S'), ('1357/1357', 'B1357/S1357')])
+def test_sb_notation(sb, bs):
+    assert np.array_equal(compile_rule(sb).layers[0][3], compile_rule(bs).layers[0][3])
+    grid = soup((20, 20), seed=4)
+    assert np.array_equal(run(grid, 6, sb), run(grid, 6, bs))
+
+
+def test_highlife_replicator_differs_from_life():
+    grid = soup((24, 24), seed=8)
+    assert not np.array_equal(run(grid, 10, 'B36/S23'), run(grid, 10, 'B3/S23'))
+
+
+@pytest.mark.parametrize('text', ['B3/S23/C1', 'nonsense', 'B9/S23'])
+def test_bad_rulestrings(text):
+    with pytest.raises(ValueError):
+        compile_rule(text)
+
+
+def test_generations_decay():
+    # Brian's Brain: born with 2 live neighbours, no cell survives, and the dying
+    # state 2 neither counts as a neighbour nor comes back
+    grid = np.zeros((6, 6), dtype=np.int8)
+    grid[2, 2:4] = 1
+    rule = 'B2/S/C3'
+    assert compile_rule(rule).states == 3
+
+    first = run(grid, 1, rule)
+    expected = np.zeros((6, 6), dtype=np.int8)
+    expected[2, 2:4] = 2
+    expected[1, 2:4] = expected[3, 2:4] = 1
+    assert np.array_equal(first, expected)
+
+    second = run(grid, 2, rule)
+    assert (second[2, 2:4] == 0).all()
+    assert (second[1, 2:4] == 2).all() and (second[3, 2:4] == 2).all()
+
+
+def slow_step(rule, grid):
+    """One generation of a compiled rule, cell by cell from the elements' own rules"""
+    h, w = grid.shape
+    padded = np.pad(grid, 1)
+    inside = np.pad(np.ones(grid.shape, dtype=bool), 1)
+    nxt = np.zeros_like(grid)
+    for r in range(h):
+        for c in range(w):
+            state = int(grid[r, c])
+            for element, offset in zip(rule.elements, rule.offsets):
+                owned = offset < state <= offset + element.states - 1
+                if state and not owned:
+                    continue
+                total = 0
+                for (dr, dc), k in np.ndenumerate(element.kernel):
+                    if not inside[r + dr, c + dc]:
+                        continue
+                    s = int(padded[r + dr, c + dc])
+                    if s == 0:
+                        total += k * int(element.values[0])
+                    elif offset < s <= offset + element.states - 1:
+                        total += k * int(element.values[s - offset])
+                micro = state - offset if owned else 0
+                result = element.micro_state_rules.get(micro, {}).get(total, 0)
+                if owned:
+                    nxt[r, c] = offset + result if result else 0
+                    break
+                if result:
+                    nxt[r, c] = offset + result
+                    break
+    return nxt
+
+
+def test_multi_element_rule_matches_its_elements():
+    life = Element.from_rulestring('B3/S23', name='life')
+    rust = Element('rust', {0: {2: 1, 5: 1}, 1: {1: 2, 2: 2, 3: 1}, 2: {0: 2, 1: 1, 4: 2}},
+                   states=3, values=[0, 2, 1], kernel=np.array([[0, 1, 0], [1, 0, 1], [0, 1, 0]]))
+    rule = Rule([life, rust])
+    assert rule.states == 4 and rule.offsets == [0, 1]
+
+    grid = np.random.default_rng(6).integers(0, rule.states, (12, 15)).astype(np.int8)
+    expected = grid.copy()
+    for _ in range(4):
+        expected = slow_step(rule, expected)
+    assert np.array_equal(run(grid, 4, rule), expected)
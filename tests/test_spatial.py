@@ -0,0 +1,159 @@
+import random
+
+import numpy as np
+import pytest
+
+from alchemist import esper, GridPosition, SpatialHash, SpatialProcessor
+
+from grids import soup
+
+
+class Tag:
+    pass
+
+
+def filed(index: SpatialHash) -> dict:
+    return {int(e): index.position(int(e)) for e in index.entities[:index.count]}
+
+
+def expected(world) -> dict:
+    return {e: (p.row, p.col, p.radius) for e, p in world.get_component(GridPosition)}
+
+
+def check(index: SpatialHash, world):
+    assert filed(index) == expected(world)
+    # every entity is in the bucket of its cell, and no bucket is empty
+    buckets = {}
+    for entity, (row, col, _) in filed(index).items():
+        buckets.setdefault(index._key(row, col), set()).add(entity)
+    assert index.buckets == buckets
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_processor_follows_the_world(seed):
+    rng = random.Random(seed)
+    world = esper.World()
+    spatial = SpatialProcessor(bucket=8)
+    world.add_processor(spatial)
+    entities = []
+    spare = []
+
+    for frame in range(300):
+        for _ in range(rng.randrange(4)):
+            action = rng.random()
+            position = GridPosition(rng.randrange(-8, 64), rng.randrange(-8, 64), rng.randrange(3))
+            if action < 0.25 or not entities:
+                entities.append(world.create_entity(position, Tag()))
+            elif action < 0.35:
+                world.delete_entity(entities.pop(rng.randrange(len(entities))))
+            elif action < 0.45:
+                entity = rng.choice(entities)
+                if world.has_component(entity, GridPosition):
+                    spare.append(world.component_for_entity(entity, GridPosition))
+                    world.remove_component(entity, GridPosition)
+            elif action < 0.55:
+                # a new position, or one another entity gave up
+                world.add_component(rng.choice(entities), spare.pop() if spare else position)
+            elif action < 0.6:
+                world.add_component(rng.choice(entities), Tag())
+            else:
+                entity = rng.choice(entities)
+                if world.has_component(entity, GridPosition):
+                    moving = world.component_for_entity(entity, GridPosition)
+                    moving.row += rng.randrange(-9, 10)
+                    moving.col += rng.randrange(-9, 10)
+                    if rng.random() < 0.2:
+                        moving.radius = rng.randrange(3)
+        # a position moved after it left its entity is not filed again
+        for position in spare:
+            position.row += 1
+        world.process()
+        check(spatial.index, world)
+
+
+def test_only_moved_entities_are_refiled(monkeypatch):
+    world = esper.World()
+    spatial = SpatialProcessor()
+    world.add_processor(spatial)
+    entities = [world.create_entity(GridPosition(i, i)) for i in range(100)]
+    world.process()
+    assert len(spatial.index) == 100
+
+    refiled = []
+    insert = spatial.index.insert
+    monkeypatch.setattr(spatial.index, 'insert', lambda entity, *args: (refiled.append(entity), insert(entity, *args)))
+    world.process()
+    assert refiled == []
+
+    for entity in entities[10:12]:
+        world.component_for_entity(entity, GridPosition).col += 40
+    world.process()
+    assert sorted(refiled) == entities[10:12]
+    check(spatial.index, world)
+
+    # churn walks the positions but still only files what changed
+    refiled.clear()
+    world.delete_entity(entities[0])
+    world.add_component(entities[1], GridPosition(5, 5))
+    extra = world.create_entity(GridPosition(7, 7))
+    world.process()
+    assert sorted(refiled) == [entities[1], extra]
+    assert entities[0] not in spatial.index
+    check(spatial.index, world)
+
+
+class Reader(esper.Processor):
+    reads = (SpatialHash,)
+    writes = ()
+
+    def process(self):
+        pass
+
+
+class Walker(esper.Processor):
+    reads = ()
+    writes = (GridPosition,)
+
+    def process(self):
+        pass
+
+
+def test_index_is_declared_written():
+    world = esper.World(workers=2)
+    spatial = SpatialProcessor()
+    world.add_processor(Walker(), priority=2)
+    world.add_processor(spatial, priority=1)
+    world.add_processor(Reader())
+    assert [[type(p) for p in stage] for stage in world.stages] == [[Walker], [SpatialProcessor], [Reader]]
+    world.close()
+
+
+def test_queries_match_brute_force():
+    rng = np.random.default_rng(3)
+    grid = soup((40, 50), seed=3)
+    index = SpatialHash(bucket=7)
+    positions = {}
+    for entity in range(1, 200):
+        row, col, radius = int(rng.integers(-3, 43)), int(rng.integers(-3, 53)), int(rng.integers(0, 4))
+        index.insert(entity, row, col, radius)
+        positions[entity] = (row, col, radius)
+    for entity in range(1, 200, 3):
+        index.remove(entity)
+        del positions[entity]
+
+    def under(row, col, radius):
+        return [(r, c) for r in range(row - radius, row + radius + 1) for c in range(col - radius, col + radius + 1)
+                if 0 <= r < 40 and 0 <= c < 50 and grid[r, c]]
+
+    order = index.entities[:index.count].tolist()
+    assert index.counts(grid).tolist() == [len(under(*positions[e])) for e in order]
+    assert sorted(index.overlapping(grid).tolist()) == sorted(e for e, p in positions.items() if under(*p))
+    for entity in order[:20]:
+        assert sorted(map(tuple, index.cells_under(grid, entity).tolist())) == under(*positions[entity])
+    assert sorted(index.query(5, 10, 20, 31)) == sorted(e for e, (r, c, _) in positions.items()
+                                                         if 5 <= r < 20 and 10 <= c < 31)
+
+    dirty = np.zeros((5, 7), dtype=bool)
+    dirty[1, 2] = dirty[4, 6] = True
+    assert sorted(index.entities_in(dirty, tile=8).tolist()) == sorted(
+        e for e, (r, c, _) in positions.items() if 0 <= r < 40 and 0 <= c < 56 and dirty[r // 8, c // 8])
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from alchemist.alchemy import BLENDS, EDGES, Cell, ConnwaysGameOfLife, PackedGrid, stamp
+
+
+def random_cell(rng) -> Cell:
+    h, w = rng.integers(1, 8, 2)
+    return Cell((rng.random((h, w)) < 0.5).astype(np.int8))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_packed_apply_matches_array(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(100):
+        h, w = rng.integers(3, 20, 2)
+        base = (rng.random((h, w)) < 0.4).astype(np.int8)
+        cell = random_cell(rng)
+        x, y = int(rng.integers(-8, h + 2)), int(rng.integers(-8, w + 2))
+
+        packed = PackedGrid.from_array(base)
+        expected = base.copy()
+        cell.apply(packed, x, y)
+        cell.apply(expected, x, y)
+        assert (packed.to_array() == expected).all()
+        # the padding rows stay dead, so stepping still matches
+        assert not packed.words[0].any() and not packed.words[-1].any()
+        packed.step(3)
+        biome = ConnwaysGameOfLife(expected)
+        biome.run(3)
+        assert (packed.to_array() == biome.grid).all()
+
+
+def test_paste_negative_offsets():
+    packed = PackedGrid((8, 8))
+    Cell(np.ones((3, 3), dtype=np.int8)).apply(packed, -1, 2)
+    assert not packed.words[0].any()
+    Cell(np.ones((3, 3), dtype=np.int8)).apply(packed, 4, -2)
+    expected = np.zeros((8, 8), dtype=np.int8)
+    expected[0:2, 2:5] = 1
+    expected[4:7, 0:1] = 1
+    assert (packed.to_array() == expected).all()
+
+
+@pytest.mark.parametrize('edge', EDGES)
+@pytest.mark.parametrize('blend', BLENDS)
+def test_stamp_matches_one_at_a_time(edge, blend):
+    rng = np.random.default_rng(1)
+    cells = [random_cell(rng) for _ in range(4)]
+    placements = [(cells[i % 4], int(rng.integers(-6, 30)), int(rng.integers(-6, 30))) for i in range(60)]
+    grid = (rng.random((24, 24)) < 0.3).astype(np.int8)
+
+    # overwrites are grouped by cell, in order of first appearance, as stamp documents
+    first = {}
+    for cell, _, _ in placements:
+        first.setdefault(id(cell), len(first))
+    expected = grid.copy()
+    for cell, x, y in sorted(placements, key=lambda placement: first[id(placement[0])]):
+        h, w = cell.grid.shape
+        rows, cols = np.arange(x, x + h), np.arange(y, y + w)
+        if edge == 'wrap':
+            rows, cols = rows % 24, cols % 24
+        keep_r, keep_c = (rows >= 0) & (rows < 24), (cols >= 0) & (cols < 24)
+        block = cell.grid[np.ix_(keep_r, keep_c)]
+        target = np.ix_(rows[keep_r], cols[keep_c])
+        if blend == 'overwrite':
+            expected[target] = block
+        elif blend == 'or':
+            expected[target] |= block
+        else:
+            expected[target] ^= block
+
+    assert (stamp(grid.copy(), placements, edge=edge, blend=blend) == expected).all()
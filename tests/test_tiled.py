@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from alchemist import ConnwaysGameOfLife
+
+from grids import soup
+
+SHAPES = [(30, 40), (64, 64), (17, 129), (5, 1)]
+
+
+@pytest.mark.parametrize('tile', [8, 32])
+@pytest.mark.parametrize('shape', SHAPES)
+def test_tiled_engine_matches_vectorized(shape, tile):
+    grid = soup(shape, seed=shape[0] + tile)
+    expected = ConnwaysGameOfLife(grid.copy())
+    life = ConnwaysGameOfLife(grid.copy(), engine='tiled', tile=tile)
+    for generations in (1, 1, 2, 5, 13):
+        expected.run(generations)
+        life.run(generations)
+        assert np.array_equal(life.grid, expected.grid)
+    # an edit between runs wakes its tile
+    expected.grid[:3, :3] = 1
+    life.grid[:3, :3] = 1
+    expected.run(9)
+    life.run(9)
+    assert np.array_equal(life.grid, expected.grid)
+
+
+@pytest.mark.parametrize('tile', [8, 20, 32])
+@pytest.mark.parametrize('seed', [31, 34])
+def test_settled_grid_sleeps(seed, tile):
+    # 40 is not a multiple of 20 or 32, so the last tiles hang past the edge of the grid
+    life = ConnwaysGameOfLife(soup((40, 40), seed=seed), engine='tiled', tile=tile)
+    life.run(400)
+    settled = life.grid.copy()
+    life.run(1)
+    assert np.array_equal(life.grid, settled)
+    assert life.stats['active_tiles'] == 0